@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+Benchmark the template-processor pipeline stage by stage.
+
+Usage:
+    ./bench_theming.py
+    ./bench_theming.py --repeat 10 --resolutions 1920x1080,3840x2160
+    ./bench_theming.py -o results.json
+    ./bench_theming.py --baseline results.json --threshold 5
+
+Wallpapers are synthesized locally (no downloads) for every combination of
+resolution and color distribution, written as PNG and kept in
+$XDG_CACHE_HOME/noctalia/bench-corpus so later runs skip generation.
+
+Distributions:
+- gradient: smooth three-color gradient (many close colors)
+- blobs: a few flat color regions with mild noise (photo-like dominant colors)
+- noise: uniform random pixels (worst case for histogram sizes)
+- mono: low-chroma texture (monochrome wallpapers)
+
+Every image is run through these stages, each timed separately:
+    decode     PNG inflate + unfilter + sample conversion (all rows kept)
+    downscale  ImageMagick-compatible Triangle resize to 112x112
+    wu         Wu quantizer (128 colors)
+    wsmeans    WSMeans refinement seeded with the Wu colors
+    score      M3 source color scoring of the WSMeans population
+    kmeans     k-means palette extraction (faithful scheme, Box resize)
+    scheme     tonal-spot theme generation, dark and light
+    template   rendering every template in Assets/Templates
+    terminal   terminal theme generation for every supported terminal
+    preview    preview_palette() of the file without the extraction cache or
+               memo (32x32 thumbnail, as the wallpaper picker requests it).
+               The corpus is PNG, so this times `magick -thumbnail` when
+               ImageMagick is installed and a full in-process decode without it.
+
+Each stage reports p50/p90/p99 over --repeat runs (after --warmup runs) and
+the process peak RSS after the stage. Peak RSS is a high-water mark, so
+images are processed smallest first. With --baseline, p50 times are compared
+against a saved result file and the exit status is 1 when a stage got slower
+by more than --threshold percent (and by at least --min-delta-ms).
+
+Set NOCTALIA_NO_NUMPY=1 to benchmark the pure-Python paths.
+"""
+
+import argparse
+import json
+import math
+import platform
+import random
+import resource
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add the theming lib to path
+SCRIPT_DIR = Path(__file__).parent.resolve()
+THEMING_DIR = SCRIPT_DIR.parent / "python" / "src" / "theming"
+sys.path.insert(0, str(THEMING_DIR))
+
+from lib import image
+from lib.accel import numpy_module
+from lib.cache import cache_dir
+from lib.color import Color
+from lib.hct import solver_cache_info
+from lib.palette import extract_palette
+from lib.pixels import PixelBuffer
+from lib.preview import clear_preview_cache, preview_palette
+from lib.quantizer import quantize_wu, quantize_wsmeans, source_color_from_population, source_color_to_rgb
+from lib.renderer import TemplateRenderer
+from lib.resample import Resampler
+from lib.terminal import TerminalColors, TerminalGenerator
+from lib.theme import generate_theme
+
+REPO_DIR = SCRIPT_DIR.parent.parent
+TEMPLATES_DIR = REPO_DIR / "Assets" / "Templates"
+TERMINAL_SCHEME = REPO_DIR / "Assets" / "ColorScheme" / "Noctalia-default" / "Noctalia-default.json"
+TERMINALS = ["foot", "ghostty", "kitty", "alacritty", "wezterm"]
+
+STAGES = ["decode", "downscale", "wu", "wsmeans", "score", "kmeans", "scheme", "template", "terminal", "preview"]
+DISTRIBUTIONS = ["gradient", "blobs", "noise", "mono"]
+DEFAULT_RESOLUTIONS = "640x360,1280x720,1920x1080"
+PERCENTILES = (50, 90, 99)
+
+# Bump when the generated images change so stale corpus files are replaced
+CORPUS_VERSION = 1
+RESULTS_VERSION = 1
+
+
+# --- Synthetic corpus ---
+
+def _clamp(v: float) -> int:
+    return 0 if v < 0 else 255 if v > 255 else int(v)
+
+
+def _random_color(rng: random.Random) -> tuple[int, int, int]:
+    return (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+
+
+def _gradient_rows(width: int, height: int, rng: random.Random):
+    top_left, top_right, bottom = (_random_color(rng) for _ in range(3))
+    for y in range(height):
+        fy = y / max(1, height - 1)
+        row = bytearray(3 * width)
+        for c in range(3):
+            left = top_left[c] + (bottom[c] - top_left[c]) * fy
+            right = top_right[c] + (bottom[c] - top_right[c]) * fy
+            step = (right - left) / max(1, width - 1)
+            row[c::3] = bytes(_clamp(left + step * x) for x in range(width))
+        yield row
+
+
+def _blobs_rows(width: int, height: int, rng: random.Random):
+    centers = [(rng.random() * width, rng.random() * height, _random_color(rng)) for _ in range(6)]
+    for y in range(height):
+        row = bytearray(3 * width)
+        for x in range(width):
+            color = min(centers, key=lambda c: (c[0] - x) ** 2 + (c[1] - y) ** 2)[2]
+            row[3 * x:3 * x + 3] = bytes(_clamp(v + rng.randrange(-8, 9)) for v in color)
+        yield row
+
+
+def _noise_rows(width: int, height: int, rng: random.Random):
+    for _ in range(height):
+        yield bytearray(rng.randbytes(3 * width))
+
+
+def _mono_rows(width: int, height: int, rng: random.Random):
+    tint = (rng.randrange(-6, 7), rng.randrange(-6, 7), rng.randrange(-6, 7))
+    fx = rng.uniform(2.0, 6.0) * math.pi / width
+    fy = rng.uniform(2.0, 6.0) * math.pi / height
+    for y in range(height):
+        row = bytearray(3 * width)
+        for x in range(width):
+            v = 128 + 90 * math.sin(fx * x) * math.cos(fy * y) + rng.randrange(-4, 5)
+            row[3 * x:3 * x + 3] = bytes(_clamp(v + t) for t in tint)
+        yield row
+
+
+_GENERATORS = {
+    "gradient": _gradient_rows,
+    "blobs": _blobs_rows,
+    "noise": _noise_rows,
+    "mono": _mono_rows,
+}
+
+# Distributions rendered at 1/DETAIL_FACTOR resolution and upscaled (nearest)
+# to keep corpus generation fast; noise is always generated at full size
+_DETAIL_FACTOR = 4
+
+
+def _upscale_rows(rows, width: int, factor: int):
+    """Nearest-neighbor upscale of RGB rows by an integer factor, cropped to width."""
+    for row in rows:
+        wide = bytearray(len(row) * factor)
+        for rep in range(factor):
+            for c in range(3):
+                wide[3 * rep + c::3 * factor] = row[c::3]
+        wide = wide[:3 * width]
+        for _ in range(factor):
+            yield wide
+
+
+def _paeth(a: int, b: int, c: int) -> int:
+    p = a + b - c
+    pa = abs(p - a)
+    pb = abs(p - b)
+    pc = abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    elif pb <= pc:
+        return b
+    return c
+
+
+def _filter_row(row: bytes, prev: bytes, filter_type: int, bpp: int = 3) -> bytes:
+    """Apply a PNG filter to one row."""
+    if filter_type == 0:
+        return bytes(row)
+    left = bytes(bpp) + row[:-bpp]
+    if filter_type == 1:
+        return bytes((x - a) & 0xFF for x, a in zip(row, left))
+    if filter_type == 2:
+        return bytes((x - b) & 0xFF for x, b in zip(row, prev))
+    if filter_type == 3:
+        return bytes((x - ((a + b) >> 1)) & 0xFF for x, a, b in zip(row, left, prev))
+    up_left = bytes(bpp) + prev[:-bpp]
+    return bytes((x - _paeth(a, b, c)) & 0xFF for x, a, b, c in zip(row, left, prev, up_left))
+
+
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+
+def write_png(path: Path, width: int, height: int, rows):
+    """
+    Write 8-bit RGB rows as a PNG.
+
+    Rows cycle through all five filter types so decoding exercises every
+    unfilter kernel.
+    """
+    compressor = zlib.compressobj(6)
+    data = bytearray()
+    prev = bytes(3 * width)
+    for y, row in enumerate(rows):
+        filter_type = y % 5
+        data += compressor.compress(bytes([filter_type]) + _filter_row(row, prev, filter_type))
+        prev = row
+    data += compressor.flush()
+
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(image.PNG_SIGNATURE + _png_chunk(b'IHDR', ihdr) + _png_chunk(b'IDAT', bytes(data))
+                    + _png_chunk(b'IEND', b''))
+    tmp.replace(path)
+
+
+def corpus_image(corpus: Path, distribution: str, width: int, height: int) -> Path:
+    """Return the path of a synthetic wallpaper, generating it if missing."""
+    path = corpus / f"v{CORPUS_VERSION}-{distribution}-{width}x{height}.png"
+    if path.exists():
+        return path
+
+    corpus.mkdir(parents=True, exist_ok=True)
+    seed = f"{distribution}-{width}x{height}"
+    rng = random.Random(seed)
+    generate = _GENERATORS[distribution]
+    if distribution == "noise":
+        rows = generate(width, height, rng)
+    else:
+        small_width = -(-width // _DETAIL_FACTOR)
+        small_height = -(-height // _DETAIL_FACTOR)
+        rows = _upscale_rows(generate(small_width, small_height, rng), width, _DETAIL_FACTOR)
+        rows = (row for _, row in zip(range(height), rows))
+
+    print(f"Generating {path.name}...", file=sys.stderr)
+    write_png(path, width, height, rows)
+    return path
+
+
+# --- Measurement ---
+
+def peak_rss_kib() -> int:
+    """Peak resident set size of this process in KiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, KiB elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def percentile(sorted_samples: list[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    rank = max(1, math.ceil(p / 100.0 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def summarize(samples: list[float]) -> dict:
+    """Percentiles, mean and extremes of timings in milliseconds."""
+    ordered = sorted(samples)
+    summary = {f"p{p}_ms": percentile(ordered, p) for p in PERCENTILES}
+    summary.update({
+        "mean_ms": sum(ordered) / len(ordered),
+        "min_ms": ordered[0],
+        "max_ms": ordered[-1],
+        "samples_ms": samples,
+    })
+    return summary
+
+
+def measure(func, repeat: int, warmup: int, setup=None):
+    """
+    Run func (with the result of setup(), if given) warmup + repeat times.
+
+    Returns (result of the last run, timings of the measured runs in ms).
+    setup() is not timed.
+    """
+    samples = []
+    result = None
+    for i in range(warmup + repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        result = func(arg) if setup else func()
+        elapsed = (time.perf_counter() - start) * 1000.0
+        if i >= warmup:
+            samples.append(elapsed)
+    return result, samples
+
+
+# --- Pipeline stages ---
+
+def decode(path: Path):
+    with open(path, 'rb') as f:
+        width, height, channels, rows = image._png_quantum_rows(f)
+        return width, height, channels, list(rows)
+
+
+def downscale(decoded, resize_filter: str) -> PixelBuffer:
+    width, height, channels, rows = decoded
+    resampler = Resampler(width, height, image.TARGET_SIZE, image.TARGET_SIZE, resize_filter, channels)
+    for row in rows:
+        resampler.push_row(row)
+    return PixelBuffer(resampler.pixels())
+
+
+def with_histogram(rgb: bytes) -> PixelBuffer:
+    """Fresh PixelBuffer with its histogram computed, as Wu leaves it for WSMeans."""
+    pixels = PixelBuffer(rgb)
+    pixels.counts()
+    return pixels
+
+
+def render_templates(theme: dict, image_path: Path, output_dir: Path) -> int:
+    renderer = TemplateRenderer(theme, verbose=False, image_path=str(image_path), scheme_type="tonal-spot")
+    rendered = 0
+    for template in sorted(TEMPLATES_DIR.rglob("*")):
+        if template.is_file():
+            rendered += renderer.render_file(template, output_dir / template.relative_to(TEMPLATES_DIR))
+    return rendered
+
+
+def generate_terminals(scheme: dict) -> list[str]:
+    mode_data = scheme["dark"]
+    generator = TerminalGenerator(TerminalColors.from_dict(mode_data["terminal"], mode_data))
+    return [generator.generate(terminal_id) for terminal_id in TERMINALS]
+
+
+def run_case(path: Path, repeat: int, warmup: int, output_dir: Path, terminal_scheme: dict) -> dict:
+    """Time every stage for one image; returns {stage: summary}."""
+    stages = {}
+
+    def timed(stage: str, func, setup=None):
+        result, samples = measure(func, repeat, warmup, setup)
+        stages[stage] = summarize(samples)
+        stages[stage]["peak_rss_kib"] = peak_rss_kib()
+        return result
+
+    decoded = timed("decode", lambda: decode(path))
+    pixels = timed("downscale", lambda: downscale(decoded, "Triangle"))
+    box_pixels = downscale(decoded, "Box")
+    del decoded
+
+    wu_result = timed("wu", lambda buf: quantize_wu(buf, 128), lambda: PixelBuffer(pixels.rgb))
+    starting_clusters = list(wu_result.keys())
+    population = timed("wsmeans", lambda buf: quantize_wsmeans(buf, 128, starting_clusters),
+                       lambda: with_histogram(pixels.rgb))
+    source = timed("score", lambda: source_color_from_population(population))
+    timed("kmeans", lambda buf: extract_palette(buf, k=5, scoring="count"), lambda: PixelBuffer(box_pixels.rgb))
+
+    palette = [Color(*source_color_to_rgb(source))]
+    theme = timed("scheme", lambda: {mode: generate_theme(palette, mode, "tonal-spot") for mode in ("dark", "light")})
+    timed("template", lambda: render_templates(theme, path, output_dir))
+    timed("terminal", lambda: generate_terminals(terminal_scheme))
+    timed("preview", lambda _: preview_palette(path, use_cache=False), clear_preview_cache)
+    return stages
+
+
+# --- Reporting ---
+
+def parse_resolutions(value: str) -> list[tuple[int, int]]:
+    resolutions = []
+    for item in value.split(","):
+        try:
+            width, height = (int(v) for v in item.lower().split("x"))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid resolution: {item} (expected WIDTHxHEIGHT)")
+        if width <= 0 or height <= 0:
+            raise argparse.ArgumentTypeError(f"Invalid resolution: {item}")
+        resolutions.append((width, height))
+    return resolutions
+
+
+def parse_distributions(value: str) -> list[str]:
+    names = value.split(",")
+    for name in names:
+        if name not in _GENERATORS:
+            raise argparse.ArgumentTypeError(f"Unknown distribution: {name} (choose from {', '.join(DISTRIBUTIONS)})")
+    return names
+
+
+def print_results(results: dict):
+    header = f"{'case':<22} {'stage':<10} " + " ".join(f"{f'p{p} ms':>10}" for p in PERCENTILES) + f" {'peak RSS':>10}"
+    print(header)
+    print("-" * len(header))
+    for case, data in results["cases"].items():
+        for stage in STAGES:
+            summary = data["stages"][stage]
+            times = " ".join(f"{summary[f'p{p}_ms']:>10.2f}" for p in PERCENTILES)
+            print(f"{case:<22} {stage:<10} {times} {summary['peak_rss_kib'] / 1024:>7.1f} MiB")
+    print(f"\npeak RSS {results['peak_rss_kib'] / 1024:.1f} MiB")
+    solver = results["solver_cache"]
+    print(f"HCT solver cache: {solver['hits']} hits, {solver['misses']} misses, {solver['size']} entries")
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> int:
+    """Print p50 changes against a baseline; returns the number of regressions."""
+    regressions = 0
+    header = f"{'case':<22} {'stage':<10} {'base p50':>10} {'p50':>10} {'change':>8}"
+    print(f"\nCompared with baseline ({threshold:g}% threshold)")
+    print(header)
+    print("-" * len(header))
+    for case, data in results["cases"].items():
+        base_case = baseline.get("cases", {}).get(case)
+        if base_case is None:
+            print(f"{case:<22} (not in baseline)")
+            continue
+        for stage in STAGES:
+            base_stage = base_case["stages"].get(stage)
+            if base_stage is None:
+                continue
+            old = base_stage["p50_ms"]
+            new = data["stages"][stage]["p50_ms"]
+            change = (new - old) / old * 100.0 if old > 0 else 0.0
+            flag = ""
+            if change > threshold and new - old >= min_delta_ms:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{case:<22} {stage:<10} {old:>10.2f} {new:>10.2f} {change:>+7.1f}%{flag}")
+
+    print(f"\n{regressions} regression(s)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the theming pipeline stage by stage")
+    parser.add_argument("--resolutions", type=parse_resolutions, default=parse_resolutions(DEFAULT_RESOLUTIONS),
+                        help=f"Comma-separated WIDTHxHEIGHT list (default: {DEFAULT_RESOLUTIONS})")
+    parser.add_argument("--distributions", type=parse_distributions, default=DISTRIBUTIONS,
+                        help=f"Comma-separated color distributions (default: {','.join(DISTRIBUTIONS)})")
+    parser.add_argument("--repeat", type=int, default=5, help="Measured runs per stage (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs per stage (default: 1)")
+    parser.add_argument("--corpus", type=Path, default=cache_dir() / "bench-corpus",
+                        help="Directory for generated wallpapers (default: $XDG_CACHE_HOME/noctalia/bench-corpus)")
+    parser.add_argument("--output", "-o", type=Path, help="Write JSON results to file")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Percent p50 slowdown reported as a regression (default: 10)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5,
+                        help="Ignore slowdowns smaller than this many ms (default: 0.5)")
+    args = parser.parse_args()
+
+    if args.repeat < 1 or args.warmup < 0:
+        parser.error("--repeat must be at least 1 and --warmup at least 0")
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, "r") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading baseline: {e}", file=sys.stderr)
+            return 2
+
+    with open(TERMINAL_SCHEME, "r") as f:
+        terminal_scheme = json.load(f)
+
+    # Smallest images first so the RSS high-water mark grows with the cases
+    cases = sorted(
+        ((distribution, width, height) for width, height in args.resolutions for distribution in args.distributions),
+        key=lambda c: (c[1] * c[2], args.distributions.index(c[0])),
+    )
+    paths = {case: corpus_image(args.corpus, *case) for case in cases}
+
+    results = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy_module() is not None,
+        "repeat": args.repeat,
+        "warmup": args.warmup,
+        "cases": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="noctalia-bench-") as output_dir:
+        for distribution, width, height in cases:
+            name = f"{distribution}-{width}x{height}"
+            print(f"Running {name}...", file=sys.stderr)
+            stages = run_case(paths[(distribution, width, height)], args.repeat, args.warmup,
+                              Path(output_dir), terminal_scheme)
+            results["cases"][name] = {
+                "distribution": distribution,
+                "width": width,
+                "height": height,
+                "stages": stages,
+            }
+
+    results["peak_rss_kib"] = peak_rss_kib()
+    results["solver_cache"] = solver_cache_info()
+    print_results(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"Results written to: {args.output}", file=sys.stderr)
+
+    if baseline is not None and compare(results, baseline, args.threshold, args.min_delta_ms):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Check that daemon preview requests run alongside theme jobs.
+
+Usage:
+    ./daemon-preview-test.py
+
+Drives lib.daemon.TemplateDaemon with a fake handler whose theme jobs take
+about a second and print from a helper thread (like the template render
+pool). Checks that:
+
+- a preview submitted mid-job answers before the job ends, with only its
+  own output, and the job still finishes with "ok" and all of its output
+- a second theme job still cancels the first one
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add the theming lib to path
+SCRIPT_DIR = Path(__file__).parent.resolve()
+THEMING_DIR = SCRIPT_DIR.parent / "python" / "src" / "theming"
+sys.path.insert(0, str(THEMING_DIR))
+
+from lib.daemon import TemplateDaemon
+
+JOB_STEPS = 20
+STEP_SECONDS = 0.05
+
+
+def fake_handler(argv: list[str], job) -> int:
+    if "--preview" in argv:
+        print(f"preview {argv[0]}")
+        return 0
+
+    print(f"theme {argv[0]} start")
+    for _ in range(JOB_STEPS):
+        time.sleep(STEP_SECONDS)
+        job.check_cancelled()
+    helper = threading.Thread(target=print, args=(f"theme {argv[0]} rendered",))
+    helper.start()
+    helper.join()
+    print(f"theme {argv[0]} done", file=sys.stderr)
+    return 0
+
+
+def submit_async(daemon: TemplateDaemon, argv: list[str]) -> tuple[threading.Thread, dict]:
+    response: dict = {}
+    thread = threading.Thread(target=lambda: response.update(daemon.submit(argv)))
+    thread.start()
+    return thread, response
+
+
+def check(name: str, condition: bool, detail: object) -> bool:
+    print(f"{'ok  ' if condition else 'FAIL'} {name}" + ("" if condition else f": {detail!r}"),
+          file=sys.__stdout__)
+    return condition
+
+
+def test_preview_during_job(daemon: TemplateDaemon) -> bool:
+    job_thread, job = submit_async(daemon, ["a.png"])
+    time.sleep(JOB_STEPS * STEP_SECONDS / 4)
+
+    started = time.monotonic()
+    preview = daemon.submit(["b.png", "--preview"])
+    preview_seconds = time.monotonic() - started
+    job_running = job_thread.is_alive()
+    job_thread.join()
+
+    results = [
+        check("preview status", preview["status"] == "ok", preview),
+        check("preview output", preview["stdout"] == "preview b.png\n", preview["stdout"]),
+        check("preview did not wait for the job", job_running and preview_seconds < STEP_SECONDS * 4,
+              preview_seconds),
+        check("job status", job.get("status") == "ok", job),
+        check("job stdout", job.get("stdout") == "theme a.png start\ntheme a.png rendered\n", job.get("stdout")),
+        check("job stderr", job.get("stderr") == "theme a.png done\n", job.get("stderr")),
+    ]
+    return all(results)
+
+
+def test_job_supersedes_job(daemon: TemplateDaemon) -> bool:
+    first_thread, first = submit_async(daemon, ["a.png"])
+    time.sleep(JOB_STEPS * STEP_SECONDS / 4)
+    second = daemon.submit(["b.png"])
+    first_thread.join()
+
+    results = [
+        check("superseded job cancelled", first.get("status") == "cancelled", first),
+        check("newest job status", second["status"] == "ok", second),
+    ]
+    return all(results)
+
+
+def main() -> int:
+    daemon = TemplateDaemon(fake_handler)
+    results = [test_preview_during_job(daemon), test_job_supersedes_job(daemon)]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
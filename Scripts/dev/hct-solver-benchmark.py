@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the HCT solver and ARGB conversions.
+
+Usage:
+    ./hct-solver-benchmark.py
+    ./hct-solver-benchmark.py --seconds 1.0
+
+Measures uncached solver calls/second (HctSolver._solve, bypassing the
+result cache) for in-gamut colors, which the Newton iteration answers,
+and for high-chroma colors, which fall back to bisecting the RGB cube
+boundary. "palette tones" repeats the high-chroma case at the integer
+tones tonal palettes use, where the RGB cube cross-sections are cached
+and clearly out-of-gamut requests skip the exact search. The "from_argb" and "to_argb" lines time the Hct ARGB fast
+paths with their caches cleared, so they measure conversion cost.
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the theming lib to path
+SCRIPT_DIR = Path(__file__).parent.resolve()
+THEMING_DIR = SCRIPT_DIR.parent / "python" / "src" / "theming"
+sys.path.insert(0, str(THEMING_DIR))
+
+from lib import hct
+
+SAMPLES = 2000
+
+
+def calls_per_second(func, inputs: list, seconds: float) -> float:
+    """Call func over inputs repeatedly for about `seconds` and return calls per second."""
+    for args in inputs[:100]:
+        func(*args)  # warm up
+    count = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        for args in inputs:
+            func(*args)
+        count += len(inputs)
+        elapsed = time.perf_counter() - start
+    return count / elapsed
+
+
+def _from_argb(argb: int):
+    hct._hct_of_argb.cache_clear()
+    return hct.Hct.from_argb(argb)
+
+
+def _to_argb(hue: float, chroma: float, tone: float) -> int:
+    hct.clear_solver_cache()
+    return hct.Hct(hue, chroma, tone).to_argb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HCT solver")
+    parser.add_argument("--seconds", type=float, default=0.5, help="Time per measurement (default: 0.5)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    in_gamut = []
+    high_chroma = []
+    while len(in_gamut) < SAMPLES:
+        # Chroma of an actual sRGB color is always reachable
+        h = hct.Hct.from_argb(rng.randrange(1 << 24))
+        if h.chroma >= 0.0001 and 0.0001 <= h.tone <= 99.9999:
+            in_gamut.append((h.hue, h.chroma, h.tone))
+    while len(high_chroma) < SAMPLES:
+        case = (rng.uniform(0.0, 360.0), rng.uniform(120.0, 200.0), rng.uniform(5.0, 95.0))
+        if hct.HctSolver._find_result_by_j(math.radians(case[0]), case[1], hct.lstar_to_y(case[2])) is None:
+            high_chroma.append(case)
+    palette_tones = [(hue, chroma, float(round(tone))) for hue, chroma, tone in high_chroma]
+    argbs = [(0xFF000000 | rng.randrange(1 << 24),) for _ in range(SAMPLES)]
+
+    cases = [
+        ("solve in-gamut", hct.HctSolver._solve, in_gamut),
+        ("solve bisection", hct.HctSolver._solve, high_chroma),
+        ("palette tones", hct.HctSolver._solve, palette_tones),
+        ("from_argb", _from_argb, argbs),
+        ("to_argb", _to_argb, high_chroma),
+    ]
+
+    header = f"{'case':<18} {'calls/s':>12} {'us/call':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, func, inputs in cases:
+        rate = calls_per_second(func, inputs, args.seconds)
+        print(f"{name:<18} {rate:>12,.0f} {1e6 / rate:>9.2f}")
+
+    hct.clear_solver_cache()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Check scaled JPEG decodes against libjpeg-turbo.
+
+Usage:
+    ./jpeg-scaled-decode-test.py
+    ./jpeg-scaled-decode-test.py wall.jpg photo.jpg --tolerance 0.5
+
+Decodes each file at 1/2, 1/4 and 1/8 with lib.jpeg (ISLOW IDCT) and with
+Pillow's draft mode, which uses libjpeg-turbo's reduced IDCTs, and fails when
+the mean absolute difference per channel exceeds the tolerance. Without file
+arguments it tests synthetic 4:2:0, 4:2:2 and 4:4:4 images, both baseline
+and progressive. Requires Pillow; skipped when it is not installed.
+"""
+
+import argparse
+import io
+import math
+import sys
+from pathlib import Path
+
+# Add the theming lib to path
+SCRIPT_DIR = Path(__file__).parent.resolve()
+THEMING_DIR = SCRIPT_DIR.parent / "python" / "src" / "theming"
+sys.path.insert(0, str(THEMING_DIR))
+
+from lib.jpeg import JpegDecoder
+
+SCALES = (2, 4, 8)
+# Pillow "subsampling" values
+SAMPLINGS = {"4:4:4": 0, "4:2:2": 1, "4:2:0": 2}
+
+
+def synthetic_jpegs(Image) -> dict[str, bytes]:
+    """Encode a gradient with sharp color edges in every sampling mode."""
+    width, height = 203, 131
+    pixels = []
+    for y in range(height):
+        for x in range(width):
+            r = int(127.5 + 127.5 * math.sin(x / 9.0))
+            g = (x * 255) // width
+            b = 255 if (x // 16 + y // 16) % 2 else (y * 255) // height
+            pixels.append((r, g, b))
+    im = Image.new("RGB", (width, height))
+    im.putdata(pixels)
+
+    files = {}
+    for name, subsampling in SAMPLINGS.items():
+        for progressive in (False, True):
+            buf = io.BytesIO()
+            im.save(buf, "JPEG", quality=90, subsampling=subsampling, progressive=progressive)
+            files[f"{name}{' progressive' if progressive else ''}"] = buf.getvalue()
+    return files
+
+
+def reference(Image, data: bytes, scale: int) -> tuple[tuple[int, int], bytes]:
+    im = Image.open(io.BytesIO(data))
+    im.draft(im.mode, (max(1, im.size[0] // scale), max(1, im.size[1] // scale)))
+    im = im.convert("L" if im.mode == "L" else "RGB")
+    return im.size, im.tobytes()
+
+
+def check(Image, name: str, data: bytes, tolerance: float) -> bool:
+    ok = True
+    for scale in SCALES:
+        decoder = JpegDecoder(data, dct_method="islow")
+        ours = bytes(v for row in decoder.rows(scale) for v in row)
+        size, expected = reference(Image, data, scale)
+        if size != (decoder.output_width, decoder.output_height):
+            print(f"FAIL {name} 1/{scale}: size {decoder.output_width}x{decoder.output_height}, "
+                  f"expected {size[0]}x{size[1]}")
+            ok = False
+            continue
+        diffs = [abs(a - b) for a, b in zip(ours, expected)]
+        mae = sum(diffs) / len(diffs)
+        passed = mae <= tolerance
+        ok = ok and passed
+        print(f"{'ok  ' if passed else 'FAIL'} {name} 1/{scale}: MAE {mae:.3f}, max {max(diffs)}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check scaled JPEG decodes against libjpeg-turbo")
+    parser.add_argument("images", nargs="*", type=Path, help="JPEG files (default: synthetic images)")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="Maximum mean absolute difference")
+    args = parser.parse_args()
+
+    try:
+        from PIL import Image
+    except ImportError:
+        print("Skipped: Pillow is not installed")
+        return 0
+
+    if args.images:
+        files = {str(path): path.read_bytes() for path in args.images}
+    else:
+        files = synthetic_jpegs(Image)
+
+    results = [check(Image, name, data, args.tolerance) for name, data in files.items()]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,13 +10,16 @@ This package provides:
 """
 
 from .color import Color, rgb_to_hsl, hsl_to_rgb, adjust_surface
-from .hct import Hct, Cam16, TonalPalette, TemperatureCache, fix_if_disliked
-from .material import MaterialScheme, SchemeContent, harmonize_color
-from .contrast import ensure_contrast, contrast_ratio, is_dark
+from .distance import ColorIndex, delta_e76, delta_e2000
+from .hct import Hct, Cam16, TonalPalette, TemperatureCache, fix_if_disliked, hct_batch
+from .material import MaterialScheme, SchemeContent, SchemeBundle, harmonize_color
+from .contrast import ensure_contrast, ensure_contrast_batch, contrast_ratio, is_dark
 from .image import read_image, ImageReadError
+from .pixels import PixelBuffer
 from .palette import extract_palette
+from .preview import preview_palette
 from .quantizer import extract_source_color, source_color_to_rgb
-from .theme import generate_theme
+from .theme import generate_theme, generate_themes
 from .renderer import TemplateRenderer
 from .scheme import expand_predefined_scheme
 from .terminal import TerminalColors, TerminalGenerator
@@ -27,30 +30,41 @@ __all__ = [
     "rgb_to_hsl",
     "hsl_to_rgb",
     "adjust_surface",
+    # Color difference
+    "ColorIndex",
+    "delta_e76",
+    "delta_e2000",
     # HCT
     "Hct",
     "Cam16",
     "TonalPalette",
     "TemperatureCache",
     "fix_if_disliked",
+    "hct_batch",
     # Material
     "MaterialScheme",
     "SchemeContent",
+    "SchemeBundle",
     "harmonize_color",
     # Contrast
     "ensure_contrast",
+    "ensure_contrast_batch",
     "contrast_ratio",
     "is_dark",
     # Image
     "read_image",
     "ImageReadError",
+    "PixelBuffer",
     # Palette
     "extract_palette",
+    # Preview
+    "preview_palette",
     # Quantizer (Wu + Score algorithm matching matugen)
     "extract_source_color",
     "source_color_to_rgb",
     # Theme
     "generate_theme",
+    "generate_themes",
     # Renderer
     "TemplateRenderer",
     # Scheme
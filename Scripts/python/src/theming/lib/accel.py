@@ -0,0 +1,32 @@
+"""
+Optional NumPy acceleration.
+
+NumPy is not a dependency of the theming scripts. Hot loops (PNG
+unfiltering, the Wu histogram, ...) ask numpy_module() for it and keep their
+pure-Python code as the fallback when it returns None.
+
+The import is deferred until a caller actually needs it: importing NumPy
+takes ~90 ms, which is longer than some of the work it speeds up, and
+cached runs never need it at all.
+
+Set NOCTALIA_NO_NUMPY=1 to force the pure-Python paths.
+"""
+
+import os
+
+# NumPy module once loaded, False if unavailable or disabled
+_numpy = None
+
+
+def numpy_module():
+    """Return the numpy module, importing it on first use; None if unavailable."""
+    global _numpy
+    if _numpy is None:
+        _numpy = False
+        if not os.environ.get("NOCTALIA_NO_NUMPY"):
+            try:
+                import numpy
+                _numpy = numpy
+            except ImportError:
+                pass
+    return _numpy or None
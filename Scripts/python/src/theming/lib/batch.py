@@ -0,0 +1,186 @@
+"""
+Batch mode for template-processor.
+
+`template-processor.py --batch manifest.json` themes many images in one
+invocation (wallpaper selector previews, per-monitor colors); `--batch -`
+reads a NUL-separated list of image paths from stdin instead, e.g.
+
+    find ~/Wallpapers -type f -print0 | template-processor.py --batch -
+
+Items run on a ProcessPoolExecutor. Each worker imports `lib` once and
+keeps its palette memo and HCT solver cache warm across the items it
+handles, and all workers share the on-disk extraction cache. Colors the
+workers solve are sent back to the parent, which saves the solver cache.
+
+Manifest (a JSON list; items are image paths or objects with the same keys
+as daemon requests, see lib.daemon.request_to_argv, except config, render,
+output, terminal-output and scheme):
+    ["/walls/a.png", {"image": "/walls/b.jpg", "scheme-type": "content"}]
+
+Flags given next to --batch (--scheme-type, --mode, --dark, --light,
+--no-cache, --preview) are defaults for every item.
+
+Output: one JSON object per line (NDJSON) on stdout, in completion order:
+    {"index": 0, "image": "/walls/a.png", "status": "ok" | "error",
+     "exit_code": 0, "theme": {"dark": {...}, "light": {...}}, "stderr": ""}
+
+Items run with --preview report "preview": {"argb": [...], "colors": [...]}
+instead of "theme".
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Optional
+
+from .daemon import request_to_argv
+
+# Request keys that select the theme mode; an item setting any of them
+# replaces the batch-wide mode flags
+_MODE_FIELDS = {"mode", "dark", "light", "both"}
+# Request keys --batch rejects on the command line; per item they would make
+# workers render templates (and run hooks) concurrently into shared outputs
+_REJECTED_FIELDS = {"config", "render", "output", "terminal-output", "scheme"}
+
+
+def read_manifest(source: str) -> list[dict[str, Any]]:
+    """
+    Read batch items from a JSON manifest, or NUL-separated paths on stdin for "-".
+
+    Raises ValueError for a malformed manifest and OSError if it cannot be read.
+    """
+    if source == "-":
+        data = sys.stdin.buffer.read()
+        return [{"image": os.fsdecode(path)} for path in data.split(b"\0") if path.strip()]
+
+    with open(source, "r") as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, list):
+        raise ValueError("manifest must be a JSON list")
+
+    items = []
+    for position, item in enumerate(manifest):
+        if isinstance(item, str):
+            items.append({"image": item})
+        elif isinstance(item, dict):
+            items.append(item)
+        else:
+            raise ValueError(f"item {position} must be an image path or an object")
+    return items
+
+
+def item_argv(item: dict[str, Any], defaults: dict[str, Any]) -> list[str]:
+    """
+    CLI arguments for one item: the batch defaults overridden by the item's own keys.
+
+    Raises ValueError for unknown keys and for keys --batch does not allow.
+    """
+    keys = {key.replace("_", "-") for key in item}
+    rejected = sorted(keys & _REJECTED_FIELDS)
+    if rejected:
+        raise ValueError(f"{', '.join(rejected)} not allowed in batch items")
+    request = dict(defaults)
+    if keys & _MODE_FIELDS:
+        for key in _MODE_FIELDS:
+            request.pop(key, None)
+    request.update((key.replace("_", "-"), value) for key, value in item.items())
+    return request_to_argv(request)
+
+
+def _run_item(
+    handler: Callable[[list[str]], int],
+    argv: list[str],
+    collect: Optional[Callable[[], Any]] = None,
+) -> tuple[dict[str, Any], Any]:
+    """
+    Run one item in a worker process, capturing its output like a daemon job.
+
+    Returns the result and what `collect()` returned afterwards (None
+    without `collect`).
+    """
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            exit_code = handler(argv)
+    except SystemExit as e:
+        # argparse reports invalid arguments via SystemExit
+        exit_code = e.code if isinstance(e.code, int) else 1
+    except Exception as e:
+        stderr.write(f"Unexpected error: {e}\n")
+        exit_code = 1
+
+    result: dict[str, Any] = {
+        "status": "ok" if exit_code == 0 else "error",
+        "exit_code": exit_code,
+    }
+    output = stdout.getvalue()
+    try:
+        result["preview" if "--preview" in argv else "theme"] = json.loads(output)
+    except ValueError:
+        # Not a theme (e.g. the item rendered templates instead)
+        if output:
+            result["stdout"] = output
+    result["stderr"] = stderr.getvalue()
+    return result, collect() if collect is not None else None
+
+
+def run_batch(
+    items: list[dict[str, Any]],
+    handler: Callable[[list[str]], int],
+    defaults: Optional[dict[str, Any]] = None,
+    jobs: Optional[int] = None,
+    initializer: Optional[Callable[[], None]] = None,
+    collect: Optional[Callable[[], Any]] = None,
+    merge: Optional[Callable[[Any], None]] = None,
+) -> int:
+    """
+    Run every item through `handler(argv)` on a process pool and print NDJSON results.
+
+    After each item the worker calls `collect()` and the parent passes its
+    return value to `merge()`, so state built up in workers (e.g. solved
+    cache entries) is not lost when they exit.
+
+    `handler`, `initializer` and `collect` must be picklable (module-level
+    functions). Returns 0 if every item succeeded, 1 otherwise.
+    """
+    defaults = defaults or {}
+    exit_code = 0
+
+    def emit(result: dict[str, Any]):
+        nonlocal exit_code
+        if result["status"] != "ok":
+            exit_code = 1
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+    pending = []
+    for index, item in enumerate(items):
+        try:
+            pending.append((index, item, item_argv(item, defaults)))
+        except ValueError as e:
+            emit({"index": index, "image": item.get("image"), "status": "error", "exit_code": 1,
+                  "stderr": f"Invalid item: {e}\n"})
+
+    if not pending:
+        return exit_code
+
+    workers = max(1, min(jobs or os.cpu_count() or 1, len(pending)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer) as pool:
+        futures = {pool.submit(_run_item, handler, argv, collect): (index, item)
+                   for index, item, argv in pending}
+        for future in as_completed(futures):
+            index, item = futures[future]
+            try:
+                result, collected = future.result()
+                if merge is not None and collected is not None:
+                    merge(collected)
+            except Exception as e:
+                # The worker itself died (e.g. killed by the OOM killer)
+                result = {"status": "error", "exit_code": 1, "stderr": f"Worker failed: {e}\n"}
+            emit({"index": index, "image": item.get("image"), **result})
+
+    return exit_code
@@ -0,0 +1,302 @@
+"""
+On-disk cache for wallpaper color extraction.
+
+Decoding and quantizing a wallpaper is by far the most expensive part of
+theming, and the same wallpapers come back constantly (multiple monitors,
+restarts, slideshow loops). Extraction results are stored as small JSON files
+under $XDG_CACHE_HOME/noctalia/extraction/, one per (image, resize filter).
+
+An entry holds:
+- "population": WSMeans ARGB -> pixel count histogram
+- "palettes": scored palette per scheme type (hex strings)
+
+Entries are keyed by the image's (path, mtime, size) plus the resize filter
+and ALGORITHM_VERSION, so editing or replacing a wallpaper invalidates it
+without hashing megabytes of image data. Least recently used entries are
+evicted once the directory grows beyond the size cap.
+
+The HctSolver result cache (lib.hct) has a persistent tier as well:
+load_solver_cache() warms it from $XDG_CACHE_HOME/noctalia/hct-solver.json at
+startup and save_solver_cache() writes it back when new colors were solved.
+
+Compiled templates (lib.renderer.TemplatePlan) are kept the same way in
+$XDG_CACHE_HOME/noctalia/template-plans.json by load_template_plans() and
+save_template_plans(), so a fresh process does not re-parse unchanged
+templates either. Like every file here it is plain JSON: anything that can
+write the cache directory can at worst change what gets rendered, never run
+code.
+
+The render manifest (lib.renderer.RenderManifest) in
+$XDG_CACHE_HOME/noctalia/render-manifest.json records what every output was
+last rendered from, so unchanged templates are neither re-rendered nor
+rewritten and their hooks do not run.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+# Bump whenever decoding, quantization or scoring changes its output
+ALGORITHM_VERSION = 2
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+# Bump whenever HctSolver changes its output
+SOLVER_CACHE_VERSION = 1
+SOLVER_CACHE_FILE = "hct-solver.json"
+
+# Bump whenever the template parser or the TemplatePlan node types change
+TEMPLATE_PLAN_VERSION = 2
+TEMPLATE_PLAN_FILE = "template-plans.json"
+
+# Bump whenever the render manifest entries or the dependency names change
+RENDER_MANIFEST_VERSION = 1
+RENDER_MANIFEST_FILE = "render-manifest.json"
+
+
+def cache_dir() -> Path:
+    """Return the noctalia cache directory ($XDG_CACHE_HOME/noctalia)."""
+    base = os.environ.get("XDG_CACHE_HOME")
+    if base:
+        return Path(base) / "noctalia"
+    return Path.home() / ".cache" / "noctalia"
+
+
+def atomic_write_text(path: Path, text: str, permissions: Optional[int] = None):
+    """
+    Write text via a temporary file and rename so readers never see partial data.
+
+    The file is created with mode 0600 unless `permissions` is given.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        if permissions is not None:
+            os.fchmod(fd, permissions)
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class ExtractionCache:
+    """LRU-evicted on-disk store of extraction results."""
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory or cache_dir() / "extraction"
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def image_key(image_path: Path, resize_filter: str) -> str:
+        """Build the cache key for an image file and resize filter."""
+        stat = image_path.stat()
+        ident = f"{ALGORITHM_VERSION}\0{image_path.resolve()}\0{stat.st_mtime_ns}\0{stat.st_size}\0{resize_filter}"
+        return hashlib.sha1(ident.encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        """Return the entry for key, or None; refreshes its LRU position."""
+        path = self._entry_path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Corrupt or unreadable entry - drop it and recompute
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+        if entry.get("version") != ALGORITHM_VERSION:
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, entry: dict[str, Any]):
+        """Store entry under key and evict old entries beyond the size cap."""
+        entry["version"] = ALGORITHM_VERSION
+        try:
+            atomic_write_text(self._entry_path(key), json.dumps(entry, separators=(",", ":")))
+            self._evict()
+        except OSError as e:
+            print(f"Warning: Could not write extraction cache: {e}", file=sys.stderr)
+
+    def _evict(self):
+        """Remove least recently used entries until under max_bytes."""
+        files = []
+        total = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except FileNotFoundError:
+                pass
+
+
+def load_solver_cache(path: Optional[Path] = None) -> int:
+    """
+    Warm the in-process HctSolver cache from disk.
+
+    Missing, stale or corrupt files are ignored. Returns the number of
+    entries loaded.
+    """
+    from .hct import warm_solver_cache
+
+    path = path or cache_dir() / SOLVER_CACHE_FILE
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != SOLVER_CACHE_VERSION:
+            return 0
+        return warm_solver_cache((h, c, t, rgb) for h, c, t, rgb in data["entries"])
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+        return 0
+
+
+def save_solver_cache(path: Optional[Path] = None, force: bool = False) -> bool:
+    """
+    Write the in-process HctSolver cache to disk if anything new was solved.
+
+    `force` writes it even when this process solved nothing itself, e.g.
+    after merging results from batch workers. Returns True if the file was
+    written.
+    """
+    from .hct import solver_cache_info, solver_cache_items
+
+    if not force and solver_cache_info()["misses"] == 0:
+        return False
+
+    path = path or cache_dir() / SOLVER_CACHE_FILE
+    data = {"version": SOLVER_CACHE_VERSION, "entries": solver_cache_items()}
+    try:
+        atomic_write_text(path, json.dumps(data, separators=(",", ":")))
+    except OSError as e:
+        print(f"Warning: Could not write solver cache: {e}", file=sys.stderr)
+        return False
+    return True
+
+
+def load_template_plans(path: Optional[Path] = None) -> int:
+    """
+    Warm the in-process compiled template cache from disk.
+
+    Missing, stale or corrupt files are ignored. Returns the number of
+    plans loaded.
+    """
+    from .renderer import TemplatePlan, warm_template_plans
+
+    path = path or cache_dir() / TEMPLATE_PLAN_FILE
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != TEMPLATE_PLAN_VERSION:
+            return 0
+        return warm_template_plans(
+            (tuple(key), TemplatePlan.from_data(plan)) for key, plan in data["entries"]
+        )
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+        return 0
+
+
+def save_template_plans(path: Optional[Path] = None) -> bool:
+    """
+    Write the in-process compiled template cache to disk if anything new was compiled.
+
+    Returns True if the file was written.
+    """
+    from .renderer import template_plan_cache_info, template_plan_items
+
+    if template_plan_cache_info()["misses"] == 0:
+        return False
+
+    path = path or cache_dir() / TEMPLATE_PLAN_FILE
+    data = {
+        "version": TEMPLATE_PLAN_VERSION,
+        "entries": [[list(key), plan.to_data()] for key, plan in template_plan_items()],
+    }
+    try:
+        atomic_write_text(path, json.dumps(data, separators=(",", ":")))
+    except OSError as e:
+        print(f"Warning: Could not write template cache: {e}", file=sys.stderr)
+        return False
+    return True
+
+
+def load_render_manifest(path: Optional[Path] = None):
+    """
+    Load the render manifest from disk.
+
+    Missing, stale or corrupt files give an empty manifest.
+    """
+    from .renderer import RenderManifest
+
+    path = path or cache_dir() / RENDER_MANIFEST_FILE
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != RENDER_MANIFEST_VERSION:
+            return RenderManifest()
+        return RenderManifest(
+            (output, entry) for output, entry in data["entries"]
+            if isinstance(output, str) and isinstance(entry, dict)
+        )
+    except FileNotFoundError:
+        return RenderManifest()
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+        return RenderManifest()
+
+
+def save_render_manifest(manifest, path: Optional[Path] = None) -> bool:
+    """
+    Write the render manifest to disk if any entry changed.
+
+    Returns True if the file was written.
+    """
+    if not manifest.dirty:
+        return False
+
+    path = path or cache_dir() / RENDER_MANIFEST_FILE
+    data = {"version": RENDER_MANIFEST_VERSION, "entries": manifest.items()}
+    try:
+        atomic_write_text(path, json.dumps(data, separators=(",", ":")))
+    except OSError as e:
+        print(f"Warning: Could not write render manifest: {e}", file=sys.stderr)
+        return False
+    manifest.dirty = False
+    return True
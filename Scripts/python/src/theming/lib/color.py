@@ -6,9 +6,10 @@ RGB, HSL, and Lab color spaces.
 """
 
 import math
-from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
+from .accel import numpy_module
+
 # Type aliases
 RGB = tuple[int, int, int]
 HSL = tuple[float, float, float]
@@ -18,12 +19,76 @@ if TYPE_CHECKING:
     from .hct import Hct
 
 
-@dataclass
+# Interned Color instances by (r, g, b), or (r, g, b, alpha) for translucent
+# colors; cleared when it grows past the limit
+_INTERNED: dict[RGB, 'Color'] = {}
+_INTERN_LIMIT = 1 << 16
+
+
 class Color:
-    """Represents a color with RGB values (0-255)."""
+    """
+    Represents a color with RGB values (0-255) and an alpha (0-1).
+
+    Colors are immutable, hashable values. Color(r, g, b) returns an
+    interned instance, and derived representations (hex, HSL, HCT, Lab,
+    relative luminance) are computed on first use and kept on it, so each
+    is computed at most once per color per process. Use with_alpha() to
+    get a translucent variant.
+    """
+
+    __slots__ = ('r', 'g', 'b', 'alpha', '_hex', '_hsl', '_hct', '_lab', '_luminance')
+
     r: int
     g: int
     b: int
+    alpha: float
+
+    def __new__(cls, r: int, g: int, b: int, alpha: float = 1.0) -> 'Color':
+        key = (r, g, b) if alpha == 1.0 else (r, g, b, alpha)
+        color = _INTERNED.get(key)
+        if color is not None and type(color) is cls:
+            return color
+
+        color = object.__new__(cls)
+        set_attr = object.__setattr__
+        set_attr(color, 'r', r)
+        set_attr(color, 'g', g)
+        set_attr(color, 'b', b)
+        set_attr(color, 'alpha', 1.0 if alpha == 1.0 else alpha)
+        for name in ('_hex', '_hsl', '_hct', '_lab', '_luminance'):
+            set_attr(color, name, None)
+
+        if len(_INTERNED) >= _INTERN_LIMIT:
+            _INTERNED.clear()
+        _INTERNED[key] = color
+        return color
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Color is immutable (cannot set '{name}')")
+
+    def __reduce__(self):
+        return (Color, (self.r, self.g, self.b, self.alpha))
+
+    def __repr__(self) -> str:
+        if self.alpha == 1.0:
+            return f"Color(r={self.r!r}, g={self.g!r}, b={self.b!r})"
+        return f"Color(r={self.r!r}, g={self.g!r}, b={self.b!r}, alpha={self.alpha!r})"
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.r, self.g, self.b, self.alpha) == (other.r, other.g, other.b, other.alpha)
+
+    def __hash__(self) -> int:
+        if self.alpha == 1.0:
+            return hash((self.r, self.g, self.b))
+        return hash((self.r, self.g, self.b, self.alpha))
+
+    def with_alpha(self, alpha: float) -> 'Color':
+        """Same color with a different alpha."""
+        return Color(self.r, self.g, self.b, alpha)
 
     @classmethod
     def from_rgb(cls, rgb: RGB) -> 'Color':
@@ -44,16 +109,35 @@ class Color:
 
     def to_hex(self) -> str:
         """Convert to hex string (#RRGGBB)."""
-        return f"#{self.r:02x}{self.g:02x}{self.b:02x}"
+        if self._hex is None:
+            object.__setattr__(self, '_hex', f"#{self.r:02x}{self.g:02x}{self.b:02x}")
+        return self._hex
 
     def to_hsl(self) -> HSL:
         """Convert RGB to HSL."""
-        return rgb_to_hsl(self.r, self.g, self.b)
+        if self._hsl is None:
+            object.__setattr__(self, '_hsl', rgb_to_hsl(self.r, self.g, self.b))
+        return self._hsl
 
     def to_hct(self) -> 'Hct':
         """Convert to HCT color space."""
-        from .hct import Hct
-        return Hct.from_rgb(self.r, self.g, self.b)
+        if self._hct is None:
+            from .hct import Hct
+            object.__setattr__(self, '_hct', Hct.from_rgb(self.r, self.g, self.b))
+        return self._hct
+
+    def to_lab(self) -> LAB:
+        """Convert to CIE L*a*b*."""
+        if self._lab is None:
+            object.__setattr__(self, '_lab', rgb_to_lab(self.r, self.g, self.b))
+        return self._lab
+
+    def luminance(self) -> float:
+        """WCAG relative luminance (0-1)."""
+        if self._luminance is None:
+            from .contrast import relative_luminance
+            object.__setattr__(self, '_luminance', relative_luminance(self.r, self.g, self.b))
+        return self._luminance
 
     @classmethod
     def from_hsl(cls, h: float, s: float, l: float) -> 'Color':
@@ -126,26 +210,13 @@ def hsl_to_rgb(h: float, s: float, l: float) -> RGB:
         v = int(round(l * 255))
         return (v, v, v)
 
-    def hue_to_rgb(p: float, q: float, t: float) -> float:
-        if t < 0:
-            t += 1
-        if t > 1:
-            t -= 1
-        if t < 1/6:
-            return p + (q - p) * 6 * t
-        if t < 1/2:
-            return q
-        if t < 2/3:
-            return p + (q - p) * (2/3 - t) * 6
-        return p
-
     q = l * (1 + s) if l < 0.5 else l + s - l * s
     p = 2 * l - q
     h_norm = h / 360.0
 
-    r = hue_to_rgb(p, q, h_norm + 1/3)
-    g = hue_to_rgb(p, q, h_norm)
-    b = hue_to_rgb(p, q, h_norm - 1/3)
+    r = _hue_to_rgb(p, q, h_norm + 1/3)
+    g = _hue_to_rgb(p, q, h_norm)
+    b = _hue_to_rgb(p, q, h_norm - 1/3)
 
     return (
         int(round(r * 255)),
@@ -154,6 +225,21 @@ def hsl_to_rgb(h: float, s: float, l: float) -> RGB:
     )
 
 
+def _hue_to_rgb(p: float, q: float, t: float) -> float:
+    """HSL helper: channel value (0-1) at hue position t."""
+    if t < 0:
+        t += 1
+    if t > 1:
+        t -= 1
+    if t < 1/6:
+        return p + (q - p) * 6 * t
+    if t < 1/2:
+        return q
+    if t < 2/3:
+        return p + (q - p) * (2/3 - t) * 6
+    return p
+
+
 def adjust_lightness(color: Color, target_l: float) -> Color:
     """Adjust a color's lightness to a target value (0-1)."""
     h, s, _ = color.to_hsl()
@@ -261,6 +347,48 @@ def rgb_to_lab(r: int, g: int, b: int) -> LAB:
     return (L, a, b)
 
 
+def rgb_to_lab_array(red, green, blue):
+    """
+    Vectorized rgb_to_lab() over NumPy integer arrays (requires NumPy).
+
+    Returns an (n, 3) float64 array of (L*, a*, b*) rows, bit-identical to
+    calling rgb_to_lab() per color: linearization uses a 256-entry table of
+    _linearize() values, the matrix products run as the same float64
+    operations in the same order, and the cube roots go through math.pow
+    (NumPy's power can differ from libm in the last bit).
+    """
+    np = numpy_module()
+    linear = _linear_table(np)
+    linear_r = linear[red]
+    linear_g = linear[green]
+    linear_b = linear[blue]
+
+    x = (0.4124564 * linear_r + 0.3575761 * linear_g + 0.1804375 * linear_b) * 100.0
+    y = (0.2126729 * linear_r + 0.7151522 * linear_g + 0.0721750 * linear_b) * 100.0
+    z = (0.0193339 * linear_r + 0.1191920 * linear_g + 0.9503041 * linear_b) * 100.0
+
+    fx = np.array([_lab_f(t) for t in (x / _WHITE_X).tolist()])
+    fy = np.array([_lab_f(t) for t in (y / _WHITE_Y).tolist()])
+    fz = np.array([_lab_f(t) for t in (z / _WHITE_Z).tolist()])
+
+    lab = np.empty((len(fx), 3))
+    lab[:, 0] = 116.0 * fy - 16.0
+    lab[:, 1] = 500.0 * (fx - fy)
+    lab[:, 2] = 200.0 * (fy - fz)
+    return lab
+
+
+_LINEAR_TABLE = None
+
+
+def _linear_table(np):
+    """_linearize() for every 8-bit channel value, as a NumPy array."""
+    global _LINEAR_TABLE
+    if _LINEAR_TABLE is None:
+        _LINEAR_TABLE = np.array([_linearize(v) for v in range(256)])
+    return _LINEAR_TABLE
+
+
 def lab_to_rgb(L: float, a: float, b: float) -> RGB:
     """
     Convert CIE L*a*b* to sRGB (0-255).
@@ -314,16 +442,21 @@ def lab_distance(lab1: LAB, lab2: LAB) -> float:
 
 def find_closest_color(
     compare_to: str,
-    colors: list[dict[str, str]]
+    colors: list[dict[str, str]],
+    metric: str = "de76"
 ) -> str:
     """
     Find the closest named color from a list (matugen-compatible).
 
-    Uses Lab color space Euclidean distance for perceptual color matching.
+    Uses Lab color space Euclidean distance (CIE76) for perceptual color
+    matching by default. The palette is indexed once and cached (see
+    lib.distance.ColorIndex), so repeated lookups against the same list
+    do not convert it again.
 
     Args:
         compare_to: Hex color to compare (e.g., "#ff5500")
         colors: List of {"name": "...", "color": "#..."} dicts
+        metric: "de76", "de2000" or "cam16-ucs"
 
     Returns:
         Name of the closest color, or empty string if no colors provided
@@ -331,23 +464,6 @@ def find_closest_color(
     if not colors:
         return ""
 
-    # Parse target color
-    target = Color.from_hex(compare_to)
-    target_lab = rgb_to_lab(target.r, target.g, target.b)
-
-    closest_name = ""
-    closest_dist = float('inf')
-
-    for entry in colors:
-        try:
-            entry_color = Color.from_hex(entry["color"])
-            entry_lab = rgb_to_lab(entry_color.r, entry_color.g, entry_color.b)
-            dist = lab_distance(target_lab, entry_lab)
-            if dist < closest_dist:
-                closest_dist = dist
-                closest_name = entry["name"]
-        except (KeyError, ValueError):
-            # Skip invalid entries
-            continue
-
-    return closest_name
+    # Import here to avoid circular dependency
+    from .distance import color_index
+    return color_index(colors, metric).nearest(compare_to)
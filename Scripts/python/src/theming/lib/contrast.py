@@ -5,7 +5,22 @@ This module provides functions for calculating relative luminance,
 contrast ratios, and ensuring accessible color combinations.
 """
 
-from .color import Color
+from functools import lru_cache
+from typing import Iterable
+
+from .color import RGB, Color, hsl_to_rgb, rgb_to_hsl
+
+
+def _linearize(c: int) -> float:
+    """sRGB channel (0-255) to linear light, per WCAG 2.1."""
+    c_norm = c / 255.0
+    if c_norm <= 0.03928:
+        return c_norm / 12.92
+    return ((c_norm + 0.055) / 1.055) ** 2.4
+
+
+# _linearize() of every 8-bit channel value
+_LINEAR = tuple(_linearize(c) for c in range(256))
 
 
 def relative_luminance(r: int, g: int, b: int) -> float:
@@ -21,15 +36,9 @@ def relative_luminance(r: int, g: int, b: int) -> float:
     Returns:
         Relative luminance (0-1)
     """
-    def linearize(c: int) -> float:
-        c_norm = c / 255.0
-        if c_norm <= 0.03928:
-            return c_norm / 12.92
-        return ((c_norm + 0.055) / 1.055) ** 2.4
-
-    r_lin = linearize(r)
-    g_lin = linearize(g)
-    b_lin = linearize(b)
+    r_lin = _linearize(r)
+    g_lin = _linearize(g)
+    b_lin = _linearize(b)
 
     return 0.2126 * r_lin + 0.7152 * g_lin + 0.0722 * b_lin
 
@@ -40,8 +49,8 @@ def contrast_ratio(color1: Color, color2: Color) -> float:
 
     Returns a value between 1:1 (identical) and 21:1 (black/white).
     """
-    l1 = relative_luminance(color1.r, color1.g, color1.b)
-    l2 = relative_luminance(color2.r, color2.g, color2.b)
+    l1 = color1.luminance()
+    l2 = color2.luminance()
 
     lighter = max(l1, l2)
     darker = min(l1, l2)
@@ -51,38 +60,47 @@ def contrast_ratio(color1: Color, color2: Color) -> float:
 
 def is_dark(color: Color) -> bool:
     """Determine if a color is perceptually dark."""
-    return relative_luminance(color.r, color.g, color.b) < 0.179
+    return color.luminance() < 0.179
 
 
-def ensure_contrast(
-    foreground: Color,
-    background: Color,
-    min_ratio: float = 4.5,
-    prefer_light: bool | None = None
-) -> Color:
-    """
-    Adjust foreground color to meet minimum contrast ratio against background.
+def _luminance(rgb: RGB) -> float:
+    """relative_luminance() of an 8-bit color through the _LINEAR table."""
+    r, g, b = rgb
+    return 0.2126 * _LINEAR[r] + 0.7152 * _LINEAR[g] + 0.0722 * _LINEAR[b]
 
-    Args:
-        foreground: The color to adjust
-        background: The background color (not modified)
-        min_ratio: Minimum contrast ratio (default 4.5 for WCAG AA)
-        prefer_light: If True, prefer lightening; if False, prefer darkening;
-                     if None, auto-detect based on background
 
-    Returns:
-        Adjusted foreground color meeting contrast requirements
+def _ratio(l1: float, l2: float) -> float:
+    """contrast_ratio() from two relative luminances."""
+    lighter = max(l1, l2)
+    darker = min(l1, l2)
+    return (lighter + 0.05) / (darker + 0.05)
+
+
+@lru_cache(maxsize=4096)
+def _solve_contrast(
+    foreground: RGB,
+    background: RGB,
+    min_ratio: float,
+    prefer_light: bool | None
+) -> RGB | None:
     """
-    current_ratio = contrast_ratio(foreground, background)
-    if current_ratio >= min_ratio:
-        return foreground
+    Foreground RGB meeting min_ratio against background, or None to keep it.
+
+    Walks the same 20-step lightness bisection as always, so results are
+    unchanged, but the background luminance is computed once, luminance
+    comes from a lookup table instead of three pow() calls, and each
+    distinct candidate color is only measured once (the last steps of the
+    bisection mostly land on the same 8-bit color).
+    """
+    bg_luminance = _luminance(background)
+    if _ratio(_luminance(foreground), bg_luminance) >= min_ratio:
+        return None
 
-    h, s, l = foreground.to_hsl()
-    bg_dark = is_dark(background)
+    h, s, l = rgb_to_hsl(*foreground)
 
-    # Determine direction to adjust
+    # Determine direction to adjust (is_dark() of the background)
     if prefer_light is None:
-        prefer_light = bg_dark
+        prefer_light = bg_luminance < 0.179
 
     # Binary search for the right lightness
     if prefer_light:
@@ -90,14 +108,17 @@ def ensure_contrast(
     else:
         low, high = 0.0, l
 
-    best_color = foreground
+    best = None
+    passes: dict[RGB, bool] = {}
     for _ in range(20):  # Max iterations
         mid = (low + high) / 2
-        test_color = Color.from_hsl(h, s, mid)
-        ratio = contrast_ratio(test_color, background)
+        candidate = hsl_to_rgb(h, s, mid)
+        ok = passes.get(candidate)
+        if ok is None:
+            ok = passes[candidate] = _ratio(_luminance(candidate), bg_luminance) >= min_ratio
 
-        if ratio >= min_ratio:
-            best_color = test_color
+        if ok:
+            best = candidate
             if prefer_light:
                 high = mid
             else:
@@ -108,7 +129,48 @@ def ensure_contrast(
             else:
                 high = mid
 
-    return best_color
+    return best
+
+
+def ensure_contrast(
+    foreground: Color,
+    background: Color,
+    min_ratio: float = 4.5,
+    prefer_light: bool | None = None
+) -> Color:
+    """
+    Adjust foreground color to meet minimum contrast ratio against background.
+
+    Args:
+        foreground: The color to adjust
+        background: The background color (not modified)
+        min_ratio: Minimum contrast ratio (default 4.5 for WCAG AA)
+        prefer_light: If True, prefer lightening; if False, prefer darkening;
+                     if None, auto-detect based on background
+
+    Returns:
+        Adjusted foreground color meeting contrast requirements
+    """
+    rgb = _solve_contrast(foreground.to_rgb(), background.to_rgb(), min_ratio, prefer_light)
+    if rgb is None:
+        return foreground
+    return Color.from_rgb(rgb)
+
+
+def ensure_contrast_batch(
+    requests: Iterable[tuple]
+) -> list[Color]:
+    """
+    ensure_contrast() for many colors at once.
+
+    Args:
+        requests: (foreground, background, min_ratio) or
+            (foreground, background, min_ratio, prefer_light) tuples
+
+    Returns:
+        Adjusted foreground colors, aligned with the requests
+    """
+    return [ensure_contrast(*request) for request in requests]
 
 
 def get_contrasting_color(background: Color, min_ratio: float = 4.5) -> Color:
@@ -0,0 +1,384 @@
+"""
+Persistent template-processor daemon.
+
+Running `template-processor.py --serve` keeps one interpreter alive so every
+wallpaper or scheme change skips interpreter startup, the `lib` imports and
+cold color caches. Clients talk to it over a Unix socket under
+$XDG_RUNTIME_DIR using newline-delimited JSON.
+
+Request (one JSON object per connection, keys mirror the CLI flags):
+    {"image": "/path/wall.png", "scheme-type": "content", "mode": "dark",
+     "config": "/path/config.toml", "terminal-output": {"foot": "..."}}
+
+Response (one JSON object):
+    {"status": "ok" | "error" | "cancelled", "exit_code": 0,
+     "stdout": "...", "stderr": "..."}
+
+Only the newest job matters: when a request arrives while another one is still
+running, the older job is flagged and stops at its next stage boundary
+(between extraction, theme generation and individual templates) and its
+client receives a "cancelled" response.
+
+Wallpaper pickers can ask for thumbnail colors with {"image": ..., "preview":
+true}; the daemon keeps those previews memoized (see lib/preview.py). Previews
+run alongside theme jobs: they neither cancel nor wait for them.
+
+Control requests: {"command": "ping"} and {"command": "shutdown"}.
+
+Example:
+    echo '{"image": "wall.png", "config": "cfg.toml"}' | \\
+        socat - UNIX-CONNECT:$XDG_RUNTIME_DIR/noctalia/template-processor.sock
+"""
+
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+SOCKET_NAME = "template-processor.sock"
+
+# Request keys that map to a CLI flag taking a value
+_VALUE_FIELDS = {
+    "scheme-type", "mode", "config", "scheme", "default-mode",
+    "terminal-output", "output",
+}
+# Request keys that map to a boolean CLI flag
+_FLAG_FIELDS = {"dark", "light", "both", "no-cache", "force", "preview"}
+# Request keys that map to a repeatable CLI flag
+_LIST_FIELDS = {"render"}
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when a newer request has superseded it."""
+    pass
+
+
+def default_socket_path() -> Path:
+    """Return the daemon socket path under $XDG_RUNTIME_DIR."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        base = Path(runtime_dir) / "noctalia"
+    else:
+        base = Path("/tmp") / f"noctalia-{os.getuid()}"
+    return base / SOCKET_NAME
+
+
+def request_to_argv(request: dict[str, Any]) -> list[str]:
+    """
+    Convert a JSON request into template-processor CLI arguments.
+
+    Keys may use either dashes or underscores ("scheme-type" or "scheme_type").
+    """
+    argv: list[str] = []
+    for raw_key, value in request.items():
+        key = raw_key.replace("_", "-")
+        if value is None or value is False:
+            continue
+        if key == "image":
+            argv.append(str(value))
+        elif key in _FLAG_FIELDS:
+            argv.append(f"--{key}")
+        elif key in _LIST_FIELDS:
+            for item in value if isinstance(value, list) else [value]:
+                argv.extend([f"--{key}", str(item)])
+        elif key in _VALUE_FIELDS:
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value)
+            argv.extend([f"--{key}", str(value)])
+        else:
+            raise ValueError(f"Unknown request field: {raw_key}")
+    return argv
+
+
+class _JobStream(io.TextIOBase):
+    """
+    Stand-in for sys.stdout/sys.stderr that routes writes to request buffers.
+
+    The running theme job captures writes from every thread (including its
+    template render pool); a preview captures only its own thread, so
+    requests running side by side never swap output.
+    """
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self.job_buffer: Optional[io.StringIO] = None
+        self._local = threading.local()
+
+    def _target(self):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self.job_buffer
+        return buffer if buffer is not None else self.fallback
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    @contextlib.contextmanager
+    def capture(self, buffer: io.StringIO, thread_only: bool):
+        """Send writes to `buffer`: this thread's only, or all of the job's."""
+        if thread_only:
+            self._local.buffer = buffer
+        else:
+            self.job_buffer = buffer
+        try:
+            yield
+        finally:
+            if thread_only:
+                self._local.buffer = None
+            else:
+                self.job_buffer = None
+
+
+_STREAMS_LOCK = threading.Lock()
+
+
+def _job_streams() -> tuple[_JobStream, _JobStream]:
+    """Install the routing sys.stdout and sys.stderr (once) and return them."""
+    with _STREAMS_LOCK:
+        if not isinstance(sys.stdout, _JobStream):
+            sys.stdout = _JobStream(sys.stdout)
+        if not isinstance(sys.stderr, _JobStream):
+            sys.stderr = _JobStream(sys.stderr)
+        return sys.stdout, sys.stderr
+
+
+class _Job:
+    """A single queued or running request."""
+
+    def __init__(self, argv: list[str]):
+        self.argv = argv
+        self.cancelled = threading.Event()
+
+    def is_cancelled(self) -> bool:
+        return self.cancelled.is_set()
+
+    def check_cancelled(self):
+        if self.cancelled.is_set():
+            raise JobCancelled()
+
+
+class TemplateDaemon:
+    """
+    Serializes theme requests and cancels superseded ones.
+
+    `handler(argv, job)` runs one request; it should call `job.check_cancelled()`
+    at stage boundaries and return the process exit code. Preview requests
+    ("--preview" in argv) bypass the queue and run concurrently.
+    """
+
+    def __init__(self, handler: Callable[[list[str], _Job], int]):
+        self._handler = handler
+        self._state_lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._latest: Optional[_Job] = None
+        self._stdout, self._stderr = _job_streams()
+
+    def submit(self, argv: list[str]) -> dict[str, Any]:
+        """Run a request; theme requests first cancel any older in-flight one."""
+        if "--preview" in argv:
+            # Previews only read caches and the image, so they neither
+            # supersede the running theme job nor wait for it
+            return self._run(argv, _Job(argv), thread_only=True)
+
+        job = _Job(argv)
+        with self._state_lock:
+            if self._latest is not None:
+                self._latest.cancelled.set()
+            self._latest = job
+
+        with self._run_lock:
+            # A newer request may have arrived while waiting for the lock
+            if job.is_cancelled():
+                return {"status": "cancelled", "exit_code": 1, "stdout": "", "stderr": ""}
+
+            response = self._run(argv, job, thread_only=False)
+
+            with self._state_lock:
+                if self._latest is job:
+                    self._latest = None
+
+        return response
+
+    def _run(self, argv: list[str], job: _Job, thread_only: bool) -> dict[str, Any]:
+        """Run the handler, capturing its output and exit status."""
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        status = "ok"
+        try:
+            with self._stdout.capture(stdout, thread_only), self._stderr.capture(stderr, thread_only):
+                exit_code = self._handler(argv, job)
+        except JobCancelled:
+            status = "cancelled"
+            exit_code = 1
+        except SystemExit as e:
+            # argparse reports invalid arguments via SystemExit
+            exit_code = e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            stderr.write(f"Unexpected error: {e}\n")
+            exit_code = 1
+
+        if status == "ok" and exit_code != 0:
+            status = "error"
+
+        return {
+            "status": status,
+            "exit_code": exit_code,
+            "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue(),
+        }
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Reads one JSON request per connection and writes one JSON response."""
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line.strip():
+            return
+
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            self._reply({"status": "error", "exit_code": 1, "stdout": "", "stderr": f"Invalid request: {e}\n"})
+            return
+
+        command = request.pop("command", None)
+        if command == "ping":
+            self._reply({"status": "ok", "pid": os.getpid()})
+            return
+        if command == "shutdown":
+            self._reply({"status": "ok"})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if command is not None:
+            self._reply({"status": "error", "exit_code": 1, "stdout": "", "stderr": f"Unknown command: {command}\n"})
+            return
+
+        try:
+            argv = request_to_argv(request)
+        except ValueError as e:
+            self._reply({"status": "error", "exit_code": 1, "stdout": "", "stderr": f"Invalid request: {e}\n"})
+            return
+
+        self._reply(self.server.daemon.submit(argv))
+
+    def _reply(self, response: dict[str, Any]):
+        try:
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away (e.g. killed by its own debounce timer)
+            pass
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, daemon: TemplateDaemon):
+        self.daemon = daemon
+        super().__init__(path, _RequestHandler)
+
+
+def _check_socket_dir(directory: Path, private: bool) -> Optional[str]:
+    """
+    Return why `directory` is unsafe for the socket, or None if it is safe.
+
+    It must be a real directory owned by the current user that nobody else
+    can write to. The default directory (`private`) must be exactly 0700, so
+    another user cannot have pre-created it under /tmp.
+    """
+    try:
+        st = directory.lstat()
+    except OSError as e:
+        return f"cannot stat {directory}: {e}"
+    if not stat.S_ISDIR(st.st_mode):
+        return f"{directory} is not a directory"
+    if st.st_uid != os.getuid():
+        return f"{directory} is not owned by the current user"
+    mode = stat.S_IMODE(st.st_mode)
+    if private and mode != 0o700:
+        return f"{directory} must have mode 0700 (has {mode:04o})"
+    if mode & 0o022:
+        return f"{directory} is writable by other users"
+    return None
+
+
+def _claim_socket_path(path: Path) -> bool:
+    """
+    Remove a stale socket file; return False if a live daemon owns it.
+
+    Raises ValueError if the path exists but is not a socket, so a mistyped
+    --socket never deletes a regular file.
+    """
+    try:
+        st = path.lstat()
+    except FileNotFoundError:
+        return True
+    if not stat.S_ISSOCK(st.st_mode):
+        raise ValueError(f"{path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except OSError:
+        path.unlink()
+        return True
+    finally:
+        probe.close()
+    return False
+
+
+def serve(handler: Callable[[list[str], _Job], int], socket_path: Optional[Path] = None) -> int:
+    """Listen on the daemon socket until shutdown or SIGTERM/SIGINT."""
+    path = socket_path or default_socket_path()
+    if socket_path is None:
+        path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+    problem = _check_socket_dir(path.parent, private=socket_path is None)
+    if problem:
+        print(f"Error: Unsafe socket directory: {problem}", file=sys.stderr)
+        return 1
+
+    try:
+        if not _claim_socket_path(path):
+            print(f"Error: Daemon already running on {path}", file=sys.stderr)
+            return 1
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    # Create the socket 0600 from the start: a chmod after bind() would leave
+    # a window in which other users could connect
+    old_umask = os.umask(0o177)
+    try:
+        server = _Server(str(path), TemplateDaemon(handler))
+    finally:
+        os.umask(old_umask)
+
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"Listening on {path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        with contextlib.suppress(FileNotFoundError):
+            path.unlink()
+    return 0
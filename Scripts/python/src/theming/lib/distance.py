@@ -0,0 +1,277 @@
+"""
+Perceptual color difference and nearest-color lookup.
+
+This module provides color difference metrics (CIE76, CIEDE2000 and
+CAM16-UCS) and ColorIndex, which precomputes the coordinates of a named
+palette once and answers nearest-color queries through a small KD-tree.
+Indexes are cached by palette contents, so the same `colors_to_compare`
+list is only converted once per process (across templates and daemon
+requests).
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+from .color import LAB, Color, rgb_to_lab
+from .hct import Cam16
+
+Point = tuple[float, float, float]
+
+METRICS = ("de76", "de2000", "cam16-ucs")
+
+
+# =============================================================================
+# Difference Metrics
+# =============================================================================
+
+def delta_e76(lab1: LAB, lab2: LAB) -> float:
+    """CIE76 color difference (Euclidean distance in L*a*b*)."""
+    dL = lab1[0] - lab2[0]
+    da = lab1[1] - lab2[1]
+    db = lab1[2] - lab2[2]
+    return math.sqrt(dL * dL + da * da + db * db)
+
+
+def delta_e2000(lab1: LAB, lab2: LAB) -> float:
+    """
+    CIEDE2000 color difference (kL = kC = kH = 1).
+
+    Follows Sharma, Wu and Dalal, "The CIEDE2000 Color-Difference Formula:
+    Implementation Notes, Supplementary Test Data, and Mathematical
+    Observations" (2005).
+    """
+    L1, a1, b1 = lab1
+    L2, a2, b2 = lab2
+
+    c_bar = (math.hypot(a1, b1) + math.hypot(a2, b2)) / 2.0
+    c_bar7 = c_bar ** 7
+    g = 0.5 * (1.0 - math.sqrt(c_bar7 / (c_bar7 + 25.0 ** 7)))
+    a1p = (1.0 + g) * a1
+    a2p = (1.0 + g) * a2
+    c1p = math.hypot(a1p, b1)
+    c2p = math.hypot(a2p, b2)
+    h1p = math.degrees(math.atan2(b1, a1p)) % 360.0 if c1p else 0.0
+    h2p = math.degrees(math.atan2(b2, a2p)) % 360.0 if c2p else 0.0
+
+    dLp = L2 - L1
+    dCp = c2p - c1p
+    if c1p * c2p == 0.0:
+        dhp = 0.0
+    else:
+        dhp = h2p - h1p
+        if dhp > 180.0:
+            dhp -= 360.0
+        elif dhp < -180.0:
+            dhp += 360.0
+    dHp = 2.0 * math.sqrt(c1p * c2p) * math.sin(math.radians(dhp / 2.0))
+
+    Lp_bar = (L1 + L2) / 2.0
+    Cp_bar = (c1p + c2p) / 2.0
+    if c1p * c2p == 0.0:
+        hp_bar = h1p + h2p
+    elif abs(h1p - h2p) <= 180.0:
+        hp_bar = (h1p + h2p) / 2.0
+    elif h1p + h2p < 360.0:
+        hp_bar = (h1p + h2p + 360.0) / 2.0
+    else:
+        hp_bar = (h1p + h2p - 360.0) / 2.0
+
+    t = (1.0
+         - 0.17 * math.cos(math.radians(hp_bar - 30.0))
+         + 0.24 * math.cos(math.radians(2.0 * hp_bar))
+         + 0.32 * math.cos(math.radians(3.0 * hp_bar + 6.0))
+         - 0.20 * math.cos(math.radians(4.0 * hp_bar - 63.0)))
+    d_theta = 30.0 * math.exp(-(((hp_bar - 275.0) / 25.0) ** 2))
+    Cp_bar7 = Cp_bar ** 7
+    r_c = 2.0 * math.sqrt(Cp_bar7 / (Cp_bar7 + 25.0 ** 7))
+    Lp_bar_sq = (Lp_bar - 50.0) ** 2
+    s_l = 1.0 + 0.015 * Lp_bar_sq / math.sqrt(20.0 + Lp_bar_sq)
+    s_c = 1.0 + 0.045 * Cp_bar
+    s_h = 1.0 + 0.015 * Cp_bar * t
+    r_t = -math.sin(math.radians(2.0 * d_theta)) * r_c
+
+    l_term = dLp / s_l
+    c_term = dCp / s_c
+    h_term = dHp / s_h
+    return math.sqrt(l_term * l_term + c_term * c_term + h_term * h_term + r_t * c_term * h_term)
+
+
+def cam16_ucs(r: int, g: int, b: int) -> Point:
+    """CAM16-UCS coordinates (J*, a*, b*) of an sRGB color."""
+    cam = Cam16.from_rgb(r, g, b)
+    return (cam.jstar, cam.astar, cam.bstar)
+
+
+def _coordinates(metric: str) -> Callable[[int, int, int], Point]:
+    """Color space a metric measures in."""
+    return cam16_ucs if metric == "cam16-ucs" else rgb_to_lab
+
+
+# =============================================================================
+# Nearest-Color Index
+# =============================================================================
+
+class ColorIndex:
+    """
+    Nearest-color lookup over a named palette.
+
+    Coordinates are computed once when the index is built. "de76" and
+    "cam16-ucs" are Euclidean in their color space and are answered by a
+    KD-tree; "de2000" is not Euclidean and scans the precomputed Lab
+    coordinates. Either way the answer is the first entry (in palette
+    order) at the minimum distance, like a linear scan.
+    """
+
+    def __init__(self, colors: list[dict[str, str]], metric: str = "de76"):
+        """
+        Args:
+            colors: List of {"name": "...", "color": "#..."} dicts; entries
+                with a missing or invalid color are skipped
+            metric: One of "de76", "de2000", "cam16-ucs"
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown color metric '{metric}' (expected one of {', '.join(METRICS)})")
+        self.metric = metric
+        self._convert = _coordinates(metric)
+        self._distance = delta_e2000 if metric == "de2000" else delta_e76
+
+        self._names: list[Any] = []
+        self._points: list[Point] = []
+        for entry in colors:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                color = Color.from_hex(entry["color"])
+            except (KeyError, ValueError):
+                # Skip invalid entries
+                continue
+            self._names.append(entry.get("name"))
+            self._points.append(self._convert(color.r, color.g, color.b))
+
+        # KD-tree nodes as (point index, axis, left node, right node)
+        self._nodes: list[tuple[int, int, int, int]] = []
+        self._root = -1
+        if metric != "de2000":
+            self._root = self._build(list(range(len(self._points))), 0)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _build(self, indices: list[int], depth: int) -> int:
+        """Build a subtree over `indices`, splitting at the median."""
+        if not indices:
+            return -1
+        axis = depth % 3
+        points = self._points
+        indices.sort(key=lambda i: (points[i][axis], i))
+        middle = len(indices) // 2
+        node = len(self._nodes)
+        self._nodes.append((indices[middle], axis, -1, -1))
+        left = self._build(indices[:middle], depth + 1)
+        right = self._build(indices[middle + 1:], depth + 1)
+        self._nodes[node] = (indices[middle], axis, left, right)
+        return node
+
+    def _nearest_in_tree(self, target: Point) -> int:
+        """Index of the first point at minimum Euclidean distance to target."""
+        points = self._points
+        nodes = self._nodes
+        best_index = -1
+        best = math.inf
+        stack = [(self._root, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if node < 0 or bound > best:
+                continue
+            index, axis, left, right = nodes[node]
+            point = points[index]
+            dist = delta_e76(target, point)
+            if dist < best or (dist == best and index < best_index):
+                best = dist
+                best_index = index
+
+            delta = target[axis] - point[axis]
+            if delta < 0:
+                near, far = left, right
+            else:
+                near, far = right, left
+            # Every point across the split is at least |delta| away
+            stack.append((far, abs(delta)))
+            stack.append((near, 0.0))
+        return best_index
+
+    def _scan(self, target: Point) -> Any:
+        """
+        Linear scan with find_closest_color()'s original semantics.
+
+        An entry without a name still becomes the distance to beat, but
+        the previously closest name is kept.
+        """
+        closest_name: Any = ""
+        closest_dist = math.inf
+        distance = self._distance
+        for name, point in zip(self._names, self._points):
+            dist = distance(target, point)
+            if dist < closest_dist:
+                closest_dist = dist
+                if name is not None:
+                    closest_name = name
+        return closest_name
+
+    def nearest(self, hex_color: str) -> Any:
+        """
+        Name of the palette entry closest to `hex_color`.
+
+        Returns an empty string if the palette has no valid entries.
+        Raises ValueError if `hex_color` is not a valid hex color.
+        """
+        target_color = Color.from_hex(hex_color)
+        target = self._convert(target_color.r, target_color.g, target_color.b)
+        if self._root < 0:
+            return self._scan(target)
+        name = self._names[self._nearest_in_tree(target)]
+        if name is None:
+            return self._scan(target)
+        return name
+
+
+# Indexes kept warm for the lifetime of the process, keyed by metric and
+# palette contents
+COLOR_INDEX_CACHE_SIZE = 32
+_INDEX_CACHE: OrderedDict = OrderedDict()
+_INDEX_LOCK = threading.Lock()
+
+
+def _palette_key(colors: list[dict[str, str]]) -> tuple:
+    return tuple(
+        (entry.get("name"), entry.get("color")) if isinstance(entry, dict) else None
+        for entry in colors
+    )
+
+
+def color_index(colors: list[dict[str, str]], metric: str = "de76") -> ColorIndex:
+    """
+    Get a (cached) ColorIndex for a palette.
+
+    Palettes with unhashable values are indexed without caching.
+    """
+    try:
+        key = (metric, _palette_key(colors))
+        hash(key)
+    except TypeError:
+        return ColorIndex(colors, metric)
+
+    with _INDEX_LOCK:
+        index = _INDEX_CACHE.get(key)
+        if index is not None:
+            _INDEX_CACHE.move_to_end(key)
+            return index
+
+    index = ColorIndex(colors, metric)
+    with _INDEX_LOCK:
+        _INDEX_CACHE[key] = index
+        while len(_INDEX_CACHE) > COLOR_INDEX_CACHE_SIZE:
+            _INDEX_CACHE.popitem(last=False)
+    return index
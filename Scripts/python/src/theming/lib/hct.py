@@ -8,6 +8,10 @@ Material Design 3's perceptual color space.
 
 from __future__ import annotations
 import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable
 
 # =============================================================================
 # Type Definitions
@@ -71,15 +75,6 @@ def _delinearize(linear: float) -> int:
     return max(0, min(255, round(normalized * 255)))
 
 
-def _matrix_multiply(matrix: list[list[float]], vector: list[float]) -> list[float]:
-    """Multiply 3x3 matrix by 3-element vector."""
-    return [
-        matrix[0][0] * vector[0] + matrix[0][1] * vector[1] + matrix[0][2] * vector[2],
-        matrix[1][0] * vector[0] + matrix[1][1] * vector[1] + matrix[1][2] * vector[2],
-        matrix[2][0] * vector[0] + matrix[2][1] * vector[1] + matrix[2][2] * vector[2],
-    ]
-
-
 def _signum(x: float) -> float:
     """Return sign of x: -1, 0, or 1."""
     if x < 0:
@@ -211,6 +206,25 @@ _CRITICAL_PLANES = [
 ]
 
 
+# Solver constants, folded exactly as the expressions they replace evaluate
+_EIGHT_PI = math.pi * 8
+_TWO_PI = math.pi * 2
+_K_R, _K_G, _K_B = _Y_FROM_LINRGB
+_LAST_PLANE = len(_CRITICAL_PLANES) - 1
+_T_INNER_COEFF = 1.0 / ((1.64 - (0.29 ** ViewingConditions.n)) ** 0.73)
+_AC_EXPONENT = 1.0 / ViewingConditions.c / ViewingConditions.z
+
+# Relative slack on the boundary chroma before a request counts as out of
+# gamut (in-gamut solutions stay within 0.1% of it)
+_GAMUT_MARGIN = 1.1
+
+# (n, coord_a, coord_b) of the 12 edges of the RGB cube, see _cube_slice()
+_CUBE_EDGES = tuple(
+    (n, 0.0 if n % 4 <= 1 else 100.0, 0.0 if n % 2 == 0 else 100.0)
+    for n in range(12)
+)
+
+
 class HctSolver:
     """
     Solves HCT to RGB conversion with proper gamut mapping.
@@ -218,12 +232,10 @@ class HctSolver:
     Ported from Material Color Utilities (Rust/TypeScript).
     When the requested chroma is out of gamut, this solver finds
     the maximum achievable chroma while preserving the exact hue.
-    """
 
-    @staticmethod
-    def _sanitize_radians(angle: float) -> float:
-        """Ensure angle is in [0, 2π) range."""
-        return (angle + math.pi * 8) % (math.pi * 2)
+    Linear RGB points are passed around as three floats rather than
+    vectors, so the bisection loops do not allocate per step.
+    """
 
     @staticmethod
     def _true_delinearized(rgb_component: float) -> float:
@@ -236,19 +248,20 @@ class HctSolver:
         return delinearized * 255.0
 
     @staticmethod
-    def _chromatic_adaptation(component: float) -> float:
-        """Apply chromatic adaptation."""
-        af = abs(component) ** 0.42
-        return _signum(component) * 400.0 * af / (af + 27.13)
-
-    @staticmethod
-    def _hue_of(linrgb: list[float]) -> float:
+    def _hue_of(r: float, g: float, b: float) -> float:
         """Calculate hue of linear RGB color in radians."""
-        scaled_discount = _matrix_multiply(_SCALED_DISCOUNT_FROM_LINRGB, linrgb)
-
-        r_a = HctSolver._chromatic_adaptation(scaled_discount[0])
-        g_a = HctSolver._chromatic_adaptation(scaled_discount[1])
-        b_a = HctSolver._chromatic_adaptation(scaled_discount[2])
+        # _SCALED_DISCOUNT_FROM_LINRGB applied to (r, g, b)
+        sd_r = 0.001200833568784504 * r + 0.002389694492170889 * g + 0.0002795742885861124 * b
+        sd_g = 0.0005891086651375999 * r + 0.0029785502573438758 * g + 0.0003270666104008398 * b
+        sd_b = 0.00010146692491640572 * r + 0.0005364214359186694 * g + 0.0032979401770712076 * b
+
+        # Chromatic adaptation
+        af = abs(sd_r) ** 0.42
+        r_a = (400.0 if sd_r > 0 else -400.0 if sd_r < 0 else 0.0) * af / (af + 27.13)
+        af = abs(sd_g) ** 0.42
+        g_a = (400.0 if sd_g > 0 else -400.0 if sd_g < 0 else 0.0) * af / (af + 27.13)
+        af = abs(sd_b) ** 0.42
+        b_a = (400.0 if sd_b > 0 else -400.0 if sd_b < 0 else 0.0) * af / (af + 27.13)
 
         # redness-greenness
         a = (11.0 * r_a - 12.0 * g_a + b_a) / 11.0
@@ -258,188 +271,122 @@ class HctSolver:
         return math.atan2(b, a)
 
     @staticmethod
-    def _are_in_cyclic_order(a: float, b: float, c: float) -> bool:
-        """Check if a, b, c are in cyclic order."""
-        delta_ab = HctSolver._sanitize_radians(b - a)
-        delta_ac = HctSolver._sanitize_radians(c - a)
-        return delta_ab < delta_ac
-
-    @staticmethod
-    def _intercept(source: float, mid: float, target: float) -> float:
-        """Solve lerp equation: find t such that lerp(source, target, t) = mid."""
-        return (mid - source) / (target - source)
-
-    @staticmethod
-    def _lerp_point(source: list[float], t: float, target: list[float]) -> list[float]:
-        """Linear interpolation between two 3D points."""
-        return [
-            source[0] + (target[0] - source[0]) * t,
-            source[1] + (target[1] - source[1]) * t,
-            source[2] + (target[2] - source[2]) * t,
-        ]
-
-    @staticmethod
-    def _set_coordinate(source: list[float], coordinate: float,
-                        target: list[float], axis: int) -> list[float]:
-        """Find point on segment where axis equals coordinate."""
-        t = HctSolver._intercept(source[axis], coordinate, target[axis])
-        return HctSolver._lerp_point(source, t, target)
-
-    @staticmethod
-    def _is_bounded(x: float) -> bool:
-        """Check if x is in [0, 100]."""
-        return 0.0 <= x <= 100.0
-
-    @staticmethod
-    def _nth_vertex(y: float, n: int) -> list[float]:
+    def _bisect_to_segment(y: float, target_hue: float) -> tuple[list, list]:
         """
-        Get nth vertex of RGB cube intersection with Y plane.
+        Find segment on RGB cube containing target hue.
 
-        Returns [-1, -1, -1] if vertex is outside cube.
+        Returns the two endpoints as _cube_slice() vertices.
         """
-        k_r, k_g, k_b = _Y_FROM_LINRGB
-
-        coord_a = 0.0 if n % 4 <= 1 else 100.0
-        coord_b = 0.0 if n % 2 == 0 else 100.0
-
-        if n < 4:
-            g = coord_a
-            b = coord_b
-            r = (y - k_g * g - k_b * b) / k_r
-            if HctSolver._is_bounded(r):
-                return [r, g, b]
-            return [-1.0, -1.0, -1.0]
-        elif n < 8:
-            b = coord_a
-            r = coord_b
-            g = (y - k_r * r - k_b * b) / k_g
-            if HctSolver._is_bounded(g):
-                return [r, g, b]
-            return [-1.0, -1.0, -1.0]
-        else:
-            r = coord_a
-            g = coord_b
-            b = (y - k_r * r - k_g * g) / k_b
-            if HctSolver._is_bounded(b):
-                return [r, g, b]
-            return [-1.0, -1.0, -1.0]
-
-    @staticmethod
-    def _bisect_to_segment(y: float, target_hue: float) -> list[list[float]]:
-        """Find segment on RGB cube containing target hue."""
-        left = [-1.0, -1.0, -1.0]
-        right = [-1.0, -1.0, -1.0]
+        left = right = _NO_VERTEX
         left_hue = 0.0
         right_hue = 0.0
         initialized = False
         uncut = True
 
-        for n in range(12):
-            mid = HctSolver._nth_vertex(y, n)
-
-            if mid[0] < 0:
-                continue
-
-            mid_hue = HctSolver._hue_of(mid)
+        for vertex in _cube_slice(y):
+            mid_hue = vertex[3]
 
             if not initialized:
-                left = mid
-                right = mid
+                left = right = vertex
                 left_hue = mid_hue
                 right_hue = mid_hue
                 initialized = True
                 continue
 
-            if uncut or HctSolver._are_in_cyclic_order(left_hue, mid_hue, right_hue):
+            # Cyclic order checks, see _sanitize_radians() in Material Color Utilities
+            if uncut or ((mid_hue - left_hue + _EIGHT_PI) % _TWO_PI
+                         < (right_hue - left_hue + _EIGHT_PI) % _TWO_PI):
                 uncut = False
 
-                if HctSolver._are_in_cyclic_order(left_hue, target_hue, mid_hue):
-                    right = mid
+                if ((target_hue - left_hue + _EIGHT_PI) % _TWO_PI
+                        < (mid_hue - left_hue + _EIGHT_PI) % _TWO_PI):
+                    right = vertex
                     right_hue = mid_hue
                 else:
-                    left = mid
+                    left = vertex
                     left_hue = mid_hue
 
-        return [left, right]
+        return left, right
 
     @staticmethod
-    def _mid_point(a: list[float], b: list[float]) -> list[float]:
-        """Calculate midpoint of two 3D points."""
-        return [(a[0] + b[0]) / 2, (a[1] + b[1]) / 2, (a[2] + b[2]) / 2]
-
-    @staticmethod
-    def _critical_plane_below(x: float) -> int:
-        """Get critical plane index below x."""
-        return int(math.floor(x - 0.5))
-
-    @staticmethod
-    def _critical_plane_above(x: float) -> int:
-        """Get critical plane index above x."""
-        return int(math.ceil(x - 0.5))
-
-    @staticmethod
-    def _bisect_to_limit(y: float, target_hue: float) -> list[float]:
+    def _bisect_to_limit(y: float, target_hue: float,
+                         segment: tuple[list, list] | None = None) -> tuple[float, float, float]:
         """
         Find color on RGB cube boundary with exact target hue.
 
         This is the key function for hue-preserving gamut mapping.
+        `segment` is the result of _bisect_to_segment(y, target_hue), if
+        the caller already has it.
         """
-        segment = HctSolver._bisect_to_segment(y, target_hue)
-        left = segment[0]
-        left_hue = HctSolver._hue_of(left)
-        right = segment[1]
+        hue_of = HctSolver._hue_of
+        delinearized = HctSolver._true_delinearized
+        if segment is None:
+            segment = HctSolver._bisect_to_segment(y, target_hue)
+        left, right = segment
+        left_r, left_g, left_b, left_hue = left[0], left[1], left[2], left[3]
+        right_r, right_g, right_b = right[0], right[1], right[2]
 
         for axis in range(3):
-            if abs(left[axis] - right[axis]) > 1e-10:
-                if left[axis] < right[axis]:
-                    l_plane = HctSolver._critical_plane_below(
-                        HctSolver._true_delinearized(left[axis]))
-                    r_plane = HctSolver._critical_plane_above(
-                        HctSolver._true_delinearized(right[axis]))
+            if axis == 0:
+                source, target = left_r, right_r
+            elif axis == 1:
+                source, target = left_g, right_g
+            else:
+                source, target = left_b, right_b
+            if not abs(source - target) > 1e-10:
+                continue
+
+            if source < target:
+                l_plane = math.floor(delinearized(source) - 0.5)
+                r_plane = math.ceil(delinearized(target) - 0.5)
+            else:
+                l_plane = math.ceil(delinearized(source) - 0.5)
+                r_plane = math.floor(delinearized(target) - 0.5)
+
+            for _ in range(8):
+                if abs(r_plane - l_plane) <= 1:
+                    break
+
+                m_plane = int((l_plane + r_plane) / 2)
+                # Clamp to valid index range
+                m_plane = max(0, min(_LAST_PLANE, m_plane))
+                mid_plane_coordinate = _CRITICAL_PLANES[m_plane]
+
+                # Point on the segment where this axis equals the plane
+                if axis == 0:
+                    source, target = left_r, right_r
+                elif axis == 1:
+                    source, target = left_g, right_g
+                else:
+                    source, target = left_b, right_b
+                t = (mid_plane_coordinate - source) / (target - source)
+                mid_r = left_r + (right_r - left_r) * t
+                mid_g = left_g + (right_g - left_g) * t
+                mid_b = left_b + (right_b - left_b) * t
+                mid_hue = hue_of(mid_r, mid_g, mid_b)
+
+                if ((target_hue - left_hue + _EIGHT_PI) % _TWO_PI
+                        < (mid_hue - left_hue + _EIGHT_PI) % _TWO_PI):
+                    right_r, right_g, right_b = mid_r, mid_g, mid_b
+                    r_plane = m_plane
                 else:
-                    l_plane = HctSolver._critical_plane_above(
-                        HctSolver._true_delinearized(left[axis]))
-                    r_plane = HctSolver._critical_plane_below(
-                        HctSolver._true_delinearized(right[axis]))
-
-                for _ in range(8):
-                    if abs(r_plane - l_plane) <= 1:
-                        break
-
-                    m_plane = int((l_plane + r_plane) / 2)
-                    # Clamp to valid index range
-                    m_plane = max(0, min(len(_CRITICAL_PLANES) - 1, m_plane))
-                    mid_plane_coordinate = _CRITICAL_PLANES[m_plane]
-                    mid = HctSolver._set_coordinate(left, mid_plane_coordinate, right, axis)
-                    mid_hue = HctSolver._hue_of(mid)
-
-                    if HctSolver._are_in_cyclic_order(left_hue, target_hue, mid_hue):
-                        right = mid
-                        r_plane = m_plane
-                    else:
-                        left = mid
-                        left_hue = mid_hue
-                        l_plane = m_plane
-
-        return HctSolver._mid_point(left, right)
+                    left_r, left_g, left_b = mid_r, mid_g, mid_b
+                    left_hue = mid_hue
+                    l_plane = m_plane
 
-    @staticmethod
-    def _inverse_chromatic_adaptation(adapted: float) -> float:
-        """Inverse of chromatic adaptation."""
-        adapted_abs = abs(adapted)
-        base = max(0.0, 27.13 * adapted_abs / (400.0 - adapted_abs))
-        return _signum(adapted) * (base ** (1.0 / 0.42))
+        return (left_r + right_r) / 2, (left_g + right_g) / 2, (left_b + right_b) / 2
 
     @staticmethod
-    def _find_result_by_j(hue_radians: float, chroma: float, y: float) -> tuple[int, int, int] | None:
+    def _find_result_by_j(hue_radians: float, chroma: float, y: float) -> int | None:
         """
         Try to find exact color with given hue, chroma, and Y.
 
-        Returns None if out of gamut.
+        Returns the color as 0xRRGGBB, or None if out of gamut.
         """
         j = math.sqrt(y) * 11.0
 
-        t_inner_coeff = 1.0 / ((1.64 - (0.29 ** ViewingConditions.n)) ** 0.73)
+        nbb = ViewingConditions.nbb
+        aw = ViewingConditions.aw
         e_hue = 0.25 * (math.cos(hue_radians + 2.0) + 3.8)
         p1 = e_hue * (50000.0 / 13.0) * ViewingConditions.nc * ViewingConditions.ncb
         h_sin = math.sin(hue_radians)
@@ -452,9 +399,9 @@ class HctSolver:
             else:
                 alpha = chroma / math.sqrt(j_normalized)
 
-            t = (alpha * t_inner_coeff) ** (1.0 / 0.9)
-            ac = ViewingConditions.aw * (j_normalized ** (1.0 / ViewingConditions.c / ViewingConditions.z))
-            p2 = ac / ViewingConditions.nbb
+            t = (alpha * _T_INNER_COEFF) ** (1.0 / 0.9)
+            ac = aw * (j_normalized ** _AC_EXPONENT)
+            p2 = ac / nbb
             gamma = 23.0 * (p2 + 0.305) * t / (23.0 * p1 + 11.0 * t * h_cos + 108.0 * t * h_sin)
             a = gamma * h_cos
             b = gamma * h_sin
@@ -463,32 +410,43 @@ class HctSolver:
             g_a = (460.0 * p2 - 891.0 * a - 261.0 * b) / 1403.0
             b_a = (460.0 * p2 - 220.0 * a - 6300.0 * b) / 1403.0
 
-            r_cscaled = HctSolver._inverse_chromatic_adaptation(r_a)
-            g_cscaled = HctSolver._inverse_chromatic_adaptation(g_a)
-            b_cscaled = HctSolver._inverse_chromatic_adaptation(b_a)
-
-            linrgb = _matrix_multiply(_LINRGB_FROM_SCALED_DISCOUNT,
-                                      [r_cscaled, g_cscaled, b_cscaled])
+            # Inverse chromatic adaptation
+            adapted_abs = abs(r_a)
+            base = 27.13 * adapted_abs / (400.0 - adapted_abs)
+            base = base ** (1.0 / 0.42) if base > 0.0 else 0.0
+            r_cscaled = base if r_a > 0 else -base if r_a < 0 else 0.0
+            adapted_abs = abs(g_a)
+            base = 27.13 * adapted_abs / (400.0 - adapted_abs)
+            base = base ** (1.0 / 0.42) if base > 0.0 else 0.0
+            g_cscaled = base if g_a > 0 else -base if g_a < 0 else 0.0
+            adapted_abs = abs(b_a)
+            base = 27.13 * adapted_abs / (400.0 - adapted_abs)
+            base = base ** (1.0 / 0.42) if base > 0.0 else 0.0
+            b_cscaled = base if b_a > 0 else -base if b_a < 0 else 0.0
+
+            # _LINRGB_FROM_SCALED_DISCOUNT applied to the scaled components
+            lin_r = 1373.2198709594231 * r_cscaled + -1100.4251190754821 * g_cscaled + -7.278681089101213 * b_cscaled
+            lin_g = -271.815969077903 * r_cscaled + 559.6580465940733 * g_cscaled + -32.46047482791194 * b_cscaled
+            lin_b = 1.9622899599665666 * r_cscaled + -57.173814538844006 * g_cscaled + 308.7233197812385 * b_cscaled
 
             # Check if in gamut
-            if linrgb[0] < 0 or linrgb[1] < 0 or linrgb[2] < 0:
+            if lin_r < 0 or lin_g < 0 or lin_b < 0:
                 return None
 
-            k_r, k_g, k_b = _Y_FROM_LINRGB
-            fnj = k_r * linrgb[0] + k_g * linrgb[1] + k_b * linrgb[2]
+            fnj = _K_R * lin_r + _K_G * lin_g + _K_B * lin_b
 
             if fnj <= 0:
                 return None
 
             if iteration == 4 or abs(fnj - y) < 0.002:
-                if linrgb[0] > 100.01 or linrgb[1] > 100.01 or linrgb[2] > 100.01:
+                if lin_r > 100.01 or lin_g > 100.01 or lin_b > 100.01:
                     return None
 
                 # Convert linear RGB to sRGB
                 return (
-                    _delinearize(linrgb[0] / 100.0),
-                    _delinearize(linrgb[1] / 100.0),
-                    _delinearize(linrgb[2] / 100.0),
+                    (_delinearize(lin_r / 100.0) << 16)
+                    | (_delinearize(lin_g / 100.0) << 8)
+                    | _delinearize(lin_b / 100.0)
                 )
 
             # Newton iteration
@@ -497,52 +455,240 @@ class HctSolver:
         return None
 
     @staticmethod
-    def solve_to_rgb(hue_degrees: float, chroma: float, tone: float) -> tuple[int, int, int]:
+    def solve_to_argb(hue_degrees: float, chroma: float, tone: float) -> int:
         """
-        Solve HCT to RGB with proper gamut mapping.
+        Solve HCT to an ARGB integer with proper gamut mapping.
 
         If the exact color is out of gamut, finds the maximum achievable
         chroma while preserving the exact hue.
+
+        Results are memoized in a process-wide LRU cache (see
+        solver_cache_info()).
         """
+        key = (hue_degrees, chroma, tone)
+        cache = _SOLVER_CACHE
+        with cache.lock:
+            rgb = cache.entries.get(key)
+            if rgb is not None:
+                cache.entries.move_to_end(key)
+                cache.hits += 1
+                return 0xFF000000 | rgb
+            cache.misses += 1
+
+        rgb = HctSolver._solve(hue_degrees, chroma, tone)
+        cache.put(key, rgb)
+        return 0xFF000000 | rgb
+
+    @staticmethod
+    def solve_to_rgb(hue_degrees: float, chroma: float, tone: float) -> tuple[int, int, int]:
+        """solve_to_argb() as an (r, g, b) tuple."""
+        argb = HctSolver.solve_to_argb(hue_degrees, chroma, tone)
+        return ((argb >> 16) & 0xFF, (argb >> 8) & 0xFF, argb & 0xFF)
+
+    @staticmethod
+    def _solve(hue_degrees: float, chroma: float, tone: float) -> int:
+        """Uncached solve, returning 0xRRGGBB."""
         if chroma < 0.0001 or tone < 0.0001 or tone > 99.9999:
             # Achromatic - just convert tone to gray
             y = lstar_to_y(tone)
             gray = _delinearize(y / 100.0)
-            return (gray, gray, gray)
+            return (gray << 16) | (gray << 8) | gray
 
         hue_degrees = _sanitize_degrees(hue_degrees)
         hue_radians = math.radians(hue_degrees)
         # Y is in 0-100 range (same scale as internal linear RGB in the solver)
         y = lstar_to_y(tone)
 
-        # Try to find exact solution
-        exact = HctSolver._find_result_by_j(hue_radians, chroma, y)
-        if exact is not None:
-            return exact
+        # Once the cube's cross-section at this tone is known, the chroma of
+        # the boundary segment's endpoints bounds the chroma reachable at
+        # this hue, so clearly out-of-gamut requests skip the exact search
+        segment = None
+        out_of_gamut = False
+        if y in _CUBE_SLICES:
+            segment = HctSolver._bisect_to_segment(y, hue_radians)
+            bound = max(_vertex_chroma(segment[0]), _vertex_chroma(segment[1]))
+            out_of_gamut = chroma > bound * _GAMUT_MARGIN + 1.0
+
+        if not out_of_gamut:
+            # Try to find exact solution
+            exact = HctSolver._find_result_by_j(hue_radians, chroma, y)
+            if exact is not None:
+                return exact
 
         # Fall back to bisection - find max chroma that preserves hue
-        linrgb = HctSolver._bisect_to_limit(y, hue_radians)
+        lin_r, lin_g, lin_b = HctSolver._bisect_to_limit(y, hue_radians, segment)
 
         return (
-            _delinearize(linrgb[0] / 100.0),
-            _delinearize(linrgb[1] / 100.0),
-            _delinearize(linrgb[2] / 100.0),
+            (_delinearize(lin_r / 100.0) << 16)
+            | (_delinearize(lin_g / 100.0) << 8)
+            | _delinearize(lin_b / 100.0)
         )
 
 
+# _cube_slice() results by Y; cleared when it grows past the limit
+_CUBE_SLICES: dict[float, tuple[list, ...]] = {}
+_CUBE_SLICE_LIMIT = 1024
+
+
+def _cube_slice(y: float) -> tuple[list, ...]:
+    """
+    Vertices of the RGB cube's intersection with the Y plane.
+
+    Each vertex is [r, g, b, hue, chroma]: the exact linear RGB point
+    (0-100) where one of the 12 cube edges crosses the plane, its hue in
+    radians as _hue_of() computes it, and its CAM16 chroma, which is None
+    until _vertex_chroma() needs it. Vertices are in edge order. Tones
+    repeat across palettes, so each plane is computed once and shared by
+    every hue solved at that tone.
+    """
+    vertices = _CUBE_SLICES.get(y)
+    if vertices is not None:
+        return vertices
+
+    hue_of = HctSolver._hue_of
+    vertices = []
+    for n, coord_a, coord_b in _CUBE_EDGES:
+        if n < 4:
+            g = coord_a
+            b = coord_b
+            r = (y - _K_G * g - _K_B * b) / _K_R
+            if not 0.0 <= r <= 100.0:
+                continue
+        elif n < 8:
+            b = coord_a
+            r = coord_b
+            g = (y - _K_R * r - _K_B * b) / _K_G
+            if not 0.0 <= g <= 100.0:
+                continue
+        else:
+            r = coord_a
+            g = coord_b
+            b = (y - _K_R * r - _K_G * g) / _K_B
+            if not 0.0 <= b <= 100.0:
+                continue
+
+        vertices.append([r, g, b, hue_of(r, g, b), None])
+
+    if len(_CUBE_SLICES) >= _CUBE_SLICE_LIMIT:
+        _CUBE_SLICES.clear()
+    vertices = _CUBE_SLICES[y] = tuple(vertices)
+    return vertices
+
+
+def _vertex_chroma(vertex: list) -> float:
+    """CAM16 chroma of a _cube_slice() vertex, computed on first use."""
+    chroma = vertex[4]
+    if chroma is None:
+        r, g, b = vertex[0], vertex[1], vertex[2]
+        x = 0.41233895 * r + 0.35762064 * g + 0.18051042 * b
+        y = 0.2126 * r + 0.7152 * g + 0.0722 * b
+        z = 0.01932141 * r + 0.11916382 * g + 0.95034478 * b
+        chroma = vertex[4] = _cam16_forward(x, y, z)[2]
+    return chroma
+
+
+# Segment endpoint when the plane misses the cube; never skips the exact search
+_NO_VERTEX = [-1.0, -1.0, -1.0, HctSolver._hue_of(-1.0, -1.0, -1.0), math.inf]
+
+
+class _SolverCache:
+    """Bounded LRU of solver results (0xRRGGBB) keyed by the exact (hue, chroma, tone)."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: OrderedDict[tuple[float, float, float], int] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def put(self, key: tuple[float, float, float], rgb: int):
+        with self.lock:
+            self.entries[key] = rgb
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+SOLVER_CACHE_SIZE = 16384
+
+_SOLVER_CACHE = _SolverCache(SOLVER_CACHE_SIZE)
+
+
+def solver_cache_info() -> dict[str, int]:
+    """Hit/miss counters and size of the HctSolver result cache."""
+    cache = _SOLVER_CACHE
+    with cache.lock:
+        return {
+            "hits": cache.hits,
+            "misses": cache.misses,
+            "size": len(cache.entries),
+            "max_size": cache.max_size,
+        }
+
+
+def clear_solver_cache():
+    """Drop all cached solver results and reset the counters."""
+    cache = _SOLVER_CACHE
+    with cache.lock:
+        cache.entries.clear()
+        cache.hits = 0
+        cache.misses = 0
+
+
+def solver_cache_items() -> list[tuple[float, float, float, int]]:
+    """Cached solver results as (hue, chroma, tone, 0xRRGGBB), least recently used first."""
+    cache = _SOLVER_CACHE
+    with cache.lock:
+        return [(h, c, t, rgb) for (h, c, t), rgb in cache.entries.items()]
+
+
+def warm_solver_cache(items: Iterable[tuple[float, float, float, int]], recent: bool = False) -> int:
+    """
+    Add (hue, chroma, tone, 0xRRGGBB) results, e.g. from a previous run.
+
+    The items count as less recently used than anything already cached and
+    keep their relative order; with `recent` (results just solved by another
+    process) they count as the most recently used instead. Existing entries
+    and the counters are not touched. Returns the number of entries added.
+    """
+    cache = _SOLVER_CACHE
+    added = 0
+    with cache.lock:
+        for h, c, t, rgb in (items if recent else reversed(list(items))):
+            key = (h, c, t)
+            if key not in cache.entries:
+                cache.entries[key] = rgb & 0xFFFFFF
+                cache.entries.move_to_end(key, last=recent)
+                added += 1
+        while len(cache.entries) > cache.max_size:
+            cache.entries.popitem(last=False)
+    return added
+
+
 def rgb_to_xyz(r: int, g: int, b: int) -> tuple[float, float, float]:
     """Convert sRGB to CIE XYZ."""
     linear_r = _linearize(r)
     linear_g = _linearize(g)
     linear_b = _linearize(b)
-    xyz = _matrix_multiply(SRGB_TO_XYZ, [linear_r, linear_g, linear_b])
-    return (xyz[0] * 100, xyz[1] * 100, xyz[2] * 100)
+    # SRGB_TO_XYZ applied to the linear channels
+    return (
+        (0.41233895 * linear_r + 0.35762064 * linear_g + 0.18051042 * linear_b) * 100,
+        (0.2126 * linear_r + 0.7152 * linear_g + 0.0722 * linear_b) * 100,
+        (0.01932141 * linear_r + 0.11916382 * linear_g + 0.95034478 * linear_b) * 100,
+    )
 
 
 def xyz_to_rgb(x: float, y: float, z: float) -> tuple[int, int, int]:
     """Convert CIE XYZ to sRGB."""
-    linear = _matrix_multiply(XYZ_TO_SRGB, [x / 100, y / 100, z / 100])
-    return (_delinearize(linear[0]), _delinearize(linear[1]), _delinearize(linear[2]))
+    x /= 100
+    y /= 100
+    z /= 100
+    # XYZ_TO_SRGB applied to the scaled components
+    return (
+        _delinearize(3.2413774792388685 * x + -1.5376652402851851 * y + -0.49885366846268053 * z),
+        _delinearize(-0.9691452513005321 * x + 1.8758853451067872 * y + 0.04156585616912061 * z),
+        _delinearize(0.05562093689691305 * x + -0.20395524564742123 * y + 1.0571799111220335 * z),
+    )
 
 
 def y_to_lstar(y: float) -> float:
@@ -577,6 +723,59 @@ def int_to_rgb(argb: int) -> tuple[int, int, int]:
     return ((argb >> 16) & 0xFF, (argb >> 8) & 0xFF, argb & 0xFF)
 
 
+# Constants of the CAM16 forward model under the default viewing conditions,
+# folded exactly as the expressions in _cam16_forward() would evaluate them
+_FL = ViewingConditions.fl
+_RGB_D_R, _RGB_D_G, _RGB_D_B = ViewingConditions.RGB_D
+_NBB = ViewingConditions.nbb
+_AW = ViewingConditions.aw
+_J_EXPONENT = ViewingConditions.c * ViewingConditions.z
+_T_SCALE = 50000.0 / 13.0 * ViewingConditions.nc * ViewingConditions.ncb
+_CHROMA_FACTOR = math.pow(1.64 - math.pow(0.29, ViewingConditions.n), 0.73)
+
+
+def _cam16_forward(x: float, y: float, z: float) -> tuple[float, float, float, float, float]:
+    """
+    CAM16 hue and chroma of an XYZ color.
+
+    Returns (hue, hue_radians, chroma, j, alpha): the correlates Cam16 and
+    Hct need, without the UCS and brightness terms.
+    """
+    r_d = _RGB_D_R * (0.401288 * x + 0.650173 * y - 0.051461 * z)
+    g_d = _RGB_D_G * (-0.250268 * x + 1.204414 * y + 0.045854 * z)
+    b_d = _RGB_D_B * (-0.002079 * x + 0.048952 * y + 0.953127 * z)
+
+    r_af = math.pow(_FL * abs(r_d) / 100.0, 0.42)
+    g_af = math.pow(_FL * abs(g_d) / 100.0, 0.42)
+    b_af = math.pow(_FL * abs(b_d) / 100.0, 0.42)
+
+    r_a = _signum(r_d) * 400.0 * r_af / (r_af + 27.13)
+    g_a = _signum(g_d) * 400.0 * g_af / (g_af + 27.13)
+    b_a = _signum(b_d) * 400.0 * b_af / (b_af + 27.13)
+
+    a = (11.0 * r_a + -12.0 * g_a + b_a) / 11.0
+    b = (r_a + g_a - 2.0 * b_a) / 9.0
+
+    hue_radians = math.atan2(b, a)
+    hue = math.degrees(hue_radians)
+    if hue < 0:
+        hue += 360.0
+
+    u = (20.0 * r_a + 20.0 * g_a + 21.0 * b_a) / 20.0
+    p2 = (40.0 * r_a + 20.0 * g_a + b_a) / 20.0
+
+    j = 100.0 * math.pow(p2 * _NBB / _AW, _J_EXPONENT)
+
+    hue_prime = hue + 360.0 if hue < 20.14 else hue
+    e_hue = 0.25 * (math.cos(math.radians(hue_prime) + 2.0) + 3.8)
+
+    t = _T_SCALE * e_hue * math.sqrt(a * a + b * b) / (u + 0.305)
+    alpha = math.pow(t, 0.9) * _CHROMA_FACTOR
+    chroma = alpha * math.sqrt(j / 100.0)
+
+    return hue, hue_radians, chroma, j, alpha
+
+
 class Cam16:
     """CAM16 color appearance model representation."""
 
@@ -596,45 +795,15 @@ class Cam16:
     def from_rgb(cls, r: int, g: int, b: int) -> 'Cam16':
         """Create CAM16 from sRGB values."""
         x, y, z = rgb_to_xyz(r, g, b)
+        return cls.from_xyz(x, y, z)
 
-        r_c = 0.401288 * x + 0.650173 * y - 0.051461 * z
-        g_c = -0.250268 * x + 1.204414 * y + 0.045854 * z
-        b_c = -0.002079 * x + 0.048952 * y + 0.953127 * z
-
-        r_d = ViewingConditions.RGB_D[0] * r_c
-        g_d = ViewingConditions.RGB_D[1] * g_c
-        b_d = ViewingConditions.RGB_D[2] * b_c
-
-        r_af = math.pow(ViewingConditions.fl * abs(r_d) / 100.0, 0.42)
-        g_af = math.pow(ViewingConditions.fl * abs(g_d) / 100.0, 0.42)
-        b_af = math.pow(ViewingConditions.fl * abs(b_d) / 100.0, 0.42)
-
-        r_a = _signum(r_d) * 400.0 * r_af / (r_af + 27.13)
-        g_a = _signum(g_d) * 400.0 * g_af / (g_af + 27.13)
-        b_a = _signum(b_d) * 400.0 * b_af / (b_af + 27.13)
-
-        a = (11.0 * r_a + -12.0 * g_a + b_a) / 11.0
-        b = (r_a + g_a - 2.0 * b_a) / 9.0
-
-        hue_radians = math.atan2(b, a)
-        hue = math.degrees(hue_radians)
-        if hue < 0:
-            hue += 360.0
-
-        u = (20.0 * r_a + 20.0 * g_a + 21.0 * b_a) / 20.0
-        p2 = (40.0 * r_a + 20.0 * g_a + b_a) / 20.0
-        ac = p2 * ViewingConditions.nbb
+    @classmethod
+    def from_xyz(cls, x: float, y: float, z: float) -> 'Cam16':
+        """Create CAM16 from CIE XYZ (0-100 scale)."""
+        hue, hue_radians, chroma, j, alpha = _cam16_forward(x, y, z)
 
-        j = 100.0 * math.pow(ac / ViewingConditions.aw, ViewingConditions.c * ViewingConditions.z)
         q = (4.0 / ViewingConditions.c) * math.sqrt(j / 100.0) * (ViewingConditions.aw + 4.0) * ViewingConditions.fl_root
 
-        hue_prime = hue + 360.0 if hue < 20.14 else hue
-        e_hue = 0.25 * (math.cos(math.radians(hue_prime) + 2.0) + 3.8)
-
-        t = 50000.0 / 13.0 * ViewingConditions.nc * ViewingConditions.ncb * e_hue * math.sqrt(a * a + b * b) / (u + 0.305)
-        alpha = math.pow(t, 0.9) * math.pow(1.64 - math.pow(0.29, ViewingConditions.n), 0.73)
-        chroma = alpha * math.sqrt(j / 100.0)
-
         m = chroma * ViewingConditions.fl_root
         s = 50.0 * math.sqrt((ViewingConditions.c * alpha) / (ViewingConditions.aw + 4.0))
 
@@ -735,16 +904,18 @@ class Hct:
     @classmethod
     def from_rgb(cls, r: int, g: int, b: int) -> 'Hct':
         """Create HCT from sRGB values."""
-        cam = Cam16.from_rgb(r, g, b)
-        _, y, _ = rgb_to_xyz(r, g, b)
-        tone = y_to_lstar(y)
-        return cls(cam.hue, cam.chroma, tone)
+        x, y, z = rgb_to_xyz(r, g, b)
+        hue, _, chroma, _, _ = _cam16_forward(x, y, z)
+        return cls(hue, chroma, y_to_lstar(y))
 
     @classmethod
     def from_argb(cls, argb: int) -> 'Hct':
         """Create HCT from ARGB integer."""
-        r, g, b = int_to_rgb(argb)
-        return cls.from_rgb(r, g, b)
+        # _hct_of_argb() values are already normalized as __init__ would
+        hct = cls.__new__(cls)
+        hct._hue, hct._chroma, hct._tone = _hct_of_argb(argb & 0xFFFFFF)
+        hct._argb = None
+        return hct
 
     def to_rgb(self) -> tuple[int, int, int]:
         """Convert HCT to sRGB, solving for the color."""
@@ -753,8 +924,7 @@ class Hct:
     def to_argb(self) -> int:
         """Convert HCT to ARGB integer."""
         if self._argb is None:
-            r, g, b = self.to_rgb()
-            self._argb = argb_to_int(r, g, b)
+            self._argb = HctSolver.solve_to_argb(self._hue, self._chroma, self._tone)
         return self._argb
 
     def to_hex(self) -> str:
@@ -786,19 +956,111 @@ class Hct:
         return Hct(self._hue, self._chroma, tone)
 
 
+# _linearize() of every 8-bit channel value
+_LINEAR_RGB = [_linearize(v) for v in range(256)]
+
+
+@lru_cache(maxsize=8192)
+def _hct_of_argb(rgb: int) -> tuple[float, float, float]:
+    """(hue, chroma, tone) of a 0xRRGGBB color, exactly as Hct.from_rgb() computes them."""
+    r = _LINEAR_RGB[(rgb >> 16) & 0xFF]
+    g = _LINEAR_RGB[(rgb >> 8) & 0xFF]
+    b = _LINEAR_RGB[rgb & 0xFF]
+    # rgb_to_xyz() with SRGB_TO_XYZ spelled out
+    x = (0.41233895 * r + 0.35762064 * g + 0.18051042 * b) * 100
+    y = (0.2126 * r + 0.7152 * g + 0.0722 * b) * 100
+    z = (0.01932141 * r + 0.11916382 * g + 0.95034478 * b) * 100
+    hue, _, chroma, _, _ = _cam16_forward(x, y, z)
+    # Same normalization as Hct.__init__
+    return hue % 360.0, max(0.0, chroma), max(0.0, min(100.0, y_to_lstar(y)))
+
+
+def hct_batch(argb: Iterable[int]) -> tuple[list[float], list[float], list[float]]:
+    """
+    Convert many ARGB colors to HCT at once.
+
+    Returns (hues, chromas, tones) lists aligned with the input, with the
+    same values Hct.from_argb() gives for each color. Channels are
+    linearized through a 256-entry table, XYZ is computed once per color
+    and only the CAM16 terms HCT needs are evaluated; results are kept in
+    an LRU cache, so repeated colors (within a call or across the scoring
+    passes of one wallpaper) are converted once.
+    """
+    colors = [_hct_of_argb(c & 0xFFFFFF) for c in argb]
+    if not colors:
+        return [], [], []
+    hues, chromas, tones = zip(*colors)
+    return list(hues), list(chromas), list(tones)
+
+
+def solve_argb_batch(hcts: Iterable[tuple[float, float, float]]) -> list[int]:
+    """
+    Solve many (hue, chroma, tone) triples to ARGB in one pass.
+
+    Returns ARGB integers aligned with the input, equal to
+    Hct(hue, chroma, tone).to_argb() for each triple. Triples are
+    normalized the way Hct does and each distinct one is solved once, so
+    palettes that share a hue and chroma (e.g. grayscale neutrals) cost a
+    single solve per tone.
+    """
+    solved: dict[tuple[float, float, float], int] = {}
+    result = []
+    for hue, chroma, tone in hcts:
+        key = (hue % 360.0, max(0.0, chroma), max(0.0, min(100.0, tone)))
+        argb = solved.get(key)
+        if argb is None:
+            argb = HctSolver.solve_to_argb(*key)
+            solved[key] = argb
+        result.append(argb)
+    return result
+
+
+class _HueCircle:
+    """
+    Temperatures of Hct(hue, chroma, tone) for every integer hue 0-359.
+
+    Built once per (chroma, tone) by _hue_circle() and shared by every
+    TemperatureCache for that chroma and tone.
+    """
+
+    __slots__ = ('hcts', 'raw', 'by_temp', 'coldest', 'warmest', 'relative')
+
+    def __init__(self, chroma: float, tone: float):
+        self.hcts = [Hct(float(hue), chroma, tone) for hue in range(360)]
+        self.raw = [TemperatureCache.raw_temperature(hct) for hct in self.hcts]
+        # Hue indices from coldest to warmest (stable, so ties keep hue order)
+        self.by_temp = sorted(range(360), key=self.raw.__getitem__)
+        self.coldest = self.raw[self.by_temp[0]]
+        self.warmest = self.raw[self.by_temp[-1]]
+        self.relative = [self.relative_to_range(raw) for raw in self.raw]
+
+    def relative_to_range(self, raw: float) -> float:
+        """Map a raw temperature to 0-1 between the coldest and warmest hue."""
+        if self.warmest == self.coldest:
+            return 0.5
+        return (raw - self.coldest) / (self.warmest - self.coldest)
+
+
+@lru_cache(maxsize=64)
+def _hue_circle(chroma: float, tone: float) -> _HueCircle:
+    """Shared temperature table for one (chroma, tone)."""
+    return _HueCircle(chroma, tone)
+
+
 class TemperatureCache:
     """
     Color temperature analysis for finding harmonious colors.
 
     Based on Material Color Utilities - calculates relative warmth of colors
     and finds analogous colors based on temperature similarity.
+
+    The temperatures of the 360 hues at the input's chroma and tone are
+    computed once per (chroma, tone) and shared by all instances, so
+    complement() and analogous() are plain scans over precomputed values.
     """
 
     def __init__(self, input_hct: Hct):
         self.input = input_hct
-        self._hcts_by_temp: list[Hct] | None = None
-        self._hcts_by_hue: list[Hct] | None = None
-        self._temps_by_hct: dict[tuple[float, float, float], float] | None = None
         self._input_relative_temp: float | None = None
         self._complement: Hct | None = None
 
@@ -837,66 +1099,23 @@ class TemperatureCache:
         hue_rad = math.radians((lab_hue - 50.0) % 360.0)
         return -0.5 + 0.02 * (lab_chroma ** 1.07) * math.cos(hue_rad)
 
-    def _get_hcts_by_hue(self) -> list[Hct]:
-        """Generate HCT colors at regular hue intervals."""
-        if self._hcts_by_hue is not None:
-            return self._hcts_by_hue
+    def _table(self) -> _HueCircle:
+        return _hue_circle(self.input.chroma, self.input.tone)
 
-        hcts = []
-        for hue in range(360):
-            color_at_hue = Hct(float(hue), self.input.chroma, self.input.tone)
-            hcts.append(color_at_hue)
-
-        self._hcts_by_hue = hcts
-        return hcts
-
-    def _get_temps_by_hct(self) -> dict[tuple[float, float, float], float]:
-        """Cache temperatures for all hue variants."""
-        if self._temps_by_hct is not None:
-            return self._temps_by_hct
-
-        hcts = self._get_hcts_by_hue()
-        temps = {}
-        for hct in hcts:
-            key = (hct.hue, hct.chroma, hct.tone)
-            temps[key] = self.raw_temperature(hct)
-
-        self._temps_by_hct = temps
-        return temps
+    def _get_hcts_by_hue(self) -> list[Hct]:
+        """HCT colors at regular hue intervals."""
+        return list(self._table().hcts)
 
     def _get_hcts_by_temp(self) -> list[Hct]:
-        """Get HCT colors sorted by temperature."""
-        if self._hcts_by_temp is not None:
-            return self._hcts_by_temp
-
-        hcts = list(self._get_hcts_by_hue())
-        temps = self._get_temps_by_hct()
-        hcts.sort(key=lambda h: temps[(h.hue, h.chroma, h.tone)])
-
-        self._hcts_by_temp = hcts
-        return hcts
+        """HCT colors sorted by temperature."""
+        table = self._table()
+        return [table.hcts[hue] for hue in table.by_temp]
 
     def _relative_temperature(self, hct: Hct) -> float:
         """
         Calculate relative temperature (0-1) based on position in temperature-sorted list.
         """
-        temps = self._get_temps_by_hct()
-        hcts_by_temp = self._get_hcts_by_temp()
-
-        key = (hct.hue, hct.chroma, hct.tone)
-        if key in temps:
-            raw = temps[key]
-        else:
-            raw = self.raw_temperature(hct)
-
-        # Find position in sorted list
-        coldest = self.raw_temperature(hcts_by_temp[0])
-        warmest = self.raw_temperature(hcts_by_temp[-1])
-
-        if warmest == coldest:
-            return 0.5
-
-        return (raw - coldest) / (warmest - coldest)
+        return self._table().relative_to_range(self.raw_temperature(hct))
 
     def _input_relative_temperature_value(self) -> float:
         """Get relative temperature of the input color."""
@@ -911,28 +1130,23 @@ class TemperatureCache:
         if self._complement is not None:
             return self._complement
 
-        input_temp = self._input_relative_temperature_value()
-        hcts_by_temp = self._get_hcts_by_temp()
-        temps = self._get_temps_by_hct()
+        table = self._table()
 
         # Target is opposite temperature
-        target_temp = 1.0 - input_temp
+        target_temp = 1.0 - self._input_relative_temperature_value()
 
-        # Find closest match
-        best_hct = hcts_by_temp[0]
+        # Find closest match (coldest first, so ties resolve to the colder hue)
+        best_hue = table.by_temp[0]
         best_diff = float('inf')
-
-        for hct in hcts_by_temp:
-            key = (hct.hue, hct.chroma, hct.tone)
-            raw = temps.get(key, self.raw_temperature(hct))
-            rel = self._relative_temperature(hct)
-            diff = abs(rel - target_temp)
+        relative = table.relative
+        for hue in table.by_temp:
+            diff = abs(relative[hue] - target_temp)
             if diff < best_diff:
                 best_diff = diff
-                best_hct = hct
+                best_hue = hue
 
-        self._complement = best_hct
-        return best_hct
+        self._complement = table.hcts[best_hue]
+        return self._complement
 
     def analogous(self, count: int | None = None, divisions: int | None = None) -> list[Hct]:
         """
@@ -954,18 +1168,19 @@ class TemperatureCache:
         if divisions is None:
             divisions = 12
 
-        hcts_by_hue = self._get_hcts_by_hue()
+        table = self._table()
+        hcts_by_hue = table.hcts
+        relative = table.relative
         start_hue = round(self.input.hue) % 360
         start_hct = hcts_by_hue[start_hue]
 
         # Calculate total absolute temperature delta around the color wheel
-        last_temp = self._relative_temperature(start_hct)
+        last_temp = relative[start_hue]
         absolute_total_temp_delta = 0.0
 
         for i in range(360):
             hue = (start_hue + i) % 360
-            hct = hcts_by_hue[hue]
-            temp = self._relative_temperature(hct)
+            temp = relative[hue]
             temp_delta = abs(temp - last_temp)
             last_temp = temp
             absolute_total_temp_delta += temp_delta
@@ -974,13 +1189,13 @@ class TemperatureCache:
         temp_step = absolute_total_temp_delta / divisions
         all_colors: list[Hct] = [start_hct]
         total_temp_delta = 0.0
-        last_temp = self._relative_temperature(start_hct)
+        last_temp = relative[start_hue]
         hue_addend = 1
 
         while len(all_colors) < divisions and hue_addend <= 360:
             hue = (start_hue + hue_addend) % 360
             hct = hcts_by_hue[hue]
-            temp = self._relative_temperature(hct)
+            temp = relative[hue]
             temp_delta = abs(temp - last_temp)
             total_temp_delta += temp_delta
 
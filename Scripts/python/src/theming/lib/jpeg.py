@@ -0,0 +1,1384 @@
+"""
+Baseline and progressive JPEG decoding.
+
+A pure-Python JPEG decoder producing the same samples as libjpeg-turbo does
+inside ImageMagick's `magick` command:
+
+- Huffman-coded baseline (SOF0), extended sequential (SOF1) and progressive
+  (SOF2) frames, with restart intervals and any number of scans
+- ImageMagick's default float IDCT (JDCT_FLOAT) or libjpeg's default
+  integer IDCT (JDCT_ISLOW)
+- libjpeg "fancy" chroma upsampling (h2v1, h1v2, h2v2 triangle filters)
+- libjpeg's table-driven YCbCr -> RGB conversion
+- Optional DCT-domain downscaling by 1/2, 1/4 or 1/8 for cheap previews,
+  with libjpeg's reduced IDCTs (jidctred.c) sized per component, so
+  subsampled chroma is scaled in the IDCT instead of being upsampled
+
+Arithmetic coding, lossless, 12-bit and CMYK/YCCK files raise
+JpegUnsupportedError so callers can fall back to ImageMagick.
+
+"""
+
+import re
+import struct
+from array import array
+from operator import itemgetter
+from typing import BinaryIO, Iterator, Optional
+
+# Zigzag index -> natural (row-major) index, padded like libjpeg's
+# jpeg_natural_order so corrupt run lengths cannot index past the block
+ZIGZAG = [
+    0, 1, 8, 16, 9, 2, 3, 10,
+    17, 24, 32, 25, 18, 11, 4, 5,
+    12, 19, 26, 33, 40, 48, 41, 34,
+    27, 20, 13, 6, 7, 14, 21, 28,
+    35, 42, 49, 56, 57, 50, 43, 36,
+    29, 22, 15, 23, 30, 37, 44, 51,
+    58, 59, 52, 45, 38, 31, 39, 46,
+    53, 60, 61, 54, 47, 55, 62, 63,
+] + [63] * 16
+
+# Frame types decoded here (Huffman coding only)
+_SOF_BASELINE = 0xC0
+_SOF_EXTENDED = 0xC1
+_SOF_PROGRESSIVE = 0xC2
+_SOF_UNSUPPORTED = {0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+_RST_SPLIT = re.compile(b"\xff[\xd0-\xd7]")
+
+# Blocks per vectorized float IDCT call
+_IDCT_BATCH = 256
+
+# libjpeg sample_range_limit indexed by (int value & 1023) where value
+# already includes the +128 level shift (float IDCT) - see jdmaster.c
+_RANGE_LIMIT = [min(i, 255) if i < 640 else 0 for i in range(1024)]
+# IDCT_range_limit for the integer IDCT (table offset by CENTERJSAMPLE)
+_IDCT_RANGE_LIMIT = [_RANGE_LIMIT[(i + 128) & 1023] for i in range(1024)]
+
+# jddctmgr.c AAN scale factors for the float IDCT
+_AAN_SCALE = [1.0, 1.387039845, 1.306562965, 1.175875602, 1.0, 0.785694958, 0.541196100, 0.275899379]
+
+# Float IDCT constants (FAST_FLOAT literals in jidctflt.c, as float32)
+_F32 = struct.Struct("f")
+
+
+def _f32(value: float) -> float:
+    return _F32.unpack(_F32.pack(value))[0]
+
+
+def _float32_vector(values: list) -> array:
+    """Round a list of doubles to float32."""
+    return array("f", values)
+
+
+_FC4 = _f32(1.414213562)
+_FC2 = _f32(1.847759065)
+_FC2MC6 = _f32(1.082392200)
+_FC2PC6 = _f32(2.613125930)
+
+# Integer IDCT constants (jidctint.c, CONST_BITS = 13)
+_FIX_0_298631336 = 2446
+_FIX_0_390180644 = 3196
+_FIX_0_541196100 = 4433
+_FIX_0_765366865 = 6270
+_FIX_0_899976223 = 7373
+_FIX_1_175875602 = 9633
+_FIX_1_501321110 = 12299
+_FIX_1_847759065 = 15137
+_FIX_1_961570560 = 16069
+_FIX_2_053119869 = 16819
+_FIX_2_562915447 = 20995
+_FIX_3_072711026 = 25172
+
+
+class JpegError(ValueError):
+    """Raised for malformed JPEG data."""
+    pass
+
+
+class JpegUnsupportedError(JpegError):
+    """Raised for valid JPEG features this decoder does not implement."""
+    pass
+
+
+def _build_huffman_lut(counts: bytes, symbols: bytes) -> list[int]:
+    """
+    Build a 16-bit lookup table for a Huffman table.
+
+    Each entry is (code_length << 8) | symbol for the code that prefixes the
+    16-bit index; 0 marks an invalid code.
+    """
+    lut = [0] * 65536
+    code = 0
+    k = 0
+    for length in range(1, 17):
+        for _ in range(counts[length - 1]):
+            if k >= len(symbols):
+                raise JpegError("Corrupt Huffman table")
+            shift = 16 - length
+            start = code << shift
+            end = (code + 1) << shift
+            if end > 65536:
+                raise JpegError("Corrupt Huffman table")
+            lut[start:end] = [(length << 8) | symbols[k]] * (end - start)
+            code += 1
+            k += 1
+        code <<= 1
+    return lut
+
+
+# YCbCr -> RGB tables (jdcolor.c build_ycc_rgb_table, SCALEBITS = 16)
+def _fix(x: float) -> int:
+    return int(x * 65536 + 0.5)
+
+
+_CR_R = [(_fix(1.40200) * (i - 128) + 32768) >> 16 for i in range(256)]
+_CB_B = [(_fix(1.77200) * (i - 128) + 32768) >> 16 for i in range(256)]
+_CR_G = [-_fix(0.71414) * (i - 128) for i in range(256)]
+_CB_G = [-_fix(0.34414) * (i - 128) + 32768 for i in range(256)]
+# range_limit[] for color conversion results, offset by 256 (valid for -256..511)
+_CLAMP = [0] * 256 + list(range(256)) + [255] * 256
+
+_G_TABLE: Optional[list[int]] = None
+
+
+def _green_table() -> list[int]:
+    """Lazily built (Cb << 8 | Cr) -> green offset table."""
+    global _G_TABLE
+    if _G_TABLE is None:
+        _G_TABLE = [(cbg + crg) >> 16 for cbg in _CB_G for crg in _CR_G]
+    return _G_TABLE
+
+
+def jpeg_dimensions(f: BinaryIO) -> tuple[int, int]:
+    """
+    Read (width, height) from a JPEG file's frame header.
+
+    Only the marker segments before the first SOFn are read, so the cost
+    does not depend on the image size. Raises JpegError if no frame header
+    is found.
+    """
+    if f.read(2) != b"\xff\xd8":
+        raise JpegError("Not a JPEG file")
+    while True:
+        byte = f.read(1)
+        if not byte:
+            raise JpegError("Missing SOF marker")
+        if byte != b"\xff":
+            continue
+        marker = f.read(1)
+        while marker == b"\xff":
+            # Fill bytes before a marker
+            marker = f.read(1)
+        if not marker:
+            raise JpegError("Missing SOF marker")
+        code = marker[0]
+        if code in (0x00, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        if code in (0xD9, 0xDA):
+            raise JpegError("Missing SOF marker")
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            raise JpegError("Truncated JPEG segment")
+        length = (length_bytes[0] << 8) | length_bytes[1]
+        if length < 2:
+            raise JpegError("Invalid JPEG segment length")
+        if code in (_SOF_BASELINE, _SOF_EXTENDED, _SOF_PROGRESSIVE) or code in _SOF_UNSUPPORTED:
+            sof = f.read(5)
+            if len(sof) < 5:
+                raise JpegError("Truncated SOF segment")
+            return (sof[3] << 8) | sof[4], (sof[1] << 8) | sof[2]
+        f.seek(length - 2, 1)
+
+
+class _Component:
+    __slots__ = (
+        "cid", "h", "v", "tq", "dc_lut", "ac_lut", "pred", "block",
+        "width", "height", "blocks_w", "blocks_h", "padded_w", "padded_h",
+        "coeffs", "coef_bits", "plane", "plane_stride",
+    )
+
+    def __init__(self, cid: int, h: int, v: int, tq: int):
+        self.cid = cid
+        self.h = h
+        self.v = v
+        self.tq = tq
+        self.dc_lut: Optional[list[int]] = None
+        self.ac_lut: Optional[list[int]] = None
+        self.pred = 0
+        # IDCT output size (8, or less for scaled decodes)
+        self.block = 8
+        self.coeffs: Optional[array] = None
+        self.coef_bits = [-1] * 64
+        self.plane: Optional[bytearray] = None
+        self.plane_stride = 0
+
+
+class JpegDecoder:
+    """
+    Decode a JPEG file held in memory.
+
+    Usage:
+        decoder = JpegDecoder(data)
+        for row in decoder.rows():   # 8-bit samples, decoder.channels per pixel
+            ...
+
+    Attributes (available after construction):
+        width, height: Full image size
+        channels: 1 for grayscale, 3 for RGB output
+        progressive: True for SOF2 files
+
+    output_width and output_height are set by rows().
+    """
+
+    def __init__(self, data: bytes, dct_method: str = "float"):
+        if data[:2] != b"\xff\xd8":
+            raise JpegError("Invalid JPEG signature")
+        if dct_method not in ("float", "islow"):
+            raise ValueError(f"Unknown DCT method: {dct_method}")
+
+        self._data = data
+        self.dct_method = dct_method
+        self.width = 0
+        self.height = 0
+        self.channels = 0
+        self.progressive = False
+        # False when libjpeg would apply progressive block smoothing, which
+        # this decoder does not reproduce
+        self.exact = True
+
+        self._components: list[_Component] = []
+        self._qt: list[Optional[list[int]]] = [None] * 4
+        self._dc_luts: list[Optional[list[int]]] = [None] * 4
+        self._ac_luts: list[Optional[list[int]]] = [None] * 4
+        self._restart_interval = 0
+        self._adobe_transform: Optional[int] = None
+        self._jfif = False
+        self._hmax = 1
+        self._vmax = 1
+        self._mcux = 0
+        self._mcuy = 0
+        self._scan_offset = 2
+        # Blocks waiting for the batched float IDCT
+        self._pending: list[tuple] = []
+        self.output_width = 0
+        self.output_height = 0
+
+        self._read_header()
+
+    # --- Marker parsing ---
+
+    def _segments(self, pos: int) -> Iterator[tuple[int, int, int]]:
+        """Yield (marker, payload_start, payload_end) for marker segments."""
+        data = self._data
+        size = len(data)
+        while pos < size:
+            if data[pos] != 0xFF:
+                raise JpegError(f"Expected marker at offset {pos}")
+            while pos < size and data[pos] == 0xFF:
+                pos += 1
+            if pos >= size:
+                break
+            marker = data[pos]
+            pos += 1
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                continue
+            if marker == 0xD9:
+                yield marker, pos, pos
+                return
+            if pos + 2 > size:
+                raise JpegError("Truncated JPEG segment")
+            length = (data[pos] << 8) | data[pos + 1]
+            if length < 2:
+                raise JpegError("Invalid JPEG segment length")
+            start = pos + 2
+            end = pos + length
+            if end > size:
+                raise JpegError("Truncated JPEG segment")
+            yield marker, start, end
+            pos = end
+            if marker == 0xDA:
+                pos = self._skip_entropy_data(pos)
+
+    def _skip_entropy_data(self, pos: int) -> int:
+        """Return the offset of the first marker after entropy-coded data."""
+        data = self._data
+        size = len(data)
+        while True:
+            pos = data.find(b"\xff", pos)
+            if pos < 0 or pos + 1 >= size:
+                return size
+            nxt = data[pos + 1]
+            if nxt == 0x00 or 0xD0 <= nxt <= 0xD7 or nxt == 0xFF:
+                pos += 1 if nxt == 0xFF else 2
+                continue
+            return pos
+
+    def _read_header(self):
+        """Parse markers up to the first scan to learn the frame geometry."""
+        for marker, start, end in self._segments(2):
+            if marker == 0xDA or marker == 0xD9:
+                # Decoding resumes at this marker (FF DA + 2 length bytes)
+                self._scan_offset = start - 4
+                break
+            self._handle_segment(marker, start, end)
+        if not self._components:
+            raise JpegError("Missing SOF marker")
+
+    def _handle_segment(self, marker: int, start: int, end: int):
+        data = self._data
+        if marker in (_SOF_BASELINE, _SOF_EXTENDED, _SOF_PROGRESSIVE):
+            if self._components:
+                raise JpegError("Multiple SOF markers")
+            self._read_sof(marker, start, end)
+        elif marker in _SOF_UNSUPPORTED:
+            raise JpegUnsupportedError(f"Unsupported JPEG frame type SOF{marker - 0xC0}")
+        elif marker == 0xC4:
+            self._read_dht(start, end)
+        elif marker == 0xDB:
+            self._read_dqt(start, end)
+        elif marker == 0xDD:
+            self._restart_interval = (data[start] << 8) | data[start + 1]
+        elif marker == 0xE0:
+            if data[start:start + 5] == b"JFIF\x00":
+                self._jfif = True
+        elif marker == 0xEE:
+            if data[start:start + 5] == b"Adobe" and end - start >= 12:
+                self._adobe_transform = data[start + 11]
+        elif marker == 0xCC:
+            raise JpegUnsupportedError("Arithmetic coding is not supported")
+
+    def _read_sof(self, marker: int, start: int, end: int):
+        data = self._data
+        precision = data[start]
+        if precision != 8:
+            raise JpegUnsupportedError(f"Unsupported JPEG precision: {precision}")
+        self.height = (data[start + 1] << 8) | data[start + 2]
+        self.width = (data[start + 3] << 8) | data[start + 4]
+        count = data[start + 5]
+        if self.width == 0 or self.height == 0:
+            raise JpegUnsupportedError("JPEG with DNL-defined height is not supported")
+        if count not in (1, 3):
+            raise JpegUnsupportedError(f"Unsupported JPEG component count: {count}")
+        if start + 6 + count * 3 > end:
+            raise JpegError("Truncated SOF segment")
+
+        for i in range(count):
+            pos = start + 6 + i * 3
+            hv = data[pos + 1]
+            h, v = hv >> 4, hv & 15
+            if not (1 <= h <= 4 and 1 <= v <= 4):
+                raise JpegError("Invalid sampling factors")
+            self._components.append(_Component(data[pos], h, v, data[pos + 2]))
+
+        self.progressive = marker == _SOF_PROGRESSIVE
+        self.channels = 1 if count == 1 else 3
+        self._hmax = max(c.h for c in self._components)
+        self._vmax = max(c.v for c in self._components)
+        self._mcux = -(-self.width // (8 * self._hmax))
+        self._mcuy = -(-self.height // (8 * self._vmax))
+        for c in self._components:
+            c.width = -(-self.width * c.h // self._hmax)
+            c.height = -(-self.height * c.v // self._vmax)
+            c.blocks_w = -(-c.width // 8)
+            c.blocks_h = -(-c.height // 8)
+            c.padded_w = self._mcux * c.h
+            c.padded_h = self._mcuy * c.v
+
+    def _read_dht(self, start: int, end: int):
+        data = self._data
+        pos = start
+        while pos < end:
+            info = data[pos]
+            counts = data[pos + 1:pos + 17]
+            total = sum(counts)
+            symbols = data[pos + 17:pos + 17 + total]
+            if len(counts) < 16 or len(symbols) < total:
+                raise JpegError("Truncated DHT segment")
+            lut = _build_huffman_lut(counts, symbols)
+            index = info & 15
+            if index > 3:
+                raise JpegError("Invalid Huffman table index")
+            if info >> 4:
+                self._ac_luts[index] = lut
+            else:
+                self._dc_luts[index] = lut
+            pos += 17 + total
+
+    def _read_dqt(self, start: int, end: int):
+        data = self._data
+        pos = start
+        while pos < end:
+            info = data[pos]
+            index = info & 15
+            if index > 3:
+                raise JpegError("Invalid quantization table index")
+            table = [0] * 64
+            if info >> 4:
+                for k in range(64):
+                    table[ZIGZAG[k]] = (data[pos + 1 + 2 * k] << 8) | data[pos + 2 + 2 * k]
+                pos += 129
+            else:
+                for k in range(64):
+                    table[ZIGZAG[k]] = data[pos + 1 + k]
+                pos += 65
+            self._qt[index] = table
+
+    def _is_rgb(self) -> bool:
+        """Whether 3-component data is stored as RGB rather than YCbCr (jdapimin.c)."""
+        if self._jfif:
+            return False
+        if self._adobe_transform is not None:
+            return self._adobe_transform == 0
+        ids = tuple(c.cid for c in self._components)
+        return ids == (0x52, 0x47, 0x42)
+
+    # --- Decoding ---
+
+    def rows(self, scale: int = 1) -> Iterator[list[int]]:
+        """
+        Decode the image and yield output rows of 8-bit samples.
+
+        Args:
+            scale: DCT scaling denominator (1, 2, 4 or 8); the output is
+                ceil(width / scale) x ceil(height / scale)
+        """
+        if scale not in (1, 2, 4, 8):
+            raise ValueError(f"Unsupported JPEG scale: 1/{scale}")
+        block = 8 // scale
+        self.output_width = -(-self.width // scale)
+        self.output_height = -(-self.height // scale)
+        self._prepare(block)
+
+        scan_count = 0
+        for marker, start, end in self._segments(self._scan_offset):
+            if marker == 0xD9:
+                break
+            if marker == 0xDA:
+                entropy_end = self._skip_entropy_data(end)
+                self._decode_scan(start, end, entropy_end)
+                scan_count += 1
+            else:
+                self._handle_segment(marker, start, end)
+        if scan_count == 0:
+            raise JpegError("Missing scan data")
+
+        if self.progressive:
+            self._check_smoothing()
+            for c in self._components:
+                self._coefficients_to_plane(c)
+                c.coeffs = None
+
+        return self._output_rows(block)
+
+    def _prepare(self, block: int):
+        for c in self._components:
+            c.pred = 0
+            c.coef_bits = [-1] * 64
+            if self.progressive:
+                c.coeffs = array("h", bytes(2 * 64 * c.padded_w * c.padded_h))
+            c.block = self._component_block(c, block)
+            c.plane_stride = c.padded_w * c.block
+            c.plane = bytearray(c.plane_stride * c.padded_h * c.block)
+
+    def _component_block(self, comp: _Component, block: int) -> int:
+        """
+        IDCT output size of a component when luma blocks decode to `block`.
+
+        As in jdmaster.c, subsampled components get a larger IDCT (up to 8)
+        so they come out at or nearer the output size instead of being
+        upsampled afterwards.
+        """
+        size = block
+        while (size < 8
+               and (self._hmax * block) % (comp.h * size * 2) == 0
+               and (self._vmax * block) % (comp.v * size * 2) == 0):
+            size *= 2
+        return size
+
+    def _dequant_table(self, component: _Component) -> list:
+        table = self._qt[component.tq]
+        if table is None:
+            raise JpegError("Missing quantization table")
+        if self.dct_method == "float":
+            # jddctmgr.c: quantval * aanscale[row] * aanscale[col] * 0.125, as float
+            return [
+                _f32(table[i] * _AAN_SCALE[i >> 3] * _AAN_SCALE[i & 7] * 0.125)
+                for i in range(64)
+            ]
+        return table
+
+    def _decode_scan(self, header_start: int, header_end: int, entropy_end: int):
+        data = self._data
+        count = data[header_start]
+        if header_start + 1 + 2 * count + 3 > header_end:
+            raise JpegError("Truncated SOS segment")
+        by_id = {c.cid: c for c in self._components}
+        comps = []
+        for i in range(count):
+            cid = data[header_start + 1 + 2 * i]
+            tables = data[header_start + 2 + 2 * i]
+            comp = by_id.get(cid)
+            if comp is None:
+                raise JpegError("Scan references unknown component")
+            comp.dc_lut = self._dc_luts[tables >> 4]
+            comp.ac_lut = self._ac_luts[tables & 15]
+            comps.append(comp)
+        pos = header_start + 1 + 2 * count
+        ss, se, a = data[pos], data[pos + 1], data[pos + 2]
+        ah, al = a >> 4, a & 15
+
+        if not self.progressive:
+            ss, se, ah, al = 0, 63, 0, 0
+        elif ss > se or se > 63 or (ss == 0 and se != 0) or (ss > 0 and count != 1):
+            raise JpegError("Invalid progressive scan parameters")
+
+        for comp in comps:
+            if ss == 0 and comp.dc_lut is None and ah == 0:
+                raise JpegError("Missing DC Huffman table")
+            if se > 0 and comp.ac_lut is None:
+                raise JpegError("Missing AC Huffman table")
+            comp.pred = 0
+            for k in range(ss, se + 1):
+                comp.coef_bits[k] = al
+
+        # Split entropy-coded data on restart markers and remove byte stuffing
+        segment = data[header_end:entropy_end]
+        intervals = [part.replace(b"\xff\x00", b"\xff") for part in _RST_SPLIT.split(segment)]
+
+        if count == 1:
+            comp = comps[0]
+            units = [(comp, [(0, 0)])]
+            mcus_w, mcus_h = comp.blocks_w, comp.blocks_h
+        else:
+            units = [(c, [(by, bx) for by in range(c.v) for bx in range(c.h)]) for c in comps]
+            mcus_w, mcus_h = self._mcux, self._mcuy
+
+        total_mcus = mcus_w * mcus_h
+        interval_mcus = self._restart_interval or total_mcus
+        if self.progressive:
+            if ss == 0:
+                decode = self._decode_dc_first if ah == 0 else self._decode_dc_refine
+            else:
+                decode = self._decode_ac_first if ah == 0 else self._decode_ac_refine
+            decode_args = (ss, se, al)
+        else:
+            decode = self._decode_baseline
+            decode_args = ()
+
+        mcu = 0
+        for interval in intervals:
+            if mcu >= total_mcus:
+                break
+            for comp in comps:
+                comp.pred = 0
+            count_here = min(interval_mcus, total_mcus - mcu)
+            decode(interval, units, mcu, count_here, mcus_w, count == 1, *decode_args)
+            mcu += count_here
+        self._flush_idct()
+
+    def _block_positions(self, units, mcu: int, count: int, mcus_w: int, single: bool):
+        """Yield (component, block_row, block_col) for each block of each MCU."""
+        for m in range(mcu, mcu + count):
+            my, mx = divmod(m, mcus_w)
+            for comp, offsets in units:
+                if single:
+                    yield comp, my, mx
+                else:
+                    for by, bx in offsets:
+                        yield comp, my * comp.v + by, mx * comp.h + bx
+
+    def _decode_baseline(self, buf: bytes, units, mcu: int, count: int, mcus_w: int, single: bool):
+        """Decode sequential Huffman MCUs and IDCT each block into its plane."""
+        buf = buf + b"\x00" * 8
+        size = len(buf)
+        pos = 0
+        bitbuf = 0
+        bitcnt = 0
+        zigzag = ZIGZAG
+        qtables = {}
+        idct = self._idct_block
+
+        for comp, row, col in self._block_positions(units, mcu, count, mcus_w, single):
+            dc_lut = comp.dc_lut
+            ac_lut = comp.ac_lut
+            coef = [0] * 64
+
+            # DC coefficient
+            if bitcnt < 16:
+                while bitcnt <= 24:
+                    bitbuf = ((bitbuf << 8) | (buf[pos] if pos < size else 0)) & 0xFFFFFFFF
+                    pos += 1
+                    bitcnt += 8
+            entry = dc_lut[(bitbuf >> (bitcnt - 16)) & 0xFFFF]
+            if not entry:
+                raise JpegError("Corrupt JPEG data: bad Huffman code")
+            bitcnt -= entry >> 8
+            s = entry & 0xFF
+            if s:
+                if bitcnt < s:
+                    while bitcnt <= 24:
+                        bitbuf = ((bitbuf << 8) | (buf[pos] if pos < size else 0)) & 0xFFFFFFFF
+                        pos += 1
+                        bitcnt += 8
+                v = (bitbuf >> (bitcnt - s)) & ((1 << s) - 1)
+                bitcnt -= s
+                if v < (1 << (s - 1)):
+                    v += (-1 << s) + 1
+                comp.pred += v
+            coef[0] = comp.pred
+
+            # AC coefficients
+            k = 1
+            while k < 64:
+                if bitcnt < 16:
+                    while bitcnt <= 24:
+                        bitbuf = ((bitbuf << 8) | (buf[pos] if pos < size else 0)) & 0xFFFFFFFF
+                        pos += 1
+                        bitcnt += 8
+                entry = ac_lut[(bitbuf >> (bitcnt - 16)) & 0xFFFF]
+                if not entry:
+                    raise JpegError("Corrupt JPEG data: bad Huffman code")
+                bitcnt -= entry >> 8
+                rs = entry & 0xFF
+                s = rs & 15
+                if s:
+                    k += rs >> 4
+                    if bitcnt < s:
+                        while bitcnt <= 24:
+                            bitbuf = ((bitbuf << 8) | (buf[pos] if pos < size else 0)) & 0xFFFFFFFF
+                            pos += 1
+                            bitcnt += 8
+                    v = (bitbuf >> (bitcnt - s)) & ((1 << s) - 1)
+                    bitcnt -= s
+                    if v < (1 << (s - 1)):
+                        v += (-1 << s) + 1
+                    coef[zigzag[k]] = v
+                    k += 1
+                elif rs == 0xF0:
+                    k += 16
+                else:
+                    break
+
+            if row < comp.padded_h and col < comp.padded_w:
+                qt = qtables.get(comp.tq)
+                if qt is None:
+                    qt = qtables[comp.tq] = self._dequant_table(comp)
+                idct(coef, qt, comp, row, col)
+
+    def _decode_dc_first(self, buf, units, mcu, count, mcus_w, single, ss, se, al):
+        buf = buf + b"\x00" * 8
+        size = len(buf)
+        pos = 0
+        bitbuf = 0
+        bitcnt = 0
+        for comp, row, col in self._block_positions(units, mcu, count, mcus_w, single):
+            if bitcnt < 16:
+                while bitcnt <= 24:
+                    bitbuf = ((bitbuf << 8) | (buf[pos] if pos < size else 0)) & 0xFFFFFFFF
+                    pos += 1
+                    bitcnt += 8
+            entry = comp.dc_lut[(bitbuf >> (bitcnt - 16)) & 0xFFFF]
+            if not entry:
+                raise JpegError("Corrupt JPEG data: bad Huffman code")
+            bitcnt -= entry >> 8
+            s = entry & 0xFF
+            if s:
+                if bitcnt < s:
+                    while bitcnt <= 24:
+                        bitbuf = ((bitbuf << 8) | (buf[pos] if pos < size else 0)) & 0xFFFFFFFF
+                        pos += 1
+                        bitcnt += 8
+                v = (bitbuf >> (bitcnt - s)) & ((1 << s) - 1)
+                bitcnt -= s
+                if v < (1 << (s - 1)):
+                    v += (-1 << s) + 1
+                comp.pred += v
+            if row < comp.padded_h and col < comp.padded_w:
+                comp.coeffs[(row * comp.padded_w + col) * 64] = comp.pred << al
+
+    def _decode_dc_refine(self, buf, units, mcu, count, mcus_w, single, ss, se, al):
+        buf = buf + b"\x00" * 8
+        size = len(buf)
+        pos = 0
+        bitbuf = 0
+        bitcnt = 0
+        p1 = 1 << al
+        for comp, row, col in self._block_positions(units, mcu, count, mcus_w, single):
+            if bitcnt < 1:
+                while bitcnt <= 24:
+                    bitbuf = ((bitbuf << 8) | (buf[pos] if pos < size else 0)) & 0xFFFFFFFF
+                    pos += 1
+                    bitcnt += 8
+            bitcnt -= 1
+            if (bitbuf >> bitcnt) & 1 and row < comp.padded_h and col < comp.padded_w:
+                comp.coeffs[(row * comp.padded_w + col) * 64] |= p1
+
+    def _decode_ac_first(self, buf, units, mcu, count, mcus_w, single, ss, se, al):
+        buf = buf + b"\x00" * 8
+        size = len(buf)
+        pos = 0
+        bitbuf = 0
+        bitcnt = 0
+        eobrun = 0
+        zigzag = ZIGZAG
+        for comp, row, col in self._block_positions(units, mcu, count, mcus_w, single):
+            if eobrun > 0:
+                eobrun -= 1
+                continue
+            coeffs = comp.coeffs
+            base = (row * comp.padded_w + col) * 64
+            ac_lut = comp.ac_lut
+            k = ss
+            while k <= se:
+                if bitcnt < 16:
+                    while bitcnt <= 24:
+                        bitbuf = ((bitbuf << 8) | (buf[pos] if pos < size else 0)) & 0xFFFFFFFF
+                        pos += 1
+                        bitcnt += 8
+                entry = ac_lut[(bitbuf >> (bitcnt - 16)) & 0xFFFF]
+                if not entry:
+                    raise JpegError("Corrupt JPEG data: bad Huffman code")
+                bitcnt -= entry >> 8
+                rs = entry & 0xFF
+                r = rs >> 4
+                s = rs & 15
+                if s:
+                    k += r
+                    if bitcnt < s:
+                        while bitcnt <= 24:
+                            bitbuf = ((bitbuf << 8) | (buf[pos] if pos < size else 0)) & 0xFFFFFFFF
+                            pos += 1
+                            bitcnt += 8
+                    v = (bitbuf >> (bitcnt - s)) & ((1 << s) - 1)
+                    bitcnt -= s
+                    if v < (1 << (s - 1)):
+                        v += (-1 << s) + 1
+                    coeffs[base + zigzag[k]] = v << al
+                elif r == 15:
+                    k += 15
+                else:
+                    eobrun = 1 << r
+                    if r:
+                        if bitcnt < r:
+                            while bitcnt <= 24:
+                                bitbuf = ((bitbuf << 8) | (buf[pos] if pos < size else 0)) & 0xFFFFFFFF
+                                pos += 1
+                                bitcnt += 8
+                        eobrun += (bitbuf >> (bitcnt - r)) & ((1 << r) - 1)
+                        bitcnt -= r
+                    eobrun -= 1
+                    break
+                k += 1
+
+    def _decode_ac_refine(self, buf, units, mcu, count, mcus_w, single, ss, se, al):
+        """Successive approximation AC refinement (jdphuff.c decode_mcu_AC_refine)."""
+        buf = buf + b"\x00" * 8
+        size = len(buf)
+        pos = 0
+        bitbuf = 0
+        bitcnt = 0
+        eobrun = 0
+        zigzag = ZIGZAG
+        p1 = 1 << al
+        m1 = -1 << al
+        for comp, row, col in self._block_positions(units, mcu, count, mcus_w, single):
+            coeffs = comp.coeffs
+            base = (row * comp.padded_w + col) * 64
+            ac_lut = comp.ac_lut
+            k = ss
+            if eobrun == 0:
+                while k <= se:
+                    if bitcnt < 16:
+                        while bitcnt <= 24:
+                            bitbuf = ((bitbuf << 8) | (buf[pos] if pos < size else 0)) & 0xFFFFFFFF
+                            pos += 1
+                            bitcnt += 8
+                    entry = ac_lut[(bitbuf >> (bitcnt - 16)) & 0xFFFF]
+                    if not entry:
+                        raise JpegError("Corrupt JPEG data: bad Huffman code")
+                    bitcnt -= entry >> 8
+                    rs = entry & 0xFF
+                    r = rs >> 4
+                    s = rs & 15
+                    if s:
+                        if bitcnt < 1:
+                            while bitcnt <= 24:
+                                bitbuf = ((bitbuf << 8) | (buf[pos] if pos < size else 0)) & 0xFFFFFFFF
+                                pos += 1
+                                bitcnt += 8
+                        bitcnt -= 1
+                        s = p1 if (bitbuf >> bitcnt) & 1 else m1
+                    elif r != 15:
+                        eobrun = 1 << r
+                        if r:
+                            if bitcnt < r:
+                                while bitcnt <= 24:
+                                    bitbuf = ((bitbuf << 8) | (buf[pos] if pos < size else 0)) & 0xFFFFFFFF
+                                    pos += 1
+                                    bitcnt += 8
+                            eobrun += (bitbuf >> (bitcnt - r)) & ((1 << r) - 1)
+                            bitcnt -= r
+                        break
+
+                    # Advance over already-nonzero coefficients and r zero
+                    # coefficients, appending correction bits to the nonzeroes
+                    while k <= se:
+                        index = base + zigzag[k]
+                        value = coeffs[index]
+                        if value:
+                            if bitcnt < 1:
+                                while bitcnt <= 24:
+                                    bitbuf = ((bitbuf << 8) | (buf[pos] if pos < size else 0)) & 0xFFFFFFFF
+                                    pos += 1
+                                    bitcnt += 8
+                            bitcnt -= 1
+                            if (bitbuf >> bitcnt) & 1 and not (value & p1):
+                                coeffs[index] = value + (p1 if value >= 0 else m1)
+                        else:
+                            r -= 1
+                            if r < 0:
+                                break
+                        k += 1
+                    if s:
+                        coeffs[base + zigzag[k]] = s
+                    k += 1
+
+            if eobrun > 0:
+                # Correction bits for the rest of the band after end-of-band
+                while k <= se:
+                    index = base + zigzag[k]
+                    value = coeffs[index]
+                    if value:
+                        if bitcnt < 1:
+                            while bitcnt <= 24:
+                                bitbuf = ((bitbuf << 8) | (buf[pos] if pos < size else 0)) & 0xFFFFFFFF
+                                pos += 1
+                                bitcnt += 8
+                        bitcnt -= 1
+                        if (bitbuf >> bitcnt) & 1 and not (value & p1):
+                            coeffs[index] = value + (p1 if value >= 0 else m1)
+                    k += 1
+                eobrun -= 1
+
+    def _check_smoothing(self):
+        """
+        Detect files where libjpeg would apply interblock smoothing
+        (jdcoefct.c smoothing_ok): some low-order AC coefficients were
+        never fully refined.
+        """
+        for c in self._components:
+            if c.coef_bits[0] < 0:
+                raise JpegError("Progressive JPEG is missing DC data")
+            if any(bits != 0 for bits in c.coef_bits[1:10]):
+                self.exact = False
+
+    def _coefficients_to_plane(self, comp: _Component):
+        qt = self._dequant_table(comp)
+        coeffs = comp.coeffs
+        idct = self._idct_block
+        for row in range(comp.padded_h):
+            for col in range(comp.padded_w):
+                base = (row * comp.padded_w + col) * 64
+                idct(coeffs[base:base + 64].tolist(), qt, comp, row, col)
+        self._flush_idct()
+
+    # --- IDCT ---
+
+    def _idct_block(self, coef: list[int], qt: list, comp: _Component, row: int, col: int):
+        """Inverse DCT one block and store it in the component plane."""
+        block = comp.block
+        if block == 8:
+            if self.dct_method == "float":
+                if any(coef[1:]):
+                    # Batched; written to the plane by _flush_idct()
+                    self._pending.append((comp, qt, row, col, coef))
+                    if len(self._pending) >= _IDCT_BATCH:
+                        self._flush_idct()
+                    return
+                samples = _idct_float_dc(coef[0], qt[0])
+            else:
+                samples = _idct_islow(coef, qt)
+        elif block == 1:
+            # jpeg_idct_1x1: DC only
+            samples = [_IDCT_RANGE_LIMIT[((coef[0] * self._qt[comp.tq][0] + 4) >> 3) & 1023]]
+        elif block == 4:
+            samples = _idct_4x4(coef, self._qt[comp.tq])
+        else:
+            samples = _idct_2x2(coef, self._qt[comp.tq])
+
+        self._store_block(comp, row, col, samples, block)
+
+    def _flush_idct(self):
+        """Run the float IDCT over all pending blocks, one batch per table."""
+        pending = self._pending
+        self._pending = []
+        groups: dict[int, list] = {}
+        for item in pending:
+            groups.setdefault(id(item[1]), []).append(item)
+        for items in groups.values():
+            coefs: list[int] = []
+            for item in items:
+                coefs.extend(item[4])
+            samples = _idct_float_batch(coefs, items[0][1], len(items))
+            for i, (comp, _, row, col, _) in enumerate(items):
+                self._store_block(comp, row, col, samples[i * 64:i * 64 + 64], 8)
+
+    @staticmethod
+    def _store_block(comp: _Component, row: int, col: int, samples: list[int], block: int):
+        plane = comp.plane
+        stride = comp.plane_stride
+        offset = row * block * stride + col * block
+        for y in range(block):
+            start = y * block
+            plane[offset:offset + block] = bytes(samples[start:start + block])
+            offset += stride
+
+    # --- Output ---
+
+    def _output_rows(self, block: int) -> Iterator[list[int]]:
+        out_w = self.output_width
+        out_h = self.output_height
+        fancy = block > 1
+
+        upsamplers = []
+        for c in self._components:
+            # jdmaster.c downsampled_width/height; components whose IDCT
+            # already reached the output size have an expansion of 1
+            ds_w = -(-self.width * c.h * c.block // (self._hmax * 8))
+            ds_h = -(-self.height * c.v * c.block // (self._vmax * 8))
+            h_out, h_in = self._hmax * block, c.h * c.block
+            v_out, v_in = self._vmax * block, c.v * c.block
+            upsamplers.append(_Upsampler(c.plane, c.plane_stride, ds_w, ds_h,
+                                         h_out // h_in, v_out // v_in,
+                                         h_out % h_in == 0 and v_out % v_in == 0,
+                                         fancy, out_w))
+
+        if self.channels == 1:
+            up = upsamplers[0]
+            for y in range(out_h):
+                yield up.row(y)
+            return
+
+        rgb = self._is_rgb()
+        g_table = _green_table() if not rgb else None
+        clamp = _CLAMP
+        cr_r = _CR_R
+        cb_b = _CB_B
+        for y in range(out_h):
+            r0 = upsamplers[0].row(y)
+            r1 = upsamplers[1].row(y)
+            r2 = upsamplers[2].row(y)
+            if rgb:
+                out = [0] * (out_w * 3)
+                out[0::3] = r0
+                out[1::3] = r1
+                out[2::3] = r2
+            else:
+                out = [0] * (out_w * 3)
+                out[0::3] = [clamp[yy + cr_r[cr] + 256] for yy, cr in zip(r0, r2)]
+                out[1::3] = [clamp[yy + g_table[(cb << 8) | cr] + 256] for yy, cb, cr in zip(r0, r1, r2)]
+                out[2::3] = [clamp[yy + cb_b[cb] + 256] for yy, cb in zip(r0, r1)]
+            yield out
+
+
+class _Upsampler:
+    """libjpeg upsampling of one component plane to the output size (jdsample.c)."""
+
+    def __init__(self, plane: bytearray, stride: int, ds_w: int, ds_h: int,
+                 h_expand: int, v_expand: int, integral: bool, fancy: bool, out_w: int):
+        if not integral:
+            raise JpegUnsupportedError("Fractional JPEG sampling factors are not supported")
+        self.plane = plane
+        self.stride = stride
+        self.ds_w = ds_w
+        self.ds_h = ds_h
+        self.h_expand = h_expand
+        self.v_expand = v_expand
+        self.out_w = out_w
+        self.fancy_h2 = fancy and h_expand == 2 and ds_w > 2
+        self.fancy_v2 = fancy and v_expand == 2 and (h_expand == 1 or self.fancy_h2)
+
+    def _input_row(self, i: int) -> bytearray:
+        i = min(max(i, 0), self.ds_h - 1)
+        start = i * self.stride
+        return self.plane[start:start + self.ds_w]
+
+    def row(self, y: int) -> list[int]:
+        out_w = self.out_w
+        if self.v_expand == 2 and self.fancy_v2:
+            i = y >> 1
+            near = self._input_row(i)
+            if y & 1:
+                far = self._input_row(i + 1)
+                bias_v = 2
+            else:
+                far = self._input_row(i - 1)
+                bias_v = 1
+            if self.h_expand == 1:
+                # h1v2_fancy_upsample
+                return [(3 * a + b + bias_v) >> 2 for a, b in zip(near, far)][:out_w]
+            # h2v2_fancy_upsample
+            sums = [3 * a + b for a, b in zip(near, far)]
+            return _h2_fancy(sums, 4, 8, 7)[:out_w]
+
+        src = self._input_row(y // self.v_expand)
+        if self.h_expand == 1:
+            return list(src[:out_w])
+        if self.fancy_h2:
+            # h2v1_fancy_upsample
+            return _h2_fancy(list(src), 1, 1, 2)[:out_w]
+        h = self.h_expand
+        out = []
+        for value in src:
+            out.extend([value] * h)
+        return out[:out_w]
+
+
+def _h2_fancy(sums: list[int], weight: int, bias_even: int, bias_odd: int) -> list[int]:
+    """
+    Horizontal 2x triangle upsampling shared by h2v1 and h2v2.
+
+    For h2v1 (weight 1) the inputs are samples and results are >> 2; for h2v2
+    (weight 4) the inputs are vertical column sums and results are >> 4.
+    """
+    n = len(sums)
+    out = [0] * (2 * n)
+    if weight == 1:
+        out[0] = sums[0]
+        out[1] = (sums[0] * 3 + sums[1] + bias_odd) >> 2
+        for i in range(1, n - 1):
+            v = sums[i] * 3
+            out[2 * i] = (v + sums[i - 1] + 1) >> 2
+            out[2 * i + 1] = (v + sums[i + 1] + 2) >> 2
+        out[2 * n - 2] = (sums[n - 1] * 3 + sums[n - 2] + 1) >> 2
+        out[2 * n - 1] = sums[n - 1]
+        return out
+
+    out[0] = (sums[0] * 4 + 8) >> 4
+    out[1] = (sums[0] * 3 + sums[1] + 7) >> 4
+    for i in range(1, n - 1):
+        v = sums[i] * 3
+        out[2 * i] = (v + sums[i - 1] + 8) >> 4
+        out[2 * i + 1] = (v + sums[i + 1] + 7) >> 4
+    out[2 * n - 2] = (sums[n - 1] * 3 + sums[n - 2] + 8) >> 4
+    out[2 * n - 1] = (sums[n - 1] * 4 + 7) >> 4
+    return out
+
+
+def _idct_float_dc(dc: int, q: float) -> list[int]:
+    """Float IDCT of a block with no AC coefficients (all samples equal)."""
+    return [_RANGE_LIMIT[int(_f32(_f32(dc * q) + 128.5)) & 1023]] * 64
+
+
+_GATHERS: dict[int, tuple] = {}
+
+
+def _block_gathers(count: int) -> tuple:
+    """
+    itemgetters that reorder `count` blocks for the vectorized IDCT passes.
+
+    Returns (pass 1 inputs, pass 2 inputs, output order): pass 1 vectors hold
+    coefficient row k of every block, pass 2 vectors hold column k of every
+    pass-1 result row, and the output getter restores block-major order.
+    """
+    gathers = _GATHERS.get(count)
+    if gathers is None:
+        n = 8 * count
+        rows_in = [
+            itemgetter(*[b * 64 + 8 * k + c for b in range(count) for c in range(8)])
+            for k in range(8)
+        ]
+        cols_in = [
+            itemgetter(*[r * n + b * 8 + k for b in range(count) for r in range(8)])
+            for k in range(8)
+        ]
+        out = itemgetter(*[x * n + b * 8 + r for b in range(count) for r in range(8) for x in range(8)])
+        if len(_GATHERS) >= 8:
+            _GATHERS.clear()
+        gathers = _GATHERS[count] = (rows_in, cols_in, out)
+    return gathers
+
+
+def _idct_float_batch(coefs: list[int], qt: list[float], count: int) -> list[int]:
+    """
+    jidctflt.c jpeg_idct_float (AAN algorithm) over `count` blocks.
+
+    libjpeg computes in float32. Each stage is evaluated for every column
+    (then row) of every block at once in double precision and rounded to
+    float32 through array("f"); a single +, - or * rounded that way equals
+    the float32 operation, so the output matches libjpeg exactly.
+    """
+    rows_in, cols_in, out = _block_gathers(count)
+    d = array("f", [c * q for c, q in zip(coefs, qt * count)])
+    ws = _aan_float([get(d) for get in rows_in], 0.0)
+    ws = ws[0] + ws[1] + ws[2] + ws[3] + ws[4] + ws[5] + ws[6] + ws[7]
+    result = _aan_float([get(ws) for get in cols_in], 128.5)
+    result = result[0] + result[1] + result[2] + result[3] + result[4] + result[5] + result[6] + result[7]
+    limit = _RANGE_LIMIT
+    return [limit[int(v) & 1023] for v in out(result)]
+
+
+def _aan_float(v: list, bias: float) -> list:
+    """
+    One 1-D pass of the float AAN IDCT over eight input vectors (float32).
+
+    `bias` (128.5 in the second pass) is added to the DC term before the
+    butterflies, which folds in the level shift and rounding of jidctflt.c.
+    """
+    f = _float32_vector
+    v0, v1, v2, v3, v4, v5, v6, v7 = v
+    if bias:
+        v0 = f([a + bias for a in v0])
+
+    # Even part
+    tmp10 = f([a + b for a, b in zip(v0, v4)])
+    tmp11 = f([a - b for a, b in zip(v0, v4)])
+    tmp13 = f([a + b for a, b in zip(v2, v6)])
+    tmp12 = f([a - b for a, b in zip(v2, v6)])
+    tmp12 = f([a * _FC4 for a in tmp12])
+    tmp12 = f([a - b for a, b in zip(tmp12, tmp13)])
+
+    tmp0 = f([a + b for a, b in zip(tmp10, tmp13)])
+    tmp3 = f([a - b for a, b in zip(tmp10, tmp13)])
+    tmp1 = f([a + b for a, b in zip(tmp11, tmp12)])
+    tmp2 = f([a - b for a, b in zip(tmp11, tmp12)])
+
+    # Odd part
+    z13 = f([a + b for a, b in zip(v5, v3)])
+    z10 = f([a - b for a, b in zip(v5, v3)])
+    z11 = f([a + b for a, b in zip(v1, v7)])
+    z12 = f([a - b for a, b in zip(v1, v7)])
+
+    tmp7 = f([a + b for a, b in zip(z11, z13)])
+    tmp11 = f([a - b for a, b in zip(z11, z13)])
+    tmp11 = f([a * _FC4 for a in tmp11])
+    z5 = f([a + b for a, b in zip(z10, z12)])
+    z5 = f([a * _FC2 for a in z5])
+    tmp10 = f([a - b for a, b in zip(z5, f([b * _FC2MC6 for b in z12]))])
+    tmp12 = f([a - b for a, b in zip(z5, f([b * _FC2PC6 for b in z10]))])
+
+    tmp6 = f([a - b for a, b in zip(tmp12, tmp7)])
+    tmp5 = f([a - b for a, b in zip(tmp11, tmp6)])
+    tmp4 = f([a - b for a, b in zip(tmp10, tmp5)])
+
+    return [
+        f([a + b for a, b in zip(tmp0, tmp7)]),
+        f([a + b for a, b in zip(tmp1, tmp6)]),
+        f([a + b for a, b in zip(tmp2, tmp5)]),
+        f([a + b for a, b in zip(tmp3, tmp4)]),
+        f([a - b for a, b in zip(tmp3, tmp4)]),
+        f([a - b for a, b in zip(tmp2, tmp5)]),
+        f([a - b for a, b in zip(tmp1, tmp6)]),
+        f([a - b for a, b in zip(tmp0, tmp7)]),
+    ]
+
+
+def _idct_islow(coef: list[int], qt: list[int]) -> list[int]:
+    """jidctint.c jpeg_idct_islow (LL&M integer algorithm)."""
+    ws = [0] * 64
+    for c in range(8):
+        if not (coef[8 + c] or coef[16 + c] or coef[24 + c] or coef[32 + c]
+                or coef[40 + c] or coef[48 + c] or coef[56 + c]):
+            dc = (coef[c] * qt[c]) << 2
+            ws[c] = ws[8 + c] = ws[16 + c] = ws[24 + c] = dc
+            ws[32 + c] = ws[40 + c] = ws[48 + c] = ws[56 + c] = dc
+            continue
+
+        z2 = coef[16 + c] * qt[16 + c]
+        z3 = coef[48 + c] * qt[48 + c]
+        z1 = (z2 + z3) * _FIX_0_541196100
+        tmp2 = z1 - z3 * _FIX_1_847759065
+        tmp3 = z1 + z2 * _FIX_0_765366865
+
+        z2 = coef[c] * qt[c]
+        z3 = coef[32 + c] * qt[32 + c]
+        tmp0 = (z2 + z3) << 13
+        tmp1 = (z2 - z3) << 13
+
+        tmp10 = tmp0 + tmp3
+        tmp13 = tmp0 - tmp3
+        tmp11 = tmp1 + tmp2
+        tmp12 = tmp1 - tmp2
+
+        tmp0 = coef[56 + c] * qt[56 + c]
+        tmp1 = coef[40 + c] * qt[40 + c]
+        tmp2 = coef[24 + c] * qt[24 + c]
+        tmp3 = coef[8 + c] * qt[8 + c]
+
+        z1 = tmp0 + tmp3
+        z2 = tmp1 + tmp2
+        z3 = tmp0 + tmp2
+        z4 = tmp1 + tmp3
+        z5 = (z3 + z4) * _FIX_1_175875602
+
+        tmp0 = tmp0 * _FIX_0_298631336
+        tmp1 = tmp1 * _FIX_2_053119869
+        tmp2 = tmp2 * _FIX_3_072711026
+        tmp3 = tmp3 * _FIX_1_501321110
+        z1 = z1 * -_FIX_0_899976223
+        z2 = z2 * -_FIX_2_562915447
+        z3 = z3 * -_FIX_1_961570560 + z5
+        z4 = z4 * -_FIX_0_390180644 + z5
+
+        tmp0 += z1 + z3
+        tmp1 += z2 + z4
+        tmp2 += z2 + z3
+        tmp3 += z1 + z4
+
+        ws[c] = (tmp10 + tmp3 + 1024) >> 11
+        ws[56 + c] = (tmp10 - tmp3 + 1024) >> 11
+        ws[8 + c] = (tmp11 + tmp2 + 1024) >> 11
+        ws[48 + c] = (tmp11 - tmp2 + 1024) >> 11
+        ws[16 + c] = (tmp12 + tmp1 + 1024) >> 11
+        ws[40 + c] = (tmp12 - tmp1 + 1024) >> 11
+        ws[24 + c] = (tmp13 + tmp0 + 1024) >> 11
+        ws[32 + c] = (tmp13 - tmp0 + 1024) >> 11
+
+    out = [0] * 64
+    limit = _IDCT_RANGE_LIMIT
+    for r in range(0, 64, 8):
+        z2 = ws[r + 2]
+        z3 = ws[r + 6]
+        z1 = (z2 + z3) * _FIX_0_541196100
+        tmp2 = z1 - z3 * _FIX_1_847759065
+        tmp3 = z1 + z2 * _FIX_0_765366865
+
+        tmp0 = (ws[r] + ws[r + 4]) << 13
+        tmp1 = (ws[r] - ws[r + 4]) << 13
+
+        tmp10 = tmp0 + tmp3
+        tmp13 = tmp0 - tmp3
+        tmp11 = tmp1 + tmp2
+        tmp12 = tmp1 - tmp2
+
+        tmp0 = ws[r + 7]
+        tmp1 = ws[r + 5]
+        tmp2 = ws[r + 3]
+        tmp3 = ws[r + 1]
+
+        z1 = tmp0 + tmp3
+        z2 = tmp1 + tmp2
+        z3 = tmp0 + tmp2
+        z4 = tmp1 + tmp3
+        z5 = (z3 + z4) * _FIX_1_175875602
+
+        tmp0 = tmp0 * _FIX_0_298631336
+        tmp1 = tmp1 * _FIX_2_053119869
+        tmp2 = tmp2 * _FIX_3_072711026
+        tmp3 = tmp3 * _FIX_1_501321110
+        z1 = z1 * -_FIX_0_899976223
+        z2 = z2 * -_FIX_2_562915447
+        z3 = z3 * -_FIX_1_961570560 + z5
+        z4 = z4 * -_FIX_0_390180644 + z5
+
+        tmp0 += z1 + z3
+        tmp1 += z2 + z4
+        tmp2 += z2 + z3
+        tmp3 += z1 + z4
+
+        out[r] = limit[((tmp10 + tmp3 + 131072) >> 18) & 1023]
+        out[r + 7] = limit[((tmp10 - tmp3 + 131072) >> 18) & 1023]
+        out[r + 1] = limit[((tmp11 + tmp2 + 131072) >> 18) & 1023]
+        out[r + 6] = limit[((tmp11 - tmp2 + 131072) >> 18) & 1023]
+        out[r + 2] = limit[((tmp12 + tmp1 + 131072) >> 18) & 1023]
+        out[r + 5] = limit[((tmp12 - tmp1 + 131072) >> 18) & 1023]
+        out[r + 3] = limit[((tmp13 + tmp0 + 131072) >> 18) & 1023]
+        out[r + 4] = limit[((tmp13 - tmp0 + 131072) >> 18) & 1023]
+    return out
+
+
+# jidctred.c multipliers (FIX(x) with CONST_BITS = 13)
+_FIX_0_211164243 = 1730
+_FIX_0_509795579 = 4176
+_FIX_0_601344887 = 4926
+_FIX_0_720959822 = 5906
+_FIX_0_765366865 = 6270
+_FIX_0_850430095 = 6967
+_FIX_0_899976223 = 7373
+_FIX_1_061594337 = 8697
+_FIX_1_272758580 = 10426
+_FIX_1_451774981 = 11893
+_FIX_1_847759065 = 15137
+_FIX_2_172734803 = 17799
+_FIX_2_562915447 = 20995
+_FIX_3_624509785 = 29692
+
+
+def _idct_4x4_terms(c0: int, c1: int, c2: int, c3: int,
+                    c5: int, c6: int, c7: int) -> tuple[int, int, int, int]:
+    """One undescaled 4-point pass of jpeg_idct_4x4, in output order."""
+    tmp0 = c0 << 14
+    tmp2 = c2 * _FIX_1_847759065 - c6 * _FIX_0_765366865
+    tmp10 = tmp0 + tmp2
+    tmp12 = tmp0 - tmp2
+    odd0 = (-c7 * _FIX_0_211164243 + c5 * _FIX_1_451774981
+            - c3 * _FIX_2_172734803 + c1 * _FIX_1_061594337)
+    odd2 = (-c7 * _FIX_0_509795579 - c5 * _FIX_0_601344887
+            + c3 * _FIX_0_899976223 + c1 * _FIX_2_562915447)
+    return tmp10 + odd2, tmp12 + odd0, tmp12 - odd0, tmp10 - odd2
+
+
+def _idct_4x4(coef: list[int], qt: list[int]) -> list[int]:
+    """
+    jidctred.c jpeg_idct_4x4: a 4x4 block from 8x8 coefficients.
+
+    Same integer arithmetic as libjpeg; row and column 4 do not contribute.
+    """
+    ws = [0] * 32
+    for col in (0, 1, 2, 3, 5, 6, 7):
+        c = [coef[r * 8 + col] * qt[r * 8 + col] for r in range(8)]
+        if not (c[1] or c[2] or c[3] or c[5] or c[6] or c[7]):
+            ws[col] = ws[8 + col] = ws[16 + col] = ws[24 + col] = c[0] << 2
+            continue
+        o0, o1, o2, o3 = _idct_4x4_terms(c[0], c[1], c[2], c[3], c[5], c[6], c[7])
+        ws[col] = (o0 + 2048) >> 12
+        ws[8 + col] = (o1 + 2048) >> 12
+        ws[16 + col] = (o2 + 2048) >> 12
+        ws[24 + col] = (o3 + 2048) >> 12
+
+    limit = _IDCT_RANGE_LIMIT
+    out: list[int] = []
+    for r in range(0, 32, 8):
+        w = ws[r:r + 8]
+        if not (w[1] or w[2] or w[3] or w[5] or w[6] or w[7]):
+            out.extend([limit[((w[0] + 16) >> 5) & 1023]] * 4)
+            continue
+        out.extend(limit[((v + 262144) >> 19) & 1023]
+                   for v in _idct_4x4_terms(w[0], w[1], w[2], w[3], w[5], w[6], w[7]))
+    return out
+
+
+def _idct_2x2(coef: list[int], qt: list[int]) -> list[int]:
+    """
+    jidctred.c jpeg_idct_2x2: a 2x2 block from 8x8 coefficients.
+
+    Only the DC and odd-index coefficients contribute.
+    """
+    ws = [0] * 16
+    for col in (0, 1, 3, 5, 7):
+        c0, c1, c3, c5, c7 = (coef[r * 8 + col] * qt[r * 8 + col] for r in (0, 1, 3, 5, 7))
+        if not (c1 or c3 or c5 or c7):
+            ws[col] = ws[8 + col] = c0 << 2
+            continue
+        tmp10 = c0 << 15
+        tmp0 = (-c7 * _FIX_0_720959822 + c5 * _FIX_0_850430095
+                - c3 * _FIX_1_272758580 + c1 * _FIX_3_624509785)
+        ws[col] = (tmp10 + tmp0 + 4096) >> 13
+        ws[8 + col] = (tmp10 - tmp0 + 4096) >> 13
+
+    limit = _IDCT_RANGE_LIMIT
+    out: list[int] = []
+    for r in (0, 8):
+        w0, w1, w3, w5, w7 = ws[r], ws[r + 1], ws[r + 3], ws[r + 5], ws[r + 7]
+        if not (w1 or w3 or w5 or w7):
+            value = limit[((w0 + 16) >> 5) & 1023]
+            out.extend((value, value))
+            continue
+        tmp10 = w0 << 15
+        tmp0 = (-w7 * _FIX_0_720959822 + w5 * _FIX_0_850430095
+                - w3 * _FIX_1_272758580 + w1 * _FIX_3_624509785)
+        out.append(limit[((tmp10 + tmp0 + 524288) >> 20) & 1023])
+        out.append(limit[((tmp10 - tmp0 + 524288) >> 20) & 1023])
+    return out
+
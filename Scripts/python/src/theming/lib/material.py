@@ -11,7 +11,9 @@ Supported schemes (matching Matugen):
 - SchemeContent: Preserves source color's chroma
 """
 
-from .hct import Hct, TonalPalette, TemperatureCache, fix_if_disliked
+from array import array
+
+from .hct import Hct, TonalPalette, TemperatureCache, fix_if_disliked, solve_argb_batch
 
 
 # =============================================================================
@@ -119,6 +121,135 @@ MONOCHROME_LIGHT_TONES = {
 }
 
 
+# Scheme tokens in output order: (token, palette attribute, tone).
+# A string tone is looked up in the mode's tone table (see
+# _BaseScheme._tones()); an integer tone is the same in both modes.
+SCHEME_ROLES = (
+    # Primary colors
+    ('primary', 'primary_palette', 'primary'),
+    ('on_primary', 'primary_palette', 'on_primary'),
+    ('primary_container', 'primary_palette', 'primary_container'),
+    ('on_primary_container', 'primary_palette', 'on_primary_container'),
+
+    # Surface tint (same as primary, used for M3 elevation tinting)
+    ('surface_tint', 'primary_palette', 'primary'),
+
+    # Secondary colors
+    ('secondary', 'secondary_palette', 'secondary'),
+    ('on_secondary', 'secondary_palette', 'on_secondary'),
+    ('secondary_container', 'secondary_palette', 'secondary_container'),
+    ('on_secondary_container', 'secondary_palette', 'on_secondary_container'),
+
+    # Tertiary colors
+    ('tertiary', 'tertiary_palette', 'tertiary'),
+    ('on_tertiary', 'tertiary_palette', 'on_tertiary'),
+    ('tertiary_container', 'tertiary_palette', 'tertiary_container'),
+    ('on_tertiary_container', 'tertiary_palette', 'on_tertiary_container'),
+
+    # Error colors
+    ('error', 'error_palette', 'error'),
+    ('on_error', 'error_palette', 'on_error'),
+    ('error_container', 'error_palette', 'error_container'),
+    ('on_error_container', 'error_palette', 'on_error_container'),
+
+    # Surface colors
+    ('surface', 'neutral_palette', 'surface'),
+    ('on_surface', 'neutral_palette', 'on_surface'),
+    ('surface_variant', 'neutral_variant_palette', 'surface_variant'),
+    ('on_surface_variant', 'neutral_variant_palette', 'on_surface_variant'),
+
+    # Surface containers
+    ('surface_container_lowest', 'neutral_palette', 'surface_container_lowest'),
+    ('surface_container_low', 'neutral_palette', 'surface_container_low'),
+    ('surface_container', 'neutral_palette', 'surface_container'),
+    ('surface_container_high', 'neutral_palette', 'surface_container_high'),
+    ('surface_container_highest', 'neutral_palette', 'surface_container_highest'),
+
+    # Outline and other
+    ('outline', 'neutral_variant_palette', 'outline'),
+    ('outline_variant', 'neutral_variant_palette', 'outline_variant'),
+    ('shadow', 'neutral_palette', 'shadow'),
+    ('scrim', 'neutral_palette', 'scrim'),
+
+    # Inverse colors
+    ('inverse_surface', 'neutral_palette', 'inverse_surface'),
+    ('inverse_on_surface', 'neutral_palette', 'inverse_on_surface'),
+    ('inverse_primary', 'primary_palette', 'inverse_primary'),
+
+    # Background (alias for surface)
+    ('background', 'neutral_palette', 'surface'),
+    ('on_background', 'neutral_palette', 'on_surface'),
+
+    # Surface dim and bright
+    ('surface_dim', 'neutral_palette', 'surface_dim'),
+    ('surface_bright', 'neutral_palette', 'surface_bright'),
+
+    # Fixed colors - consistent across light/dark modes (MD3 spec)
+    ('primary_fixed', 'primary_palette', 90),
+    ('primary_fixed_dim', 'primary_palette', 80),
+    ('on_primary_fixed', 'primary_palette', 10),
+    ('on_primary_fixed_variant', 'primary_palette', 30),
+
+    ('secondary_fixed', 'secondary_palette', 90),
+    ('secondary_fixed_dim', 'secondary_palette', 80),
+    ('on_secondary_fixed', 'secondary_palette', 10),
+    ('on_secondary_fixed_variant', 'secondary_palette', 30),
+
+    ('tertiary_fixed', 'tertiary_palette', 90),
+    ('tertiary_fixed_dim', 'tertiary_palette', 80),
+    ('on_tertiary_fixed', 'tertiary_palette', 10),
+    ('on_tertiary_fixed_variant', 'tertiary_palette', 30),
+)
+
+SCHEME_TOKENS = tuple(token for token, _, _ in SCHEME_ROLES)
+_TOKEN_INDEX = {token: i for i, token in enumerate(SCHEME_TOKENS)}
+
+
+# =============================================================================
+# Scheme Bundle
+# =============================================================================
+
+class SchemeBundle:
+    """
+    Every scheme token for one or more modes, stored as ARGB arrays.
+
+    Struct-of-arrays layout: `argb[mode][i]` is the ARGB value of
+    SCHEME_TOKENS[i] in that mode. Hex strings are only formatted when
+    asked for, so callers that work with ARGB never pay for them.
+    """
+
+    __slots__ = ('argb',)
+
+    tokens = SCHEME_TOKENS
+
+    def __init__(self, argb: dict[str, array]):
+        self.argb = argb
+
+    @property
+    def modes(self) -> tuple[str, ...]:
+        return tuple(self.argb)
+
+    @staticmethod
+    def index(token: str) -> int:
+        """Index of a token in SCHEME_TOKENS (raises KeyError if unknown)."""
+        return _TOKEN_INDEX[token]
+
+    def get_argb(self, mode: str, token: str) -> int:
+        """ARGB value of a token in the given mode."""
+        return self.argb[mode][_TOKEN_INDEX[token]]
+
+    def get_hex(self, mode: str, token: str) -> str:
+        """Hex string (#rrggbb) of a token in the given mode."""
+        return f"#{self.argb[mode][_TOKEN_INDEX[token]] & 0xFFFFFF:06x}"
+
+    def to_dict(self, mode: str) -> dict[str, str]:
+        """Token name to hex string for one mode, in SCHEME_TOKENS order."""
+        return {
+            token: f"#{argb & 0xFFFFFF:06x}"
+            for token, argb in zip(SCHEME_TOKENS, self.argb[mode])
+        }
+
+
 # =============================================================================
 # Base Scheme Class
 # =============================================================================
@@ -156,88 +287,43 @@ class _BaseScheme:
         """Generate light theme color dictionary."""
         return self._generate_scheme(is_dark=False)
 
-    def _generate_scheme(self, is_dark: bool) -> dict[str, str]:
-        """Generate scheme with appropriate tone values."""
+    def bundle(self, modes: tuple[str, ...] = ('dark', 'light')) -> SchemeBundle:
+        """
+        Resolve every scheme token for the given modes in one batched solve.
+
+        Each distinct (hue, chroma, tone) across all palettes and modes is
+        solved once, so fixed colors and tones shared between dark and
+        light are not computed twice.
+        """
+        requests = []
+        for mode in modes:
+            tones = self._tones(mode == 'dark')
+            for _, palette_name, tone in SCHEME_ROLES:
+                palette = getattr(self, palette_name)
+                if isinstance(tone, str):
+                    tone = tones[tone]
+                requests.append((palette.hue, palette.chroma, float(tone)))
+
+        solved = solve_argb_batch(requests)
+        count = len(SCHEME_ROLES)
+        return SchemeBundle({
+            mode: array('I', solved[i * count:(i + 1) * count])
+            for i, mode in enumerate(modes)
+        })
+
+    def _tones(self, is_dark: bool) -> dict[str, int]:
+        """Tone table for a mode, including surface_dim and surface_bright."""
         tones = DARK_TONES if is_dark else LIGHT_TONES
-
-        scheme = {
-            # Primary colors
-            'primary': self.primary_palette.get_hex(tones['primary']),
-            'on_primary': self.primary_palette.get_hex(tones['on_primary']),
-            'primary_container': self.primary_palette.get_hex(tones['primary_container']),
-            'on_primary_container': self.primary_palette.get_hex(tones['on_primary_container']),
-
-            # Surface tint (same as primary, used for M3 elevation tinting)
-            'surface_tint': self.primary_palette.get_hex(tones['primary']),
-
-            # Secondary colors
-            'secondary': self.secondary_palette.get_hex(tones['secondary']),
-            'on_secondary': self.secondary_palette.get_hex(tones['on_secondary']),
-            'secondary_container': self.secondary_palette.get_hex(tones['secondary_container']),
-            'on_secondary_container': self.secondary_palette.get_hex(tones['on_secondary_container']),
-
-            # Tertiary colors
-            'tertiary': self.tertiary_palette.get_hex(tones['tertiary']),
-            'on_tertiary': self.tertiary_palette.get_hex(tones['on_tertiary']),
-            'tertiary_container': self.tertiary_palette.get_hex(tones['tertiary_container']),
-            'on_tertiary_container': self.tertiary_palette.get_hex(tones['on_tertiary_container']),
-
-            # Error colors
-            'error': self.error_palette.get_hex(tones['error']),
-            'on_error': self.error_palette.get_hex(tones['on_error']),
-            'error_container': self.error_palette.get_hex(tones['error_container']),
-            'on_error_container': self.error_palette.get_hex(tones['on_error_container']),
-
-            # Surface colors
-            'surface': self.neutral_palette.get_hex(tones['surface']),
-            'on_surface': self.neutral_palette.get_hex(tones['on_surface']),
-            'surface_variant': self.neutral_variant_palette.get_hex(tones['surface_variant']),
-            'on_surface_variant': self.neutral_variant_palette.get_hex(tones['on_surface_variant']),
-
-            # Surface containers
-            'surface_container_lowest': self.neutral_palette.get_hex(tones['surface_container_lowest']),
-            'surface_container_low': self.neutral_palette.get_hex(tones['surface_container_low']),
-            'surface_container': self.neutral_palette.get_hex(tones['surface_container']),
-            'surface_container_high': self.neutral_palette.get_hex(tones['surface_container_high']),
-            'surface_container_highest': self.neutral_palette.get_hex(tones['surface_container_highest']),
-
-            # Outline and other
-            'outline': self.neutral_variant_palette.get_hex(tones['outline']),
-            'outline_variant': self.neutral_variant_palette.get_hex(tones['outline_variant']),
-            'shadow': self.neutral_palette.get_hex(tones['shadow']),
-            'scrim': self.neutral_palette.get_hex(tones['scrim']),
-
-            # Inverse colors
-            'inverse_surface': self.neutral_palette.get_hex(tones['inverse_surface']),
-            'inverse_on_surface': self.neutral_palette.get_hex(tones['inverse_on_surface']),
-            'inverse_primary': self.primary_palette.get_hex(tones['inverse_primary']),
-
-            # Background (alias for surface)
-            'background': self.neutral_palette.get_hex(tones['surface']),
-            'on_background': self.neutral_palette.get_hex(tones['on_surface']),
-
-            # Surface dim and bright
-            'surface_dim': self.neutral_palette.get_hex(87 if not is_dark else 6),
-            'surface_bright': self.neutral_palette.get_hex(98 if not is_dark else 24),
-
-            # Fixed colors - consistent across light/dark modes (MD3 spec)
-            'primary_fixed': self.primary_palette.get_hex(90),
-            'primary_fixed_dim': self.primary_palette.get_hex(80),
-            'on_primary_fixed': self.primary_palette.get_hex(10),
-            'on_primary_fixed_variant': self.primary_palette.get_hex(30),
-
-            'secondary_fixed': self.secondary_palette.get_hex(90),
-            'secondary_fixed_dim': self.secondary_palette.get_hex(80),
-            'on_secondary_fixed': self.secondary_palette.get_hex(10),
-            'on_secondary_fixed_variant': self.secondary_palette.get_hex(30),
-
-            'tertiary_fixed': self.tertiary_palette.get_hex(90),
-            'tertiary_fixed_dim': self.tertiary_palette.get_hex(80),
-            'on_tertiary_fixed': self.tertiary_palette.get_hex(10),
-            'on_tertiary_fixed_variant': self.tertiary_palette.get_hex(30),
+        return {
+            **tones,
+            'surface_dim': 6 if is_dark else 87,
+            'surface_bright': 24 if is_dark else 98,
         }
 
-        return scheme
+    def _generate_scheme(self, is_dark: bool) -> dict[str, str]:
+        """Generate scheme with appropriate tone values."""
+        mode = 'dark' if is_dark else 'light'
+        return self.bundle((mode,)).to_dict(mode)
 
 
 # =============================================================================
@@ -411,88 +497,16 @@ class SchemeMonochrome(_BaseScheme):
         # Error palette keeps vibrant red for accessibility
         self.error_palette = TonalPalette(25.0, 84.0)
 
-    def _generate_scheme(self, is_dark: bool) -> dict[str, str]:
-        """Generate scheme with monochrome-specific tone values."""
+    def _tones(self, is_dark: bool) -> dict[str, int]:
+        """Monochrome-specific tone values."""
         # Monochrome uses different tones for higher contrast in grayscale
         tones = MONOCHROME_DARK_TONES if is_dark else MONOCHROME_LIGHT_TONES
-
-        scheme = {
-            # Primary colors
-            'primary': self.primary_palette.get_hex(tones['primary']),
-            'on_primary': self.primary_palette.get_hex(tones['on_primary']),
-            'primary_container': self.primary_palette.get_hex(tones['primary_container']),
-            'on_primary_container': self.primary_palette.get_hex(tones['on_primary_container']),
-
-            # Surface tint (same as primary, used for M3 elevation tinting)
-            'surface_tint': self.primary_palette.get_hex(tones['primary']),
-
-            # Secondary colors
-            'secondary': self.secondary_palette.get_hex(tones['secondary']),
-            'on_secondary': self.secondary_palette.get_hex(tones['on_secondary']),
-            'secondary_container': self.secondary_palette.get_hex(tones['secondary_container']),
-            'on_secondary_container': self.secondary_palette.get_hex(tones['on_secondary_container']),
-
-            # Tertiary colors
-            'tertiary': self.tertiary_palette.get_hex(tones['tertiary']),
-            'on_tertiary': self.tertiary_palette.get_hex(tones['on_tertiary']),
-            'tertiary_container': self.tertiary_palette.get_hex(tones['tertiary_container']),
-            'on_tertiary_container': self.tertiary_palette.get_hex(tones['on_tertiary_container']),
-
-            # Error colors
-            'error': self.error_palette.get_hex(tones['error']),
-            'on_error': self.error_palette.get_hex(tones['on_error']),
-            'error_container': self.error_palette.get_hex(tones['error_container']),
-            'on_error_container': self.error_palette.get_hex(tones['on_error_container']),
-
-            # Surface colors
-            'surface': self.neutral_palette.get_hex(tones['surface']),
-            'on_surface': self.neutral_palette.get_hex(tones['on_surface']),
-            'surface_variant': self.neutral_variant_palette.get_hex(tones['surface_variant']),
-            'on_surface_variant': self.neutral_variant_palette.get_hex(tones['on_surface_variant']),
-
-            # Surface containers
-            'surface_container_lowest': self.neutral_palette.get_hex(tones['surface_container_lowest']),
-            'surface_container_low': self.neutral_palette.get_hex(tones['surface_container_low']),
-            'surface_container': self.neutral_palette.get_hex(tones['surface_container']),
-            'surface_container_high': self.neutral_palette.get_hex(tones['surface_container_high']),
-            'surface_container_highest': self.neutral_palette.get_hex(tones['surface_container_highest']),
-
-            # Outline and other
-            'outline': self.neutral_variant_palette.get_hex(tones['outline']),
-            'outline_variant': self.neutral_variant_palette.get_hex(tones['outline_variant']),
-            'shadow': self.neutral_palette.get_hex(tones['shadow']),
-            'scrim': self.neutral_palette.get_hex(tones['scrim']),
-
-            # Inverse colors
-            'inverse_surface': self.neutral_palette.get_hex(tones['inverse_surface']),
-            'inverse_on_surface': self.neutral_palette.get_hex(tones['inverse_on_surface']),
-            'inverse_primary': self.primary_palette.get_hex(tones['inverse_primary']),
-
-            # Background (same as surface in MD3)
-            'background': self.neutral_palette.get_hex(tones['surface']),
-            'on_background': self.neutral_palette.get_hex(tones['on_surface']),
-
-            # Surface dim and bright
-            'surface_dim': self.neutral_palette.get_hex(tones['surface']),
-            'surface_bright': self.neutral_palette.get_hex(tones['surface_container_highest'] + 5),
-
-            # Fixed colors
-            'primary_fixed': self.primary_palette.get_hex(90),
-            'primary_fixed_dim': self.primary_palette.get_hex(80),
-            'on_primary_fixed': self.primary_palette.get_hex(10),
-            'on_primary_fixed_variant': self.primary_palette.get_hex(30),
-            'secondary_fixed': self.secondary_palette.get_hex(90),
-            'secondary_fixed_dim': self.secondary_palette.get_hex(80),
-            'on_secondary_fixed': self.secondary_palette.get_hex(10),
-            'on_secondary_fixed_variant': self.secondary_palette.get_hex(30),
-            'tertiary_fixed': self.tertiary_palette.get_hex(90),
-            'tertiary_fixed_dim': self.tertiary_palette.get_hex(80),
-            'on_tertiary_fixed': self.tertiary_palette.get_hex(10),
-            'on_tertiary_fixed_variant': self.tertiary_palette.get_hex(30),
+        return {
+            **tones,
+            'surface_dim': tones['surface'],
+            'surface_bright': tones['surface_container_highest'] + 5,
         }
 
-        return scheme
-
 
 # Backward compatibility alias
 MaterialScheme = SchemeContent
@@ -6,9 +6,13 @@ using perceptual color distance calculations and k-means clustering.
 """
 
 import math
+from collections import Counter
 
-from .color import Color, rgb_to_hsl, hsl_to_rgb, hue_distance, rgb_to_lab, lab_to_rgb, lab_distance
-from .hct import Cam16, Hct
+from .accel import numpy_module
+from .color import Color, rgb_to_hsl, hsl_to_rgb, rgb_to_lab, rgb_to_lab_array, lab_to_rgb, lab_distance
+from .hct import Hct, hct_batch
+from .pixels import PixelBuffer, PixelsLike, as_pixel_buffer
+from .quantizer import rank_by_score, select_distinct_hues
 
 # Type aliases
 RGB = tuple[int, int, int]
@@ -16,7 +20,7 @@ HSL = tuple[float, float, float]
 LAB = tuple[float, float, float]
 
 
-def downsample_pixels(pixels: list[RGB], factor: int = 4) -> list[RGB]:
+def downsample_pixels(pixels: PixelsLike, factor: int = 4) -> PixelsLike:
     """
     Downsample pixels for faster processing.
 
@@ -32,7 +36,7 @@ def downsample_pixels(pixels: list[RGB], factor: int = 4) -> list[RGB]:
 
 
 def kmeans_cluster(
-    colors: list[RGB],
+    colors: PixelsLike,
     k: int = 5,
     iterations: int = 10
 ) -> list[tuple[RGB, RGB, int]]:
@@ -45,43 +49,68 @@ def kmeans_cluster(
 
     - centroid_rgb: averaged color from the cluster (smoother, blended)
     - representative_rgb: actual image pixel closest to centroid
+
+    Every distinct color is converted to Lab and assigned once, weighted by
+    its pixel count; assignment is vectorized when NumPy is available. The
+    result is identical to clustering every pixel: initialization and the
+    centroid means still follow pixel order.
     """
+    colors = as_pixel_buffer(colors)
     if len(colors) < k:
         # Not enough colors, return what we have (same color for centroid and representative)
         unique = list(set(colors))
-        return [(c, c, colors.count(c)) for c in unique[:k]]
+        counts = Counter(colors)
+        return [(c, c, counts[c]) for c in unique[:k]]
+
+    np = numpy_module()
+
+    # Distinct colors (first-occurrence order) in Lab, like matugen's WSMeans
+    color_counts = colors.counts()
+    unique_argb = list(color_counts)
+    unique_rgb = [((argb >> 16) & 0xFF, (argb >> 8) & 0xFF, argb & 0xFF) for argb in unique_argb]
+    if np is not None:
+        argb = np.array(unique_argb, dtype=np.int64)
+        unique_lab_array = rgb_to_lab_array((argb >> 16) & 0xFF, (argb >> 8) & 0xFF, argb & 0xFF)
+        unique_lab: list[LAB] = [tuple(lab) for lab in unique_lab_array.tolist()]
+    else:
+        unique_lab = [rgb_to_lab(*rgb) for rgb in unique_rgb]
 
-    # Convert to Lab for perceptual clustering (like matugen's WSMeans)
-    colors_lab = [rgb_to_lab(*c) for c in colors]
+    # Distinct color index of every pixel, in pixel order
+    position = {color: i for i, color in enumerate(unique_argb)}
+    pixel_colors = [position[color] for color in colors.argb()]
 
     # Deterministic initialization: pick evenly spaced colors from sorted list
     # Sort by L (lightness) first for better spread
-    sorted_indices = sorted(range(len(colors_lab)), key=lambda i: colors_lab[i][0])
+    unique_lightness = [lab[0] for lab in unique_lab]
+    pixel_lightness = [unique_lightness[u] for u in pixel_colors]
+    sorted_indices = sorted(range(len(pixel_colors)), key=pixel_lightness.__getitem__)
     step = len(sorted_indices) // k
-    centroids = [colors_lab[sorted_indices[i * step]] for i in range(k)]
+    centroids = [unique_lab[pixel_colors[sorted_indices[i * step]]] for i in range(k)]
 
     # K-means iterations
-    assignments = [0] * len(colors_lab)
+    assignments = [0] * len(unique_lab)
     for _ in range(iterations):
-        # Assign colors to nearest centroid
-        for idx, color in enumerate(colors_lab):
-            min_dist = float('inf')
-            min_cluster = 0
-            for i, centroid in enumerate(centroids):
-                dist = lab_distance(color, centroid)
-                if dist < min_dist:
-                    min_dist = dist
-                    min_cluster = i
-            assignments[idx] = min_cluster
-
-        # Update centroids (simple mean in Lab space)
+        # Assign each distinct color to its nearest centroid
+        if np is not None:
+            assignments = _nearest_centroids_numpy(np, unique_lab_array, centroids)
+        else:
+            assignments = [_nearest_centroid(lab, centroids) for lab in unique_lab]
+
+        # Update centroids (simple mean in Lab space). Members are gathered
+        # in one pass in pixel order, so the float sums match summing the
+        # duplicated pixels cluster by cluster.
+        members: list[list[int]] = [[] for _ in range(k)]
+        for u in pixel_colors:
+            members[assignments[u]].append(u)
+
         new_centroids = []
         for i in range(k):
-            cluster_colors = [colors_lab[j] for j in range(len(colors_lab)) if assignments[j] == i]
-            if cluster_colors:
-                avg_L = sum(c[0] for c in cluster_colors) / len(cluster_colors)
-                avg_a = sum(c[1] for c in cluster_colors) / len(cluster_colors)
-                avg_b = sum(c[2] for c in cluster_colors) / len(cluster_colors)
+            cluster = members[i]
+            if cluster:
+                size = len(cluster)
+                avg_L = sum([unique_lab[u][0] for u in cluster]) / size
+                avg_a = sum([unique_lab[u][1] for u in cluster]) / size
+                avg_b = sum([unique_lab[u][2] for u in cluster]) / size
                 new_centroids.append((avg_L, avg_a, avg_b))
             else:
                 new_centroids.append(centroids[i])
@@ -92,14 +121,15 @@ def kmeans_cluster(
     cluster_counts = [0] * k
     cluster_representatives: list[tuple[RGB, float]] = [(colors[0], float('inf'))] * k
 
-    for idx, color_lab in enumerate(colors_lab):
-        cluster_idx = assignments[idx]
-        cluster_counts[cluster_idx] += 1
+    for u, color_lab in enumerate(unique_lab):
+        cluster_idx = assignments[u]
+        cluster_counts[cluster_idx] += color_counts[unique_argb[u]]
 
-        # Track the pixel closest to the centroid as the representative
+        # Track the color closest to the centroid as the representative
+        # (first occurrence wins ties, like scanning pixels in order)
         dist = lab_distance(color_lab, centroids[cluster_idx])
         if dist < cluster_representatives[cluster_idx][1]:
-            cluster_representatives[cluster_idx] = (colors[idx], dist)
+            cluster_representatives[cluster_idx] = (unique_rgb[u], dist)
 
     # Return both centroid (averaged) and representative (actual pixel) colors
     results = []
@@ -116,6 +146,39 @@ def kmeans_cluster(
     return results
 
 
+def _nearest_centroid(color: LAB, centroids: list[LAB]) -> int:
+    """Index of the nearest centroid (lowest index on ties)."""
+    min_dist = float('inf')
+    min_cluster = 0
+    for i, centroid in enumerate(centroids):
+        dist = lab_distance(color, centroid)
+        if dist < min_dist:
+            min_dist = dist
+            min_cluster = i
+    return min_cluster
+
+
+def _nearest_centroids_numpy(np, colors_lab, centroids: list[LAB]) -> list[int]:
+    """
+    _nearest_centroid() for an (n, 3) array of Lab colors at once.
+
+    Distances are computed with the same float operations as lab_distance()
+    (sqrt is correctly rounded in both), and argmin keeps the lowest index
+    on ties, so assignments are identical.
+    """
+    centers = np.array(centroids, dtype=np.float64)
+    d_l = colors_lab[:, 0, None] - centers[:, 0]
+    d_a = colors_lab[:, 1, None] - centers[:, 1]
+    d_b = colors_lab[:, 2, None] - centers[:, 2]
+    distances = np.sqrt(d_l * d_l + d_a * d_a + d_b * d_b)
+    return distances.argmin(axis=1).tolist()
+
+
+def _hct_of_colors(colors_with_counts: list[tuple[RGB, int]]) -> tuple[list[float], list[float], list[float]]:
+    """HCT (hues, chromas, tones) of the colors in (RGB, count) pairs."""
+    return hct_batch([(r << 16) | (g << 8) | b for (r, g, b), _ in colors_with_counts])
+
+
 def _score_colors_chroma(
     colors_with_counts: list[tuple[RGB, int]],
 ) -> list[tuple[Color, float]]:
@@ -131,39 +194,36 @@ def _score_colors_chroma(
     Returns:
         List of (Color, score) tuples, sorted by score descending
     """
+    hues, chromas, tones = _hct_of_colors(colors_with_counts)
     result_colors = []
-    for rgb, count in colors_with_counts:
+    for (rgb, count), hue, chroma, tone in zip(colors_with_counts, hues, chromas, tones):
         color = Color.from_rgb(rgb)
-        try:
-            hct = color.to_hct()
-
-            # Chroma contribution - prefer colorful colors
-            chroma_score = hct.chroma
-
-            # Tone penalty - prefer mid-tones (40-60 is ideal)
-            if hct.tone < 20:
-                tone_penalty = (20 - hct.tone) * 2
-            elif hct.tone > 80:
-                tone_penalty = (hct.tone - 80) * 1.5
-            elif hct.tone < 40:
-                tone_penalty = (40 - hct.tone) * 0.5
-            elif hct.tone > 60:
-                tone_penalty = (hct.tone - 60) * 0.3
-            else:
-                tone_penalty = 0
 
-            # Hue penalty - slight penalty for yellow-green hues
-            if 80 < hct.hue < 110:
-                hue_penalty = 5
-            else:
-                hue_penalty = 0
+        # Chroma contribution - prefer colorful colors
+        chroma_score = chroma
+
+        # Tone penalty - prefer mid-tones (40-60 is ideal)
+        if tone < 20:
+            tone_penalty = (20 - tone) * 2
+        elif tone > 80:
+            tone_penalty = (tone - 80) * 1.5
+        elif tone < 40:
+            tone_penalty = (40 - tone) * 0.5
+        elif tone > 60:
+            tone_penalty = (tone - 60) * 0.3
+        else:
+            tone_penalty = 0
 
-            # Combined score: chroma minus penalties, balanced with count
-            # Using count^0.3 so chroma dominates while still considering area
-            score = (chroma_score - tone_penalty - hue_penalty) * (count ** 0.3)
-            result_colors.append((color, score))
-        except (ValueError, ZeroDivisionError):
-            result_colors.append((color, 0.0))
+        # Hue penalty - slight penalty for yellow-green hues
+        if 80 < hue < 110:
+            hue_penalty = 5
+        else:
+            hue_penalty = 0
+
+        # Combined score: chroma minus penalties, balanced with count
+        # Using count^0.3 so chroma dominates while still considering area
+        score = (chroma_score - tone_penalty - hue_penalty) * (count ** 0.3)
+        result_colors.append((color, score))
 
     result_colors.sort(key=lambda x: -x[1])
     return result_colors
@@ -216,17 +276,13 @@ def _score_colors_count(
     # First pass: collect colorful colors and group by hue family
     hue_families: dict[int, list[tuple[Color, float, float, int]]] = {}  # family -> [(color, hue, chroma, count), ...]
 
-    for rgb, count in colors_with_counts:
-        color = Color.from_rgb(rgb)
-        try:
-            hct = color.to_hct()
-            if hct.chroma >= MIN_CHROMA:
-                family = _hue_to_family(hct.hue)
-                if family not in hue_families:
-                    hue_families[family] = []
-                hue_families[family].append((color, hct.hue, hct.chroma, count))
-        except (ValueError, ZeroDivisionError):
-            pass
+    hues, chromas, _ = _hct_of_colors(colors_with_counts)
+    for (rgb, count), hue, chroma in zip(colors_with_counts, hues, chromas):
+        if chroma >= MIN_CHROMA:
+            family = _hue_to_family(hue)
+            if family not in hue_families:
+                hue_families[family] = []
+            hue_families[family].append((Color.from_rgb(rgb), hue, chroma, count))
 
     # If no colorful colors found, fall back to all colors
     if not hue_families:
@@ -303,17 +359,13 @@ def _score_colors_dysfunctional(
     # First pass: collect colorful colors and group by hue family
     hue_families: dict[int, list[tuple[Color, float, float, int]]] = {}  # family -> [(color, hue, chroma, count), ...]
 
-    for rgb, count in colors_with_counts:
-        color = Color.from_rgb(rgb)
-        try:
-            hct = color.to_hct()
-            if hct.chroma >= MIN_CHROMA:
-                family = _hue_to_family(hct.hue)
-                if family not in hue_families:
-                    hue_families[family] = []
-                hue_families[family].append((color, hct.hue, hct.chroma, count))
-        except (ValueError, ZeroDivisionError):
-            pass
+    hues, chromas, _ = _hct_of_colors(colors_with_counts)
+    for (rgb, count), hue, chroma in zip(colors_with_counts, hues, chromas):
+        if chroma >= MIN_CHROMA:
+            family = _hue_to_family(hue)
+            if family not in hue_families:
+                hue_families[family] = []
+            hue_families[family].append((Color.from_rgb(rgb), hue, chroma, count))
 
     # If no colorful colors found, fall back to all colors
     if not hue_families:
@@ -355,8 +407,9 @@ def _score_colors_dysfunctional(
     # Build result: colors from distant families first
     result_colors = []
 
-    # Sort distant families by weighted score: hue_distance * max_chroma
-    # This balances visual distinctness (hue distance) with color quality (chroma)
+    # Sort distant families by weighted score: the circular hue difference
+    # from the dominant family's center times the family's max chroma.
+    # This balances visual distinctness (hue difference) with color quality (chroma)
     # A family that's far away AND has good colors beats one that's close with great colors
     distant_families.sort(key=lambda x: -(x[2] * x[3]))
 
@@ -431,119 +484,32 @@ def _score_colors_population(
     Returns:
         List of (Color, score) tuples, sorted by score descending
     """
-    # Constants matching Material Score
-    TARGET_CHROMA = 48.0
-    WEIGHT_PROPORTION = 0.7
-    WEIGHT_CHROMA_ABOVE = 0.3
-    WEIGHT_CHROMA_BELOW = 0.1
-    CUTOFF_CHROMA = 5.0
-    CUTOFF_EXCITED_PROPORTION = 0.01
-
-    # Build per-hue population histogram (360 buckets)
-    hue_population = [0] * 360
-    population_sum = 0
-
-    colors_hct: list[tuple[Color, Hct, int]] = []
-    for rgb, count in colors_with_counts:
-        try:
-            color = Color.from_rgb(rgb)
-            hct = color.to_hct()
-            hue_bucket = int(hct.hue) % 360
-            hue_population[hue_bucket] += count
-            population_sum += count
-            colors_hct.append((color, hct, count))
-        except (ValueError, ZeroDivisionError):
-            continue
-
-    if not colors_hct or population_sum == 0:
-        # Fallback: return colors without scoring
-        result = []
-        for rgb, count in colors_with_counts:
-            color = Color.from_rgb(rgb)
-            result.append((color, float(count)))
-        return sorted(result, key=lambda x: -x[1])
-
-    # Calculate "excited proportions" - sum of proportions in ±15° hue window
-    hue_excited_proportions = [0.0] * 360
-    for hue in range(360):
-        proportion = hue_population[hue] / population_sum
-        # Spread to neighboring hues (±15°, so 30° total window)
-        for offset in range(-14, 16):
-            neighbor_hue = (hue + offset) % 360
-            hue_excited_proportions[neighbor_hue] += proportion
-
-    # Score each color
-    scored_hcts: list[tuple[Color, Hct, float]] = []
-    for color, hct, count in colors_hct:
-        hue_bucket = int(hct.hue) % 360
-        proportion = hue_excited_proportions[hue_bucket]
-
-        # Filter by chroma and proportion
-        if hct.chroma < CUTOFF_CHROMA:
-            continue
-        if proportion <= CUTOFF_EXCITED_PROPORTION:
-            continue
-
-        # Proportion score (70% weight)
-        proportion_score = proportion * 100.0 * WEIGHT_PROPORTION
-
-        # Chroma score: (chroma - target) * weight
-        # This gives bonus for high chroma, penalty for low chroma
-        if hct.chroma < TARGET_CHROMA:
-            chroma_weight = WEIGHT_CHROMA_BELOW
-        else:
-            chroma_weight = WEIGHT_CHROMA_ABOVE
-        chroma_score = (hct.chroma - TARGET_CHROMA) * chroma_weight
-
-        score = proportion_score + chroma_score
-        scored_hcts.append((color, hct, score))
-
-    if not scored_hcts:
-        # Fallback if filtering removed everything
+    hues, chromas, _ = _hct_of_colors(colors_with_counts)
+    ranked = rank_by_score(
+        hues, chromas, [count for _, count in colors_with_counts], round_hues=False
+    )
+
+    if not ranked:
+        # Fallback: return colors without scoring (no population, or
+        # filtering removed everything)
         result = []
         for rgb, count in colors_with_counts:
             color = Color.from_rgb(rgb)
             result.append((color, float(count)))
         return sorted(result, key=lambda x: -x[1])
 
-    # Sort by score descending
-    scored_hcts.sort(key=lambda x: -x[2])
-
-    # Deduplicate by hue distance - pick colors maximizing hue diversity
-    # Start at 90° minimum distance, decrease to 15° if needed
-    chosen_colors: list[tuple[Color, float]] = []
-
-    for min_hue_diff in range(90, 14, -1):
-        chosen_colors.clear()
-        for color, hct, score in scored_hcts:
-            # Check if this hue is far enough from all chosen colors
-            is_far_enough = True
-            for chosen_color, _ in chosen_colors:
-                chosen_hct = chosen_color.to_hct()
-                if hue_distance(hct.hue, chosen_hct.hue) < min_hue_diff:
-                    is_far_enough = False
-                    break
-
-            if is_far_enough:
-                chosen_colors.append((color, score))
-
-            # Stop if we have enough colors (4 is Material default)
-            if len(chosen_colors) >= 4:
-                break
-
-        # If we found enough colors, stop decreasing threshold
-        if len(chosen_colors) >= 4:
-            break
-
-    # If deduplication yielded nothing, fall back to top scored
-    if not chosen_colors:
-        chosen_colors = [(c, s) for c, h, s in scored_hcts[:4]]
-
-    return chosen_colors
+    # Deduplicate by hue distance: greedily pick the best-scored colors at the
+    # largest minimum hue distance (90° down to 15°) that still yields 4
+    # colors (the Material default)
+    chosen = select_distinct_hues([hues[index] for index, _ in ranked], 4)
+    return [
+        (Color.from_rgb(colors_with_counts[ranked[position][0]][0]), ranked[position][1])
+        for position in chosen
+    ]
 
 
 def extract_palette(
-    pixels: list[RGB],
+    pixels: PixelsLike,
     k: int = 5,
     scoring: str = "population"
 ) -> list[Color]:
@@ -551,7 +517,7 @@ def extract_palette(
     Extract K dominant colors from pixel data.
 
     Args:
-        pixels: List of RGB tuples
+        pixels: PixelBuffer or list of RGB tuples
         k: Number of colors to extract
         scoring: Scoring method:
                  - "population": matugen-like, representative colors (M3 schemes)
@@ -564,14 +530,14 @@ def extract_palette(
         List of Color objects, sorted by score
     """
     # Downsample for performance
-    sampled = downsample_pixels(pixels, factor=4)
+    sampled = downsample_pixels(as_pixel_buffer(pixels), factor=4)
     total_sampled = len(sampled)
 
     # For population scoring, we need many clusters then score/filter them
     # For chroma scoring, fewer clusters work fine
     if scoring == "population":
         # Use more clusters for Material scoring (like matugen's 128-256)
-        cluster_count = min(128, max(k * 10, len(set(sampled)) // 10))
+        cluster_count = min(128, max(k * 10, sampled.unique_count() // 10))
         # Don't pre-filter for population scoring - let the Score algorithm filter
         # This matches matugen which quantizes all pixels, then filters in scoring
         filtered = sampled
@@ -594,14 +560,10 @@ def extract_palette(
         # otherwise get averaged away, with colorfulness pre-filter
         cluster_count = 20
         # Filter to colorful pixels for smoother averaged results
-        filtered = []
-        for p in sampled:
-            try:
-                cam = Cam16.from_rgb(p[0], p[1], p[2])
-                if cam.chroma >= 5.0:
-                    filtered.append(p)
-            except (ValueError, ZeroDivisionError):
-                continue
+        unique = sampled.counts()
+        _, chromas, _ = hct_batch(unique)
+        colorful = {argb for argb, chroma in zip(unique, chromas) if chroma >= 5.0}
+        filtered = PixelBuffer.from_argb([argb for argb in sampled.argb() if argb in colorful])
 
         if len(filtered) < cluster_count * 2:
             filtered = sampled
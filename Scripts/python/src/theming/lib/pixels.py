@@ -0,0 +1,154 @@
+"""
+Compact pixel storage shared by the theming pipeline.
+
+PixelBuffer holds an image as packed 8-bit RGB bytes (3 bytes per pixel)
+instead of a list of (r, g, b) tuples. read_image() returns one, and the
+quantizers and palette extraction accept it directly:
+
+- quantize_wu / quantize_wsmeans use counts(), the ARGB -> pixel count
+  histogram, which is computed once and shared by both
+- argb() gives the pixels as array('I') of packed ARGB
+- channels() gives stride views (memoryview) of the R, G and B planes
+- Slicing with a step (downsampling) returns another PixelBuffer
+
+Iterating and indexing still yield RGB tuples, so code written against
+list[tuple[int, int, int]] keeps working. Plain lists of RGB tuples, RGB
+bytes and ARGB arrays are accepted everywhere through as_pixel_buffer().
+"""
+
+import sys
+from array import array
+from collections import Counter
+from typing import Iterable, Iterator, Optional, Sequence, Union
+
+# Type alias
+RGB = tuple[int, int, int]
+
+
+class PixelBuffer:
+    """Immutable packed RGB pixels with cached ARGB and histogram views."""
+
+    __slots__ = ('_rgb', '_argb', '_counts')
+
+    def __init__(self, rgb: Union[bytes, bytearray, memoryview] = b''):
+        if len(rgb) % 3:
+            raise ValueError("RGB buffer length must be a multiple of 3")
+        self._rgb = bytes(rgb)
+        self._argb: Optional[array] = None
+        self._counts: Optional[dict[int, int]] = None
+
+    @classmethod
+    def from_rgb(cls, pixels: Iterable[RGB]) -> 'PixelBuffer':
+        """Pack an iterable of (r, g, b) tuples."""
+        return cls(bytes(v for pixel in pixels for v in pixel))
+
+    @classmethod
+    def from_argb(cls, argb: Sequence[int]) -> 'PixelBuffer':
+        """Pack ARGB integers (alpha is dropped; pixels are treated as opaque)."""
+        packed = memoryview(array('I', argb)).cast('B')
+        rgb = bytearray(3 * (len(packed) // 4))
+        if sys.byteorder == 'little':
+            rgb[0::3], rgb[1::3], rgb[2::3] = packed[2::4], packed[1::4], packed[0::4]
+        else:
+            rgb[0::3], rgb[1::3], rgb[2::3] = packed[1::4], packed[2::4], packed[3::4]
+        return cls(rgb)
+
+    @property
+    def rgb(self) -> bytes:
+        """The packed RGB bytes."""
+        return self._rgb
+
+    def view(self) -> memoryview:
+        """Zero-copy view of the packed RGB bytes."""
+        return memoryview(self._rgb)
+
+    def channels(self) -> tuple[memoryview, memoryview, memoryview]:
+        """Stride views of the red, green and blue planes."""
+        view = memoryview(self._rgb)
+        return view[0::3], view[1::3], view[2::3]
+
+    def argb(self) -> array:
+        """Pixels as array('I') of opaque packed ARGB (computed once)."""
+        if self._argb is None:
+            rgb = self._rgb
+            count = len(self)
+            packed = bytearray(4 * count)
+            if sys.byteorder == 'little':
+                packed[0::4], packed[1::4], packed[2::4] = rgb[2::3], rgb[1::3], rgb[0::3]
+                packed[3::4] = b'\xff' * count
+            else:
+                packed[0::4] = b'\xff' * count
+                packed[1::4], packed[2::4], packed[3::4] = rgb[0::3], rgb[1::3], rgb[2::3]
+            self._argb = array('I', packed)
+        return self._argb
+
+    def counts(self) -> dict[int, int]:
+        """
+        ARGB -> pixel count, in order of first occurrence (computed once).
+
+        The returned dict is shared; callers must not modify it.
+        """
+        if self._counts is None:
+            self._counts = dict(Counter(self.argb()))
+        return self._counts
+
+    def unique_count(self) -> int:
+        """Number of distinct colors."""
+        return len(self.counts())
+
+    def __len__(self) -> int:
+        return len(self._rgb) // 3
+
+    def __iter__(self) -> Iterator[RGB]:
+        rgb = self._rgb
+        return zip(rgb[0::3], rgb[1::3], rgb[2::3])
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[RGB, 'PixelBuffer']:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return PixelBuffer(self._rgb[3 * start:3 * max(start, stop)])
+            # Slice each channel plane, then interleave again
+            planes = [plane[index] for plane in self.channels()]
+            rgb = bytearray(3 * len(planes[0]))
+            for c, plane in enumerate(planes):
+                rgb[c::3] = plane
+            return PixelBuffer(rgb)
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("pixel index out of range")
+        base = 3 * index
+        rgb = self._rgb
+        return (rgb[base], rgb[base + 1], rgb[base + 2])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, PixelBuffer):
+            return self._rgb == other._rgb
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._rgb)
+
+    def __repr__(self) -> str:
+        return f"PixelBuffer({len(self)} pixels)"
+
+
+PixelsLike = Union[PixelBuffer, Sequence[RGB], bytes, bytearray, array]
+
+
+def as_pixel_buffer(pixels: PixelsLike) -> PixelBuffer:
+    """
+    Return pixels as a PixelBuffer without copying if it already is one.
+
+    Accepts a PixelBuffer, a sequence of RGB tuples, packed RGB bytes or an
+    array of ARGB integers.
+    """
+    if isinstance(pixels, PixelBuffer):
+        return pixels
+    if isinstance(pixels, (bytes, bytearray, memoryview)):
+        return PixelBuffer(pixels)
+    if isinstance(pixels, array):
+        return PixelBuffer.from_argb(pixels)
+    return PixelBuffer.from_rgb(pixels)
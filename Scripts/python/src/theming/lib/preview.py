@@ -0,0 +1,186 @@
+"""
+Fast palette previews for wallpaper thumbnails.
+
+The wallpaper picker only needs a source color and a few swatches per
+image, not a full scheme. preview_palette() returns the ranked ARGB colors
+of an image, cheapest source first:
+
+1. An in-process memo keyed by (path, mtime, size, scheme type)
+2. The extraction cache (lib.cache): once a wallpaper was themed its
+   quantizer population or scored palette is reused, so the first color
+   is exactly the source color a full run picks
+3. A reduced decode: a PREVIEW_SIZE x PREVIEW_SIZE thumbnail, retried at
+   the full extraction size if it only scores the fallback color. Large
+   JPEGs are decoded in-process at 1/8 scale in the DCT domain; PNGs and
+   other formats go through `magick -thumbnail` when ImageMagick is
+   installed, since PNG has no reduced decode and pure Python needs ~8 s
+   for a 1920x1080 RGBA PNG (~30 s at 3840x2160)
+
+Thumbnails are quantized by averaging pixels into 16x16x16 RGB cells
+instead of running Wu + WSMeans, then scored like the full pipeline
+(M3 schemes) or clustered by lib.palette (k-means schemes). Previews of
+uncached images are close to, but not always identical with, the full
+extraction.
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+from .pixels import PixelBuffer, PixelsLike, as_pixel_buffer
+
+# Width and height of the thumbnail decoded for uncached images
+PREVIEW_SIZE = 32
+
+# Default number of ranked colors (source color + swatches)
+PREVIEW_COLORS = 5
+
+# Scheme types extracted with k-means, and their lib.palette scoring
+KMEANS_SCORING = {
+    "vibrant": "chroma",
+    "faithful": "count",
+    "dysfunctional": "dysfunctional",
+    "muted": "muted",
+}
+
+# Previews kept warm for the lifetime of the process (daemon mode)
+PREVIEW_CACHE_SIZE = 256
+_PREVIEW_CACHE: OrderedDict = OrderedDict()
+_PREVIEW_LOCK = threading.Lock()
+
+
+def preview_palette(
+    source: Union[str, Path, PixelsLike],
+    scheme_type: str = "tonal-spot",
+    count: int = PREVIEW_COLORS,
+    use_cache: bool = True,
+) -> list[int]:
+    """
+    Ranked ARGB colors of an image, best (the source color) first.
+
+    Args:
+        source: Image path, or pixels (PixelBuffer, RGB tuples or bytes)
+            that are already downscaled
+        scheme_type: Scheme type the colors are picked for
+        count: Maximum number of colors to return
+        use_cache: Read the on-disk extraction cache for paths
+
+    Raises:
+        ImageReadError: If the image cannot be read
+    """
+    if not isinstance(source, (str, Path)):
+        return _rank_pixels(as_pixel_buffer(source), scheme_type, count)
+
+    path = Path(source).expanduser()
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size, scheme_type, count)
+    with _PREVIEW_LOCK:
+        colors = _PREVIEW_CACHE.get(key)
+        if colors is not None:
+            _PREVIEW_CACHE.move_to_end(key)
+            return list(colors)
+
+    colors = _cached_colors(path, scheme_type, count) if use_cache else None
+    if colors is None:
+        from .image import TARGET_SIZE, read_image
+        from .quantizer import FALLBACK_COLOR_ARGB
+
+        resize_filter = "Box" if scheme_type in KMEANS_SCORING else "Triangle"
+        for size in (PREVIEW_SIZE, TARGET_SIZE):
+            pixels = read_image(path, resize_filter, draft=True, size=size)
+            colors = _rank_pixels(pixels, scheme_type, count)
+            # Averaging a near-gray image into a thumbnail can wash out its
+            # few chromatic colors; retry at the full extraction size then
+            if colors != [FALLBACK_COLOR_ARGB]:
+                break
+
+    with _PREVIEW_LOCK:
+        _PREVIEW_CACHE[key] = colors
+        while len(_PREVIEW_CACHE) > PREVIEW_CACHE_SIZE:
+            _PREVIEW_CACHE.popitem(last=False)
+    return list(colors)
+
+
+def clear_preview_cache():
+    """Drop all memoized previews."""
+    with _PREVIEW_LOCK:
+        _PREVIEW_CACHE.clear()
+
+
+def _cached_colors(path: Path, scheme_type: str, count: int) -> Optional[list[int]]:
+    """Colors from a full extraction of the image, if one was cached."""
+    from .cache import ExtractionCache
+    from .color import Color
+    from .quantizer import ranked_source_colors
+
+    resize_filter = "Box" if scheme_type in KMEANS_SCORING else "Triangle"
+    cache = ExtractionCache()
+    try:
+        entry = cache.get(cache.image_key(path, resize_filter))
+    except OSError:
+        return None
+    if not entry:
+        return None
+
+    try:
+        if scheme_type in KMEANS_SCORING:
+            palette = entry.get("palettes", {}).get(scheme_type)
+            if palette:
+                return [_argb(Color.from_hex(h)) for h in palette[:count]]
+        elif "population" in entry:
+            population = {argb: pixels for argb, pixels in entry["population"]}
+            return ranked_source_colors(population, desired=count)
+    except (TypeError, ValueError, AttributeError):
+        # Malformed entry - fall back to decoding
+        pass
+    return None
+
+
+def _rank_pixels(pixels: PixelBuffer, scheme_type: str, count: int) -> list[int]:
+    """Ranked ARGB colors of a (small) image."""
+    if not len(pixels):
+        return []
+
+    scoring = KMEANS_SCORING.get(scheme_type)
+    if scoring is not None:
+        from .palette import extract_palette
+
+        return [_argb(color) for color in extract_palette(pixels, k=5, scoring=scoring)[:count]]
+
+    from .quantizer import ranked_source_colors
+
+    return ranked_source_colors(_cell_histogram(pixels), desired=count)
+
+
+def _argb(color) -> int:
+    return 0xFF000000 | (color.r << 16) | (color.g << 8) | color.b
+
+
+def _cell_histogram(pixels: PixelBuffer) -> dict[int, int]:
+    """
+    Quantize pixels into 16x16x16 RGB cells.
+
+    Each cell is represented by the mean of its pixels, so a smooth
+    gradient still yields its actual colors rather than cell corners.
+    """
+    cells: dict[int, list[int]] = {}
+    for argb, pixel_count in pixels.counts().items():
+        r = (argb >> 16) & 0xFF
+        g = (argb >> 8) & 0xFF
+        b = argb & 0xFF
+        index = (r >> 4) << 8 | (g >> 4) << 4 | b >> 4
+        cell = cells.get(index)
+        if cell is None:
+            cells[index] = [pixel_count, r * pixel_count, g * pixel_count, b * pixel_count]
+        else:
+            cell[0] += pixel_count
+            cell[1] += r * pixel_count
+            cell[2] += g * pixel_count
+            cell[3] += b * pixel_count
+
+    histogram: dict[int, int] = {}
+    for total, r, g, b in cells.values():
+        argb = 0xFF000000 | ((r + total // 2) // total) << 16 | ((g + total // 2) // total) << 8 | (b + total // 2) // total
+        histogram[argb] = histogram.get(argb, 0) + total
+    return histogram
@@ -6,9 +6,11 @@ WSMeans refines Wu's output via weighted k-means in Lab space (QuantizerCelebi p
 Together they match the QuantizerCelebi pipeline used by matugen/material-color-utilities.
 """
 
-from typing import Dict, List, Tuple
+from typing import Dict, List, Sequence, Tuple, Union
 
-from .color import rgb_to_lab, lab_to_rgb
+from .accel import numpy_module
+from .color import rgb_to_lab, rgb_to_lab_array, lab_to_rgb
+from .pixels import PixelBuffer, PixelsLike, as_pixel_buffer
 
 # Constants matching material-color-utilities
 INDEX_BITS = 5
@@ -66,23 +68,27 @@ class QuantizerWu:
         self.moments: List[float] = []
         self.cubes: List[Box] = []
 
-    def quantize(self, pixels: List[int], max_colors: int) -> List[int]:
+    def quantize(self, pixels: Union[Sequence[int], PixelBuffer], max_colors: int) -> List[int]:
         """
         Quantize pixels to a reduced color palette.
 
         Args:
-            pixels: List of colors in ARGB integer format
+            pixels: Colors in ARGB integer format, or a PixelBuffer
             max_colors: Maximum number of colors to return
 
         Returns:
             List of colors in ARGB format
         """
-        self._construct_histogram(pixels)
-        self._compute_moments()
+        np = numpy_module()
+        if np is not None:
+            self._construct_moments_numpy(np, pixels)
+        else:
+            self._construct_histogram(pixels)
+            self._compute_moments()
         result_count = self._create_boxes(max_colors)
         return self._create_result(result_count)
 
-    def _construct_histogram(self, pixels: List[int]):
+    def _construct_histogram(self, pixels: Union[Sequence[int], PixelBuffer]):
         """Build histogram of pixel colors."""
         self.weights = [0] * TOTAL_SIZE
         self.moments_r = [0] * TOTAL_SIZE
@@ -91,11 +97,15 @@ class QuantizerWu:
         self.moments = [0.0] * TOTAL_SIZE
 
         # Count pixels by color
-        count_by_color: Dict[int, int] = {}
-        for pixel in pixels:
-            # Only count fully opaque pixels
-            if (pixel >> 24) & 0xFF == 255:
-                count_by_color[pixel] = count_by_color.get(pixel, 0) + 1
+        if isinstance(pixels, PixelBuffer):
+            # Shared histogram; PixelBuffer pixels are always opaque
+            count_by_color = pixels.counts()
+        else:
+            count_by_color: Dict[int, int] = {}
+            for pixel in pixels:
+                # Only count fully opaque pixels
+                if (pixel >> 24) & 0xFF == 255:
+                    count_by_color[pixel] = count_by_color.get(pixel, 0) + 1
 
         bits_to_remove = 8 - INDEX_BITS
         for pixel, count in count_by_color.items():
@@ -151,6 +161,50 @@ class QuantizerWu:
                     self.moments_b[index] = self.moments_b[prev_index] + area_b[b]
                     self.moments[index] = self.moments[prev_index] + area2[b]
 
+    def _construct_moments_numpy(self, np, pixels: Union[Sequence[int], PixelBuffer]):
+        """
+        Histogram and cumulative moments in one pass with NumPy.
+
+        Same tables as _construct_histogram + _compute_moments: the histogram
+        is a bincount over cube indices and the cumulative moments are a
+        cumsum along the red, green and blue axes. All entries are integers
+        below 2**53, so the float moment table is exact and bit-identical
+        to the pure-Python result.
+        """
+        if isinstance(pixels, PixelBuffer):
+            argb = np.frombuffer(pixels.argb(), dtype=np.uint32).astype(np.int64)
+        else:
+            argb = np.asarray(pixels, dtype=np.int64) & 0xFFFFFFFF
+            # Only count fully opaque pixels
+            argb = argb[(argb >> 24) == 255]
+
+        red = (argb >> 16) & 0xFF
+        green = (argb >> 8) & 0xFF
+        blue = argb & 0xFF
+
+        bits_to_remove = 8 - INDEX_BITS
+        index = (
+            ((red >> bits_to_remove) + 1) * (SIDE_LENGTH * SIDE_LENGTH)
+            + ((green >> bits_to_remove) + 1) * SIDE_LENGTH
+            + (blue >> bits_to_remove) + 1
+        )
+
+        def cumulative(weights, dtype):
+            if weights is None:
+                table = np.bincount(index, minlength=TOTAL_SIZE)
+            else:
+                table = np.bincount(index, weights=weights, minlength=TOTAL_SIZE)
+            cube = table.astype(dtype).reshape(SIDE_LENGTH, SIDE_LENGTH, SIDE_LENGTH)
+            for axis in range(3):
+                np.cumsum(cube, axis=axis, out=cube)
+            return cube.ravel().tolist()
+
+        self.weights = cumulative(None, np.int64)
+        self.moments_r = cumulative(red, np.int64)
+        self.moments_g = cumulative(green, np.int64)
+        self.moments_b = cumulative(blue, np.int64)
+        self.moments = cumulative(red * red + green * green + blue * blue, np.float64)
+
     def _create_boxes(self, max_colors: int) -> int:
         """Create color boxes by recursive cutting."""
         self.cubes = [Box() for _ in range(max_colors)]
@@ -394,23 +448,20 @@ class QuantizerWu:
             )
 
 
-def quantize_wu(pixels: List[Tuple[int, int, int]], max_colors: int = 128) -> Dict[int, int]:
+def quantize_wu(pixels: PixelsLike, max_colors: int = 128) -> Dict[int, int]:
     """
     Quantize RGB pixels using Wu algorithm.
 
     Args:
-        pixels: List of (R, G, B) tuples
+        pixels: PixelBuffer or list of (R, G, B) tuples
         max_colors: Maximum colors to extract
 
     Returns:
         Dictionary mapping ARGB colors to pixel counts
     """
-    # Convert RGB tuples to ARGB integers
-    argb_pixels = [_argb_from_rgb(r, g, b) for r, g, b in pixels]
-
     # Run Wu quantizer
     quantizer = QuantizerWu()
-    result_colors = quantizer.quantize(argb_pixels, max_colors)
+    result_colors = quantizer.quantize(as_pixel_buffer(pixels), max_colors)
 
     # Build color to count mapping in box order (matching Rust's IndexMap insertion order)
     # Wu returns colors with count 0; WSMeans uses only the keys as starting clusters
@@ -462,36 +513,38 @@ def _lab_distance_squared(a: Tuple[float, float, float], b: Tuple[float, float,
 
 
 def quantize_wsmeans(
-    pixels: List[Tuple[int, int, int]],
+    pixels: PixelsLike,
     max_colors: int,
     starting_clusters: List[int],
 ) -> Dict[int, int]:
     """
     Refine quantized colors via weighted k-means in Lab space.
 
-    Port of QuantizerWsmeans from material-colors-0.4.2 Rust crate.
+    Port of QuantizerWsmeans from material-colors-0.4.2 Rust crate. With
+    NumPy available the iterations run batched (see _wsmeans_iterate_numpy)
+    with identical results.
 
     Args:
-        pixels: List of (R, G, B) tuples (original image pixels)
+        pixels: PixelBuffer or list of (R, G, B) tuples (original image pixels)
         max_colors: Maximum number of colors
         starting_clusters: List of ARGB colors from Wu quantizer
 
     Returns:
         Dictionary mapping ARGB colors to pixel counts
     """
-    # Deduplicate pixels, build count map and Lab points
-    pixel_to_count: Dict[int, int] = {}
-    unique_pixels: List[int] = []  # ARGB values in insertion order
-    points: List[Tuple[float, float, float]] = []  # Lab coordinates
-
-    for r, g, b in pixels:
-        argb = _argb_from_rgb(r, g, b)
-        if argb in pixel_to_count:
-            pixel_to_count[argb] += 1
-        else:
-            unique_pixels.append(argb)
-            points.append(rgb_to_lab(r, g, b))
-            pixel_to_count[argb] = 1
+    np = numpy_module()
+
+    # Deduplicated pixels (ARGB -> count, in first-occurrence order) and Lab points
+    pixel_to_count = as_pixel_buffer(pixels).counts()
+    unique_pixels: List[int] = list(pixel_to_count)
+    if np is not None:
+        argb = np.array(unique_pixels, dtype=np.int64)
+        lab = rgb_to_lab_array((argb >> 16) & 0xFF, (argb >> 8) & 0xFF, argb & 0xFF)
+        points: List[Tuple[float, float, float]] = [tuple(p) for p in lab.tolist()]
+    else:
+        points = [
+            rgb_to_lab((argb >> 16) & 0xFF, (argb >> 8) & 0xFF, argb & 0xFF) for argb in unique_pixels
+        ]
 
     cluster_count = min(max_colors, len(points))
     if cluster_count == 0:
@@ -516,6 +569,47 @@ def quantize_wsmeans(
         for index in indices:
             clusters.append(points[index])
 
+    counts = list(pixel_to_count.values())
+    if np is not None:
+        clusters, pixel_count_sums = _wsmeans_iterate_numpy(np, lab, counts, clusters, cluster_count)
+    else:
+        clusters, pixel_count_sums = _wsmeans_iterate(points, counts, clusters, cluster_count)
+
+    # Build result: convert cluster centroids from Lab to ARGB with populations
+    cluster_argbs: List[int] = []
+    cluster_populations: List[int] = []
+
+    for i in range(cluster_count):
+        count = pixel_count_sums[i]
+        if count == 0:
+            continue
+
+        lab_color = clusters[i]
+        cr, cg, cb = lab_to_rgb(lab_color[0], lab_color[1], lab_color[2])
+        argb = _argb_from_rgb(cr, cg, cb)
+
+        if argb in cluster_argbs:
+            continue
+
+        cluster_argbs.append(argb)
+        cluster_populations.append(count)
+
+    color_to_count: Dict[int, int] = {}
+    for i in range(len(cluster_argbs)):
+        color_to_count[cluster_argbs[i]] = cluster_populations[i]
+
+    return color_to_count
+
+
+def _wsmeans_iterate(
+    points: List[Tuple[float, float, float]],
+    counts: List[int],
+    clusters: List[Tuple[float, float, float]],
+    cluster_count: int,
+) -> Tuple[List[Tuple[float, float, float]], List[int]]:
+    """Run the WSMeans iterations; returns (cluster centroids, pixel count per cluster)."""
+    clusters = list(clusters)
+
     # Initialize assignments
     cluster_indices = [i % cluster_count for i in range(len(points))]
 
@@ -578,7 +672,7 @@ def quantize_wsmeans(
         for i in range(len(points)):
             cidx = cluster_indices[i]
             pt = points[i]
-            count = pixel_to_count[unique_pixels[i]]
+            count = counts[i]
             pixel_count_sums[cidx] += count
             component_l[cidx] += pt[0] * count
             component_a[cidx] += pt[1] * count
@@ -595,30 +689,98 @@ def quantize_wsmeans(
                     component_b[i] / count,
                 )
 
-    # Build result: convert cluster centroids from Lab to ARGB with populations
-    cluster_argbs: List[int] = []
-    cluster_populations: List[int] = []
+    return clusters, pixel_count_sums
 
-    for i in range(cluster_count):
-        count = pixel_count_sums[i]
-        if count == 0:
-            continue
 
-        lab = clusters[i]
-        cr, cg, cb = lab_to_rgb(lab[0], lab[1], lab[2])
-        argb = _argb_from_rgb(cr, cg, cb)
+# Points per block in the batched assignment step (bounds temporary arrays
+# to _WSMEANS_BLOCK x cluster_count)
+_WSMEANS_BLOCK = 2048
 
-        if argb in cluster_argbs:
-            continue
 
-        cluster_argbs.append(argb)
-        cluster_populations.append(count)
+def _wsmeans_iterate_numpy(
+    np,
+    points,
+    counts: List[int],
+    clusters: List[Tuple[float, float, float]],
+    cluster_count: int,
+) -> Tuple[List[Tuple[float, float, float]], List[int]]:
+    """
+    _wsmeans_iterate() with the per-point loops replaced by array operations.
+
+    Produces the same floats as the scalar loop:
+    - Distances are ((dL*dL + da*da) + db*db) elementwise, never a matrix
+      product, so every value is rounded exactly like _lab_distance_squared
+    - The sorted inter-cluster rows reproduce the in-place sort of
+      distance_to_index_matrix, including the diagonal slot that keeps the
+      value sorted into it on the previous iteration (0.0 initially)
+    - A point moves to the lowest-index cluster with the smallest unpruned
+      distance below its current one, like the strict `<` scan over j
+    - np.bincount accumulates the weighted centroid sums in point order
+    """
+    n = len(points)
+    weights = np.array(counts, dtype=np.int64)
+    weights_f = weights.astype(np.float64)
+    centers = np.array(clusters[:cluster_count], dtype=np.float64)
+    cluster_indices = np.arange(n, dtype=np.int64) % cluster_count
+
+    diagonal = np.zeros(cluster_count)
+    rows = np.arange(cluster_count)
+    pixel_count_sums = np.zeros(cluster_count, dtype=np.int64)
+
+    # Channel planes as contiguous columns
+    point_l, point_a, point_b = (np.ascontiguousarray(points[:, c]) for c in range(3))
+
+    def distances(a_l, a_a, a_b, b_l, b_a, b_b):
+        d_l = a_l[:, None] - b_l
+        d_a = a_a[:, None] - b_a
+        d_b = a_b[:, None] - b_b
+        d_l *= d_l
+        d_a *= d_a
+        d_b *= d_b
+        d_l += d_a
+        d_l += d_b
+        return d_l
 
-    color_to_count: Dict[int, int] = {}
-    for i in range(len(cluster_argbs)):
-        color_to_count[cluster_argbs[i]] = cluster_populations[i]
+    for iteration in range(10):
+        center_l, center_a, center_b = (np.ascontiguousarray(centers[:, c]) for c in range(3))
 
-    return color_to_count
+        # Inter-cluster distances, sorted per row
+        cluster_distances = distances(center_l, center_a, center_b, center_l, center_a, center_b)
+        cluster_distances[rows, rows] = diagonal
+        cluster_distances.sort(axis=1)
+        diagonal = cluster_distances[rows, rows].copy()
+
+        # Assignment step in blocks of points
+        points_moved = 0
+        for start in range(0, n, _WSMEANS_BLOCK):
+            block = slice(start, start + _WSMEANS_BLOCK)
+            previous = cluster_indices[block]
+            positions = np.arange(len(previous))
+            point_distances = distances(
+                point_l[block], point_a[block], point_b[block], center_l, center_a, center_b
+            )
+            previous_distance = point_distances[positions, previous]
+
+            # Triangle inequality: skip if inter-cluster dist >= 4 * current dist
+            pruned = cluster_distances[previous] >= (4.0 * previous_distance)[:, None]
+            point_distances[pruned] = np.inf
+            nearest = point_distances.argmin(axis=1)
+            moved = point_distances[positions, nearest] < previous_distance
+
+            points_moved += int(moved.sum())
+            previous[moved] = nearest[moved]
+
+        # Early stop
+        if points_moved == 0 and iteration > 0:
+            break
+
+        # Update step: weighted mean in Lab space
+        pixel_count_sums = np.bincount(cluster_indices, weights=weights, minlength=cluster_count).astype(np.int64)
+        for channel, plane in enumerate((point_l, point_a, point_b)):
+            component = np.bincount(cluster_indices, weights=plane * weights_f, minlength=cluster_count)
+            centers[:, channel] = np.where(pixel_count_sums == 0, 0.0, component / np.maximum(pixel_count_sums, 1))
+
+    return [tuple(c) for c in centers.tolist()], pixel_count_sums.tolist()
 
 
 # =============================================================================
@@ -646,6 +808,133 @@ def _difference_degrees(a: float, b: float) -> float:
     return min(diff, 360.0 - diff)
 
 
+def excited_proportions(hue_population: Sequence[int], population_sum: int) -> List[float]:
+    """
+    Share of the population within the ±15° window around each hue.
+
+    Entry h is the sum of hue_population[n] / population_sum over the
+    window n = h-15 .. h+14 (wrapping at 360). Only occupied hues are
+    visited and their proportions are added in ascending hue order, the
+    same order as a full 360 x 30 sweep, so the sums are bit-identical to
+    it. Empty hues would only add 0.0.
+    """
+    proportions = [0.0] * 360
+    for hue in range(360):
+        population = hue_population[hue]
+        if not population:
+            continue
+        proportion = population / population_sum
+        for offset in range(-14, 16):
+            proportions[(hue + offset) % 360] += proportion
+    return proportions
+
+
+def rank_by_score(
+    hues: Sequence[float],
+    chromas: Sequence[float],
+    populations: Sequence[int],
+    filter_colors: bool = True,
+    round_hues: bool = True,
+) -> List[Tuple[int, float]]:
+    """
+    Score colors for theme suitability (the Material Score algorithm).
+
+    Args:
+        hues, chromas, populations: Per-color HCT hue, chroma and pixel count
+        filter_colors: Drop low-chroma and low-proportion colors
+        round_hues: Look up a color's excited proportion at round(hue)
+            (material-color-utilities) instead of int(hue)
+
+    Returns:
+        (index, score) pairs sorted by score descending (ties keep input
+        order). Empty if there is no population or every color was
+        filtered out.
+    """
+    hue_population = [0] * 360
+    population_sum = 0
+    for hue, population in zip(hues, populations):
+        hue_population[_sanitize_degrees(hue)] += population
+        population_sum += population
+
+    if not hues or population_sum == 0:
+        return []
+
+    proportions = excited_proportions(hue_population, population_sum)
+
+    scored: List[Tuple[int, float]] = []
+    for index, (hue, chroma) in enumerate(zip(hues, chromas)):
+        proportion = proportions[_sanitize_degrees(round(hue) if round_hues else hue)]
+
+        # Filter by chroma and proportion
+        if filter_colors:
+            if chroma < CUTOFF_CHROMA:
+                continue
+            if proportion <= CUTOFF_EXCITED_PROPORTION:
+                continue
+
+        # Proportion score (70% weight)
+        proportion_score = proportion * 100.0 * WEIGHT_PROPORTION
+
+        # Chroma score
+        if chroma < TARGET_CHROMA:
+            chroma_weight = WEIGHT_CHROMA_BELOW
+        else:
+            chroma_weight = WEIGHT_CHROMA_ABOVE
+        chroma_score = (chroma - TARGET_CHROMA) * chroma_weight
+
+        scored.append((index, proportion_score + chroma_score))
+
+    # Sort by score descending
+    scored.sort(key=lambda x: -x[1])
+    return scored
+
+
+def _pick_distinct_hues(hues: Sequence[float], min_difference: int, desired: int) -> List[int]:
+    """Greedily pick hues (in order) at least min_difference apart."""
+    chosen: List[int] = []
+    chosen_hues: List[float] = []
+    for index, hue in enumerate(hues):
+        for chosen_hue in chosen_hues:
+            if _difference_degrees(hue, chosen_hue) < min_difference:
+                break
+        else:
+            chosen.append(index)
+            chosen_hues.append(hue)
+
+        if len(chosen) >= desired:
+            break
+    return chosen
+
+
+def select_distinct_hues(hues: Sequence[float], desired: int) -> List[int]:
+    """
+    Pick up to `desired` positions from best-first hues, maximizing hue diversity.
+
+    Uses the largest minimum hue distance between 90° and 15° at which the
+    greedy pick still yields `desired` colors, or the 15° pick if none
+    does. Raising the distance only adds conflicts, and on the hue circle
+    a greedy pick can never gain colors from that (each color it gains is
+    matched to a distinct color it lost), so the count is monotone and
+    the distance is found by binary search instead of trying all 76.
+
+    Returns:
+        Indices into `hues` of the chosen colors, in pick order.
+    """
+    chosen = _pick_distinct_hues(hues, 15, desired)
+    if len(chosen) < desired:
+        return chosen
+
+    low, high = 15, 90  # the pick at `low` always reaches `desired`
+    while low < high:
+        middle = (low + high + 1) // 2
+        attempt = _pick_distinct_hues(hues, middle, desired)
+        if len(attempt) >= desired:
+            low, chosen = middle, attempt
+        else:
+            high = middle - 1
+    return chosen
+
+
 def score_colors(
     color_to_population: Dict[int, int],
     desired: int = 4,
@@ -668,101 +957,96 @@ def score_colors(
         List of ARGB colors sorted by suitability (best first)
     """
     # Import here to avoid circular dependency
-    from .hct import Cam16, Hct
+    from .hct import hct_batch
 
-    # Build HCT colors and hue population histogram
-    colors_hct: List[Tuple[int, Hct]] = []
-    hue_population = [0] * 360
-    population_sum = 0
+    hues, chromas, _ = hct_batch(color_to_population)
+    ranked = rank_by_score(hues, chromas, list(color_to_population.values()), filter_colors)
+    if not ranked:
+        return [fallback_color]
 
-    for argb, population in color_to_population.items():
-        r = (argb >> 16) & 0xFF
-        g = (argb >> 8) & 0xFF
-        b = argb & 0xFF
-
-        try:
-            hct = Hct.from_rgb(r, g, b)
-            colors_hct.append((argb, hct))
-            hue = _sanitize_degrees(hct.hue)
-            hue_population[hue] += population
-            population_sum += population
-        except (ValueError, ZeroDivisionError):
-            continue
+    # Deduplicate by hue distance - maximize hue diversity
+    colors = list(color_to_population)
+    chosen = select_distinct_hues([hues[index] for index, _ in ranked], desired)
+    return [colors[ranked[position][0]] for position in chosen]
 
-    if not colors_hct or population_sum == 0:
-        return [fallback_color]
 
-    # Calculate "excited proportions" - sum of proportions in ±15° hue window
-    hue_excited_proportions = [0.0] * 360
-    for hue in range(360):
-        proportion = hue_population[hue] / population_sum
-        for offset in range(-14, 16):
-            neighbor_hue = _sanitize_degrees(hue + offset)
-            hue_excited_proportions[neighbor_hue] += proportion
+def quantize_celebi(pixels: PixelsLike, max_colors: int = 128) -> Tuple[List[int], Dict[int, int]]:
+    """
+    Run the QuantizerCelebi pipeline (Wu seeding + WSMeans refinement).
 
-    # Score each color
-    scored_hct: List[Tuple[int, Hct, float]] = []
-    for argb, hct in colors_hct:
-        hue = _sanitize_degrees(round(hct.hue))
-        proportion = hue_excited_proportions[hue]
+    Args:
+        pixels: PixelBuffer or list of (R, G, B) tuples
+        max_colors: Maximum number of colors
 
-        # Filter by chroma and proportion
-        if filter_colors:
-            if hct.chroma < CUTOFF_CHROMA:
-                continue
-            if proportion <= CUTOFF_EXCITED_PROPORTION:
-                continue
+    Returns:
+        Tuple of (Wu cluster colors, WSMeans ARGB -> population histogram)
+    """
+    # Convert once so Wu and WSMeans share the pixel histogram
+    pixels = as_pixel_buffer(pixels)
+    wu_result = quantize_wu(pixels, max_colors=max_colors)
+    starting_clusters = list(wu_result.keys())
+    color_to_count = quantize_wsmeans(pixels, max_colors, starting_clusters)
+    return starting_clusters, color_to_count
 
-        # Proportion score (70% weight)
-        proportion_score = proportion * 100.0 * WEIGHT_PROPORTION
 
-        # Chroma score
-        if hct.chroma < TARGET_CHROMA:
-            chroma_weight = WEIGHT_CHROMA_BELOW
-        else:
-            chroma_weight = WEIGHT_CHROMA_ABOVE
-        chroma_score = (hct.chroma - TARGET_CHROMA) * chroma_weight
+def source_color_from_population(
+    color_to_count: Dict[int, int],
+    fallback_color: int = FALLBACK_COLOR_ARGB,
+) -> int:
+    """
+    Pick the source color from a quantized ARGB -> population histogram.
 
-        score = proportion_score + chroma_score
-        scored_hct.append((argb, hct, score))
+    Args:
+        color_to_count: Quantizer output (e.g. from quantize_celebi)
+        fallback_color: Color to return if scoring finds nothing
 
-    if not scored_hct:
-        return [fallback_color]
+    Returns:
+        Source color in ARGB format
+    """
+    ranked = ranked_source_colors(color_to_count, desired=4, fallback_color=fallback_color)
 
-    # Sort by score descending
-    scored_hct.sort(key=lambda x: -x[2])
+    return ranked[0] if ranked else fallback_color
 
-    # Deduplicate by hue distance - maximize hue diversity
-    # Start at 90° (max for 4 colors), decrease to 15° minimum
-    chosen_colors: List[Tuple[int, Hct]] = []
-
-    for diff_degrees in range(90, 14, -1):
-        chosen_colors.clear()
-        for argb, hct, score in scored_hct:
-            # Check if this hue is far enough from all chosen colors
-            is_duplicate = False
-            for chosen_argb, chosen_hct in chosen_colors:
-                if _difference_degrees(hct.hue, chosen_hct.hue) < diff_degrees:
-                    is_duplicate = True
-                    break
-
-            if not is_duplicate:
-                chosen_colors.append((argb, hct))
-
-            if len(chosen_colors) >= desired:
-                break
 
-        if len(chosen_colors) >= desired:
-            break
+def ranked_source_colors(
+    color_to_count: Dict[int, int],
+    desired: int = 4,
+    fallback_color: int = FALLBACK_COLOR_ARGB,
+) -> List[int]:
+    """
+    Source color candidates from a quantized histogram, best first.
 
-    if not chosen_colors:
-        return [fallback_color]
+    The first entry is what source_color_from_population() picks; the rest
+    are the next best colors of distinct hues (previews show them as
+    swatches).
+
+    Args:
+        color_to_count: Quantizer output (e.g. from quantize_celebi)
+        desired: Maximum number of colors to return
+        fallback_color: Color to return if scoring finds nothing
+
+    Returns:
+        List of ARGB colors
+    """
+    from .hct import hct_batch
+
+    # Filter out low-chroma colors before scoring (like matugen)
+    _, chromas, _ = hct_batch(color_to_count)
+    filtered = {
+        argb: count
+        for (argb, count), chroma in zip(color_to_count.items(), chromas)
+        if chroma >= 5.0
+    }
+
+    if not filtered:
+        filtered = color_to_count
 
-    return [argb for argb, hct in chosen_colors]
+    # Score and rank colors
+    return score_colors(filtered, desired=desired, fallback_color=fallback_color)
 
 
 def extract_source_color(
-    pixels: List[Tuple[int, int, int]],
+    pixels: PixelsLike,
     fallback_color: int = FALLBACK_COLOR_ARGB,
 ) -> int:
     """
@@ -772,42 +1056,19 @@ def extract_source_color(
     matugen/material-color-utilities.
 
     Args:
-        pixels: List of (R, G, B) tuples
+        pixels: PixelBuffer or list of (R, G, B) tuples
         fallback_color: Color to return if extraction fails
 
     Returns:
         Source color in ARGB format
     """
-    from .hct import Cam16
-
     if not pixels:
         return fallback_color
 
     # Quantize using Wu + WSMeans (QuantizerCelebi pipeline like matugen)
-    wu_result = quantize_wu(pixels, max_colors=128)
-    starting_clusters = list(wu_result.keys())
-    color_to_count = quantize_wsmeans(pixels, 128, starting_clusters)
-
-    # Filter out low-chroma colors before scoring (like matugen)
-    filtered = {}
-    for argb, count in color_to_count.items():
-        r = (argb >> 16) & 0xFF
-        g = (argb >> 8) & 0xFF
-        b = argb & 0xFF
-        try:
-            cam = Cam16.from_rgb(r, g, b)
-            if cam.chroma >= 5.0:
-                filtered[argb] = count
-        except (ValueError, ZeroDivisionError):
-            continue
+    _, color_to_count = quantize_celebi(pixels, 128)
 
-    if not filtered:
-        filtered = color_to_count
-
-    # Score and rank colors
-    ranked = score_colors(filtered, desired=4, fallback_color=fallback_color)
-
-    return ranked[0] if ranked else fallback_color
+    return source_color_from_population(color_to_count, fallback_color)
 
 
 def source_color_to_rgb(argb: int) -> Tuple[int, int, int]:
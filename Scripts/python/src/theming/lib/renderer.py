@@ -16,10 +16,34 @@ Supports:
   snake_case, kebab_case
 - Custom colors: [config.custom_colors] in TOML config generates
   {name}, on_{name}, {name}_container, on_{name}_container tokens
+
+Templates are compiled once into a TemplatePlan (the node tree with every
+{{ expression }} pre-split into its color reference and filter chain) and
+plans are cached by file path and mtime, or by text for hooks, so
+re-rendering with new theme data only evaluates the plan.
+
+With a RenderManifest, rendering is incremental: every output remembers
+the colors.<name>.<mode> values (and palettes, image path, closest color)
+its template read. A template whose inputs did not change is not evaluated
+again, output identical to the file on disk is not rewritten, and
+process_config_file() only runs the hooks of outputs that changed.
 """
 
+import asyncio
+import copy
+import hashlib
+import io
+import json
+import os
 import re
+import signal
+import stat
 import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Optional, Union
@@ -29,15 +53,29 @@ try:
 except ImportError:
     tomllib = None
 
+from .cache import atomic_write_text
 from .color import Color, find_closest_color
 from .hct import Hct
 
 
 # --- Node Types for the template AST ---
 
+@dataclass
+class ExprNode:
+    """A {{ expression }} split into its base and filter chain."""
+    expr: str
+    # None for an empty expression
+    base: Optional[str]
+    # (name, argument) of each filter, in order
+    filters: list[tuple[str, Optional[str]]]
+    # (name, mode, format) when base is colors.<name>.<mode>.<format>
+    color_ref: Optional[tuple[str, str, str]] = None
+
 @dataclass
 class TextNode:
     text: str
+    # Literal strings and ExprNodes, in order
+    parts: list = field(default_factory=list)
 
 @dataclass
 class ForNode:
@@ -51,6 +89,303 @@ class IfNode:
     negated: bool
     then_body: list
     else_body: list = field(default_factory=list)
+    condition: Optional[ExprNode] = None
+
+
+@dataclass
+class TemplatePlan:
+    """A compiled template: its node tree and the parser's diagnostics."""
+    nodes: list
+    # (level, message, hint) logged while parsing, replayed on every render
+    diagnostics: list[tuple[str, str, str]] = field(default_factory=list)
+
+    def to_data(self) -> dict:
+        """Plain JSON-serializable form, for the on-disk plan cache."""
+        return {
+            "nodes": [_node_to_data(node) for node in self.nodes],
+            "diagnostics": [list(d) for d in self.diagnostics],
+        }
+
+    @classmethod
+    def from_data(cls, data: dict) -> "TemplatePlan":
+        """
+        Rebuild a plan from to_data() output.
+
+        Raises ValueError, TypeError or KeyError for malformed data.
+        """
+        diagnostics = []
+        for level, message, hint in data["diagnostics"]:
+            diagnostics.append((_expect_str(level), _expect_str(message), _expect_str(hint)))
+        return cls(_nodes_from_data(data["nodes"]), diagnostics)
+
+
+def _expect_str(value) -> str:
+    if not isinstance(value, str):
+        raise TypeError(f"expected a string, got {type(value).__name__}")
+    return value
+
+
+def _optional_str(value) -> Optional[str]:
+    return None if value is None else _expect_str(value)
+
+
+def _node_to_data(node):
+    """Tagged dict for one node (strings stay strings)."""
+    if isinstance(node, str):
+        return node
+    if isinstance(node, ExprNode):
+        return {"node": "expr", "expr": node.expr, "base": node.base,
+                "filters": [list(f) for f in node.filters],
+                "color_ref": list(node.color_ref) if node.color_ref else None}
+    if isinstance(node, TextNode):
+        return {"node": "text", "text": node.text, "parts": [_node_to_data(p) for p in node.parts]}
+    if isinstance(node, ForNode):
+        return {"node": "for", "variables": node.variables, "iterable": node.iterable,
+                "body": [_node_to_data(n) for n in node.body]}
+    if isinstance(node, IfNode):
+        return {"node": "if", "condition_expr": node.condition_expr, "negated": node.negated,
+                "then_body": [_node_to_data(n) for n in node.then_body],
+                "else_body": [_node_to_data(n) for n in node.else_body],
+                "condition": _node_to_data(node.condition) if node.condition else None}
+    raise TypeError(f"Unknown template node: {type(node).__name__}")
+
+
+def _nodes_from_data(items) -> list:
+    if not isinstance(items, list):
+        raise TypeError("expected a node list")
+    return [_node_from_data(item) for item in items]
+
+
+def _expr_from_data(data) -> ExprNode:
+    if not isinstance(data, dict) or data.get("node") != "expr":
+        raise ValueError("expected an expression node")
+    filters = [(_expect_str(name), _optional_str(arg)) for name, arg in data["filters"]]
+    color_ref = data["color_ref"]
+    if color_ref is not None:
+        name, mode, fmt = color_ref
+        color_ref = (_expect_str(name), _expect_str(mode), _expect_str(fmt))
+    return ExprNode(_expect_str(data["expr"]), _optional_str(data["base"]), filters, color_ref)
+
+
+def _node_from_data(data):
+    if isinstance(data, str):
+        return data
+    if not isinstance(data, dict):
+        raise TypeError("expected a template node")
+    kind = data["node"]
+    if kind == "expr":
+        return _expr_from_data(data)
+    if kind == "text":
+        return TextNode(_expect_str(data["text"]), _nodes_from_data(data["parts"]))
+    if kind == "for":
+        variables = [_expect_str(v) for v in data["variables"]]
+        return ForNode(variables, _expect_str(data["iterable"]), _nodes_from_data(data["body"]))
+    if kind == "if":
+        condition = data["condition"]
+        return IfNode(
+            _expect_str(data["condition_expr"]),
+            bool(data["negated"]),
+            _nodes_from_data(data["then_body"]),
+            _nodes_from_data(data["else_body"]),
+            _expr_from_data(condition) if condition is not None else None,
+        )
+    raise ValueError(f"Unknown template node: {kind}")
+
+
+# --- Compiled Template Cache ---
+
+class _PlanCache:
+    """Bounded LRU of TemplatePlans keyed by ("file", path, mtime_ns, size) or ("text", text)."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: OrderedDict[tuple, TemplatePlan] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple, compile_plan) -> TemplatePlan:
+        """Return the plan for key, compiling it with compile_plan() on a miss."""
+        with self.lock:
+            plan = self.entries.get(key)
+            if plan is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+
+        plan = compile_plan()
+        with self.lock:
+            self.entries[key] = plan
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return plan
+
+
+PLAN_CACHE_SIZE = 256
+
+_PLAN_CACHE = _PlanCache(PLAN_CACHE_SIZE)
+
+
+def template_plan_cache_info() -> dict[str, int]:
+    """Hit/miss counters and size of the compiled template cache."""
+    cache = _PLAN_CACHE
+    with cache.lock:
+        return {
+            "hits": cache.hits,
+            "misses": cache.misses,
+            "size": len(cache.entries),
+            "max_size": cache.max_size,
+        }
+
+
+def clear_template_plans():
+    """Drop all compiled templates and reset the counters."""
+    cache = _PLAN_CACHE
+    with cache.lock:
+        cache.entries.clear()
+        cache.hits = 0
+        cache.misses = 0
+
+
+def template_plan_items() -> list[tuple[tuple, TemplatePlan]]:
+    """Cached (key, plan) pairs, least recently used first."""
+    cache = _PLAN_CACHE
+    with cache.lock:
+        return list(cache.entries.items())
+
+
+def warm_template_plans(items) -> int:
+    """
+    Add (key, plan) pairs, e.g. from a previous run.
+
+    Like warm_solver_cache(): the items count as less recently used than
+    anything already cached and existing entries are kept. Returns the
+    number of plans added.
+    """
+    cache = _PLAN_CACHE
+    added = 0
+    with cache.lock:
+        for key, plan in reversed(list(items)):
+            if key not in cache.entries and isinstance(plan, TemplatePlan):
+                cache.entries[key] = plan
+                cache.entries.move_to_end(key, last=False)
+                added += 1
+        while len(cache.entries) > cache.max_size:
+            cache.entries.popitem(last=False)
+    return added
+
+
+# --- Incremental Rendering ---
+
+RENDER_MANIFEST_SIZE = 512
+
+
+class RenderManifest:
+    """
+    What each rendered output was last built from, keyed by output path.
+
+    An entry is a JSON-compatible dict:
+        "template": [path, mtime_ns, size] of the template file
+        "reads": {dependency: value} of every theme value the template read
+        "output": [mtime_ns, size] of the file as written
+        "digest": SHA-1 of the rendered text
+
+    Only templates that rendered without errors or warnings get an entry,
+    so skipping one never hides a diagnostic.
+    """
+
+    def __init__(self, entries=None, max_size: int = RENDER_MANIFEST_SIZE):
+        self.max_size = max_size
+        self.entries: OrderedDict[str, dict] = OrderedDict(entries or ())
+        # Set whenever an entry is added or dropped since the last save
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, output: str) -> Optional[dict]:
+        """Entry for an output path, or None."""
+        with self.lock:
+            entry = self.entries.get(output)
+            if entry is not None:
+                self.entries.move_to_end(output)
+            return entry
+
+    def put(self, output: str, entry: dict):
+        """Record the entry for an output path."""
+        with self.lock:
+            self.entries[output] = entry
+            self.entries.move_to_end(output)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+            self.dirty = True
+
+    def discard(self, output: str):
+        """Forget an output, so it is rendered again next time."""
+        with self.lock:
+            if self.entries.pop(output, None) is not None:
+                self.dirty = True
+
+    def items(self) -> list[tuple[str, dict]]:
+        """(output, entry) pairs, least recently used first."""
+        with self.lock:
+            return list(self.entries.items())
+
+
+def _default_permissions() -> int:
+    """Mode of a newly created file under the process umask."""
+    # The umask can only be read by setting it
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+_NEW_FILE_PERMISSIONS = _default_permissions()
+
+
+def _write_output(output_path: Path, text: str):
+    """
+    Atomically replace a rendered output file.
+
+    Symlinked outputs (dotfile managers) are written through to their
+    target, and an existing file keeps its permissions.
+    """
+    target = output_path.resolve()
+    try:
+        permissions = stat.S_IMODE(target.stat().st_mode)
+    except FileNotFoundError:
+        permissions = _NEW_FILE_PERMISSIONS
+    atomic_write_text(target, text, permissions)
+
+
+# --- Config Pipeline ---
+
+# Templates rendered at the same time by process_config_file()
+RENDER_WORKERS = 4
+# Hooks running at the same time ([config] hook_concurrency)
+HOOK_CONCURRENCY = 4
+# Seconds before a hook is killed ([config] or per-template hook_timeout);
+# None lets hooks run as long as they need (e.g. restarting a slow app)
+HOOK_TIMEOUT: Optional[float] = None
+
+
+@dataclass
+class _TemplateJob:
+    """One [templates.<name>] entry moving through process_config_file()."""
+    name: str
+    template: dict
+    hook_timeout: Optional[float]
+    # "written", "unchanged", "failed" or "skipped"
+    status: str = "skipped"
+    # (hook key, rendered command), in the order they run
+    hooks: list[tuple[str, str]] = field(default_factory=list)
+    # Diagnostics printed while rendering
+    log: str = ""
+    render_ms: float = 0.0
+    # {"hook", "ms", "exit_code", "timed_out", "stdout", "stderr"} of each hook that ran
+    hook_timings: list[dict[str, Any]] = field(default_factory=list)
 
 
 # --- Variable Scope Stack ---
@@ -114,6 +449,16 @@ class TemplateRenderer:
         "on_hover": "on_surface",
     }
 
+    # Theme color each palettes.<name> iterable is built from
+    PALETTE_COLORS = {
+        "primary": "primary",
+        "secondary": "secondary",
+        "tertiary": "tertiary",
+        "error": "error",
+        "neutral": "surface",
+        "neutral_variant": "surface_variant",
+    }
+
     # Supported color filters and their argument requirements
     SUPPORTED_FILTERS = {
         # No arguments
@@ -143,7 +488,18 @@ class TemplateRenderer:
     # Regex for expression tags: {{ ... }}
     _EXPR_RE = re.compile(r"\{\{\s*([^}\n]+?)\s*\}\}")
 
-    def __init__(self, theme_data: dict[str, dict[str, str]], verbose: bool = True, default_mode: str = "dark", image_path: Optional[str] = None, scheme_type: str = "content"):
+    def __init__(self, theme_data: dict[str, dict[str, str]], verbose: bool = True, default_mode: str = "dark", image_path: Optional[str] = None, scheme_type: str = "content", manifest: Optional[RenderManifest] = None, force: bool = False):
+        """
+        Args:
+            theme_data: {mode: {color name: hex}}
+            verbose: Print template warnings
+            default_mode: Mode that colors.<name>.default resolves to
+            image_path: Value of the {{image}} tag
+            scheme_type: Scheme used to generate custom color palettes
+            manifest: Enables incremental rendering (see RenderManifest)
+            force: With a manifest, still render and write every template
+                and run every hook, but record the results
+        """
         self.theme_data = theme_data
         self.closest_color = ""
         self.verbose = verbose
@@ -152,20 +508,43 @@ class TemplateRenderer:
         self.scheme_type = scheme_type
         self._current_file: Optional[str] = None
         self._error_count = 0
+        self._warning_count = 0
         self._colors_map: Optional[dict[str, dict[str, str]]] = None
+        self._colors_digest: Optional[tuple[dict, str]] = None
+        # Collects parser diagnostics while compiling a TemplatePlan
+        self._diagnostics: Optional[list[tuple[str, str, str]]] = None
+        self.manifest = manifest
+        self.force = force
+        # Collects {dependency: value} while rendering with a manifest
+        self._reads: Optional[dict[str, Optional[str]]] = None
+        # Whether the last render_file() call wrote its output
+        self._output_changed = False
+        # Diagnostics of a forked renderer, printed by process_config_file()
+        self._log_buffer: Optional[io.StringIO] = None
+
+    def _log_file(self):
+        """Where diagnostics go: stderr, or the buffer of a forked renderer."""
+        return self._log_buffer if self._log_buffer is not None else sys.stderr
 
     def _log_error(self, message: str, line_hint: str = ""):
         """Log an error to stderr."""
+        if self._diagnostics is not None:
+            self._diagnostics.append(("error", message, line_hint))
+            return
         self._error_count += 1
         prefix = f"[{self._current_file}] " if self._current_file else ""
         hint = f" near '{line_hint}'" if line_hint else ""
-        print(f"Template error: {prefix}{message}{hint}", file=sys.stderr)
+        print(f"Template error: {prefix}{message}{hint}", file=self._log_file())
 
     def _log_warning(self, message: str):
         """Log a warning to stderr."""
+        if self._diagnostics is not None:
+            self._diagnostics.append(("warning", message, ""))
+            return
+        self._warning_count += 1
         if self.verbose:
             prefix = f"[{self._current_file}] " if self._current_file else ""
-            print(f"Template warning: {prefix}{message}", file=sys.stderr)
+            print(f"Template warning: {prefix}{message}", file=self._log_file())
 
     # --- Colors Map ---
 
@@ -200,16 +579,10 @@ class TemplateRenderer:
 
         TONES = [0, 5, 10, 15, 20, 25, 30, 35, 40, 50, 60, 70, 80, 90, 95, 98, 99, 100]
 
-        palette_color_map = {
-            "primary": "primary",
-            "secondary": "secondary",
-            "tertiary": "tertiary",
-            "error": "error",
-            "neutral": "surface",
-            "neutral_variant": "surface_variant",
-        }
+        if self._reads is not None:
+            self._record_read(f"palette:{palette_name}")
 
-        color_name = palette_color_map.get(palette_name)
+        color_name = self.PALETTE_COLORS.get(palette_name)
         if not color_name:
             self._log_warning(f"Unknown palette: {palette_name}")
             return []
@@ -298,7 +671,7 @@ class TemplateRenderer:
             if isinstance(token, str):
                 # Raw text
                 if token:
-                    nodes.append(TextNode(token))
+                    nodes.append(TextNode(token, self._compile_text(token)))
                 pos += 1
             else:
                 # Block command
@@ -380,7 +753,37 @@ class TemplateRenderer:
         if pos < len(tokens):
             pos += 1
 
-        return IfNode(condition_expr, negated, then_body, else_body), pos
+        condition = self._compile_expression(condition_expr)
+        return IfNode(condition_expr, negated, then_body, else_body, condition), pos
+
+    # --- Expression Compiler ---
+
+    def _compile_text(self, text: str) -> list:
+        """Split a text segment into literal strings and ExprNodes."""
+        parts = []
+        last_end = 0
+        for match in self._EXPR_RE.finditer(text):
+            if match.start() > last_end:
+                parts.append(text[last_end:match.start()])
+            parts.append(self._compile_expression(match.group(1).strip()))
+            last_end = match.end()
+        if last_end < len(text):
+            parts.append(text[last_end:])
+        return parts
+
+    def _compile_expression(self, expr: str) -> ExprNode:
+        """Split an expression into its base and parsed filter chain."""
+        # Split by pipe for filters
+        parts = self._split_pipes(expr)
+
+        if not parts:
+            return ExprNode(expr, None, [])
+
+        base = parts[0].strip()
+        filters = [self._parse_filter(p.strip()) for p in parts[1:]]
+        color_match = re.match(r'^colors\.([a-z_0-9]+)\.([a-z_0-9]+)\.([a-z_0-9]+)$', base)
+        color_ref = color_match.groups() if color_match else None
+        return ExprNode(expr, base, filters, color_ref)
 
     # --- Node Evaluation ---
 
@@ -389,7 +792,11 @@ class TemplateRenderer:
         parts = []
         for node in nodes:
             if isinstance(node, TextNode):
-                parts.append(self._resolve_text(node.text, scope))
+                for part in node.parts or self._compile_text(node.text):
+                    if isinstance(part, str):
+                        parts.append(part)
+                    else:
+                        parts.append(str(self._evaluate_expression(part, scope)))
             elif isinstance(node, ForNode):
                 parts.append(self._evaluate_for(node, scope))
             elif isinstance(node, IfNode):
@@ -433,7 +840,8 @@ class TemplateRenderer:
 
     def _evaluate_if(self, node: IfNode, scope: VariableScope) -> str:
         """Evaluate an if/else node."""
-        condition_value = self._resolve_expression(node.condition_expr, scope)
+        condition = node.condition or self._compile_expression(node.condition_expr)
+        condition_value = self._evaluate_expression(condition, scope)
         is_truthy = self._is_truthy(condition_value)
 
         if node.negated:
@@ -467,6 +875,8 @@ class TemplateRenderer:
 
         # Colors map: "colors"
         if iterable_expr == "colors":
+            if self._reads is not None:
+                self._record_read("colors")
             colors_map = self._build_colors_map()
             return list(colors_map.items())
 
@@ -490,46 +900,39 @@ class TemplateRenderer:
 
     # --- Expression Resolution ---
 
-    def _resolve_text(self, text: str, scope: VariableScope) -> str:
-        """Resolve all {{ expr }} tags in a text segment."""
-        def replace(match):
-            expr = match.group(1).strip()
-            return str(self._resolve_expression(expr, scope))
-
-        return self._EXPR_RE.sub(replace, text)
-
     def _resolve_expression(self, expr: str, scope: VariableScope) -> Any:
         """Resolve an expression, checking scope variables first, then colors."""
-        # Split by pipe for filters
-        parts = self._split_pipes(expr)
+        return self._evaluate_expression(self._compile_expression(expr), scope)
 
-        if not parts:
+    def _evaluate_expression(self, node: ExprNode, scope: VariableScope) -> Any:
+        """Evaluate a compiled expression against the current scope and theme."""
+        base = node.base
+        if base is None:
             return ""
 
-        base = parts[0].strip()
-        filters = [p.strip() for p in parts[1:]]
-
         # Try scope resolution first
         resolved = self._resolve_from_scope(base, scope)
         if resolved is not None:
             result_str = str(resolved)
-            for filter_str in filters:
-                result_str = self._apply_string_or_color_filter(result_str, filter_str, expr)
+            for name, arg in node.filters:
+                result_str = self._apply_value_filter(result_str, name, arg, node.expr)
             return result_str
 
         # Handle {{image}} tag - resolves to source image path
         if base == 'image':
+            if self._reads is not None:
+                self._record_read("image")
             result_str = self.image_path or ""
-            for filter_str in filters:
-                result_str = self._apply_string_or_color_filter(result_str, filter_str, expr)
+            for name, arg in node.filters:
+                result_str = self._apply_value_filter(result_str, name, arg, node.expr)
             return result_str
 
         # Fall back to colors.name.mode.format parsing
         if base.startswith('colors.'):
-            return self._process_color_expression(base, filters, expr)
+            return self._evaluate_color_expression(node)
 
         # Unknown expression - return as-is
-        return f"{{{{{expr}}}}}"
+        return f"{{{{{node.expr}}}}}"
 
     def _split_pipes(self, expr: str) -> list[str]:
         """Split expression by pipe, respecting quoted strings."""
@@ -584,15 +987,14 @@ class TemplateRenderer:
         # If the final value is a hex color string, return it as-is
         return val
 
-    def _process_color_expression(self, base: str, filters: list[str], raw_expr: str) -> str:
-        """Process a colors.name.mode.format expression with optional filters."""
-        base_match = re.match(r'^colors\.([a-z_0-9]+)\.([a-z_0-9]+)\.([a-z_0-9]+)$', base)
-
-        if not base_match:
-            self._log_error(f"Invalid syntax '{base}'. Expected: colors.<name>.<mode>.<format>", raw_expr)
+    def _evaluate_color_expression(self, node: ExprNode) -> str:
+        """Evaluate a colors.name.mode.format expression with optional filters."""
+        raw_expr = node.expr
+        if node.color_ref is None:
+            self._log_error(f"Invalid syntax '{node.base}'. Expected: colors.<name>.<mode>.<format>", raw_expr)
             return f"{{{{{raw_expr}}}}}"
 
-        color_name, mode, format_type = base_match.groups()
+        color_name, mode, format_type = node.color_ref
 
         hex_color = self._get_hex_color(color_name, mode)
         if not hex_color:
@@ -601,8 +1003,7 @@ class TemplateRenderer:
         color = Color.from_hex(hex_color)
 
         # Apply color filters
-        for filter_str in filters:
-            filter_name, arg = self._parse_filter(filter_str)
+        for filter_name, arg in node.filters:
             if filter_name:
                 if filter_name == "replace":
                     # Replace works on the formatted string, apply after formatting
@@ -618,7 +1019,7 @@ class TemplateRenderer:
                 elif filter_name in ("lower_case", "camel_case", "pascal_case", "snake_case", "kebab_case"):
                     # String case filters apply to formatted output
                     formatted = self._format_color(color, format_type)
-                    return self._apply_string_or_color_filter(formatted, filter_str, raw_expr)
+                    return self._apply_value_filter(formatted, filter_name, arg, raw_expr)
                 else:
                     self._log_warning(f"Unknown filter '{filter_name}'")
 
@@ -628,12 +1029,11 @@ class TemplateRenderer:
 
     def _get_hex_color(self, color_name: str, mode: str) -> Optional[str]:
         """Get raw hex color value for a color name and mode."""
-        key = self.COLOR_ALIASES.get(color_name, color_name)
+        if self._reads is not None:
+            self._record_read(f"color:{color_name}:{mode}")
 
-        if mode == "default":
-            mode_data = self.theme_data.get(self.default_mode) or self.theme_data.get("dark") or self.theme_data.get("light")
-        else:
-            mode_data = self.theme_data.get(mode)
+        key = self.COLOR_ALIASES.get(color_name, color_name)
+        mode_data = self._mode_data(mode)
 
         if not mode_data:
             self._log_error(f"Unknown mode '{mode}'", f"colors.{color_name}.{mode}")
@@ -646,6 +1046,78 @@ class TemplateRenderer:
 
         return hex_color
 
+    def _mode_data(self, mode: str) -> Optional[dict[str, str]]:
+        """Theme colors of a mode; "default" falls back to dark, then light."""
+        if mode == "default":
+            return self.theme_data.get(self.default_mode) or self.theme_data.get("dark") or self.theme_data.get("light")
+        return self.theme_data.get(mode)
+
+    # --- Dependency Tracking ---
+
+    def _record_read(self, dependency: str):
+        """Remember the current value of a dependency the template reads."""
+        if dependency not in self._reads:
+            self._reads[dependency] = self._read_value(dependency)
+
+    def _read_value(self, dependency: str) -> Optional[str]:
+        """
+        Current value of a dependency recorded by _record_read().
+
+        Dependencies are "color:<name>:<mode>", "palette:<name>", "colors"
+        (a digest of the whole colors map), "image" and "closest_color".
+        """
+        kind, _, rest = dependency.partition(":")
+        if kind == "color":
+            color_name, _, mode = rest.rpartition(":")
+            mode_data = self._mode_data(mode)
+            if not mode_data:
+                return None
+            return mode_data.get(self.COLOR_ALIASES.get(color_name, color_name))
+        if kind == "palette":
+            color_name = self.PALETTE_COLORS.get(rest)
+            if not color_name:
+                return None
+            return self.theme_data.get(self.default_mode, {}).get(color_name)
+        if kind == "colors":
+            colors_map = self._build_colors_map()
+            if self._colors_digest is None or self._colors_digest[0] is not colors_map:
+                encoded = json.dumps(colors_map, sort_keys=True, default=str).encode()
+                self._colors_digest = (colors_map, hashlib.sha1(encoded).hexdigest())
+            return self._colors_digest[1]
+        if kind == "image":
+            return self.image_path
+        if kind == "closest_color":
+            return self.closest_color
+        return None
+
+    def _is_up_to_date(self, entry: dict, template: list, output_path: Path) -> bool:
+        """Whether a manifest entry still describes the template, its inputs and the output on disk."""
+        try:
+            if entry["template"] != template:
+                return False
+            stat = output_path.stat()
+            if entry["output"] != [stat.st_mtime_ns, stat.st_size]:
+                return False
+            return all(self._read_value(dependency) == value for dependency, value in entry["reads"].items())
+        except (OSError, KeyError, TypeError, AttributeError):
+            return False
+
+    @staticmethod
+    def _output_matches(entry: Optional[dict], digest: str, output_path: Path, text: str) -> bool:
+        """Whether the output file already holds exactly `text`."""
+        try:
+            stat = output_path.stat()
+        except OSError:
+            return False
+        if entry is not None and entry.get("digest") == digest and entry.get("output") == [stat.st_mtime_ns, stat.st_size]:
+            return True
+        # No usable record of the file, compare its contents
+        try:
+            with open(output_path, "r", newline="") as f:
+                return f.read() == text
+        except (OSError, ValueError):
+            return False
+
     def _format_color(self, color: Color, format_type: str) -> str:
         """Format a Color object to the requested format string."""
         if format_type == "hex":
@@ -655,15 +1127,13 @@ class TemplateRenderer:
         elif format_type == "rgb":
             return f"rgb({color.r}, {color.g}, {color.b})"
         elif format_type == "rgba":
-            alpha = getattr(color, 'alpha', 1.0)
-            return f"rgba({color.r}, {color.g}, {color.b}, {alpha})"
+            return f"rgba({color.r}, {color.g}, {color.b}, {color.alpha})"
         elif format_type == "hsl":
             h, s, l = color.to_hsl()
             return f"hsl({int(h)}, {int(s * 100)}%, {int(l * 100)}%)"
         elif format_type == "hsla":
             h, s, l = color.to_hsl()
-            alpha = getattr(color, 'alpha', 1.0)
-            return f"hsla({int(h)}, {int(s * 100)}%, {int(l * 100)}%, {alpha})"
+            return f"hsla({int(h)}, {int(s * 100)}%, {int(l * 100)}%, {color.alpha})"
         elif format_type == "hue":
             h, _, _ = color.to_hsl()
             return str(int(h))
@@ -680,7 +1150,7 @@ class TemplateRenderer:
         elif format_type == "blue":
             return str(color.b)
         elif format_type == "alpha":
-            return str(getattr(color, 'alpha', 1.0))
+            return str(color.alpha)
         else:
             self._log_error(f"Unknown format '{format_type}'")
             return color.to_hex()
@@ -709,10 +1179,8 @@ class TemplateRenderer:
 
         return filter_str, None
 
-    def _apply_string_or_color_filter(self, value: str, filter_str: str, raw_expr: str) -> str:
-        """Apply a filter to a string value (may be a color hex or plain string)."""
-        name, arg = self._parse_filter(filter_str)
-
+    def _apply_value_filter(self, value: str, name: str, arg: Optional[str], raw_expr: str) -> str:
+        """Apply a parsed filter to a string value (may be a color hex or plain string)."""
         if name == "replace":
             return self._apply_replace(value, arg, raw_expr)
 
@@ -893,8 +1361,7 @@ class TemplateRenderer:
         elif filter_name == "invert":
             result = Color(255 - color.r, 255 - color.g, 255 - color.b)
         elif filter_name == "set_alpha":
-            result = Color(color.r, color.g, color.b)
-            result.alpha = max(0.0, min(1.0, num_arg))
+            return color.with_alpha(max(0.0, min(1.0, num_arg)))
         elif filter_name == "set_lightness":
             new_l = max(0.0, min(1.0, num_arg / 100.0))
             result = Color.from_hsl(h, s, new_l)
@@ -932,23 +1399,64 @@ class TemplateRenderer:
         else:
             result = color
 
-        if hasattr(color, 'alpha') and not hasattr(result, 'alpha'):
-            result.alpha = color.alpha
+        # Filters that rebuild the color keep its alpha
+        if result.alpha != color.alpha:
+            result = result.with_alpha(color.alpha)
 
         return result
 
     # --- Main Render Methods ---
 
+    def compile(self, template_text: str) -> TemplatePlan:
+        """Compile a template string into a (cached) TemplatePlan."""
+        return _PLAN_CACHE.get(("text", template_text), lambda: self._compile(template_text))
+
+    def compile_file(self, input_path: Path) -> TemplatePlan:
+        """
+        Compile a template file into a (cached) TemplatePlan.
+
+        Plans are keyed by the file's path, mtime and size, so an unchanged
+        template is not even read again.
+        """
+        return self._compile_file(input_path, self._file_key(input_path))
+
+    @staticmethod
+    def _file_key(input_path: Path) -> tuple:
+        """Plan cache key of a template file: ("file", path, mtime_ns, size)."""
+        stat = input_path.stat()
+        return ("file", str(input_path.resolve()), stat.st_mtime_ns, stat.st_size)
+
+    def _compile_file(self, input_path: Path, key: tuple) -> TemplatePlan:
+        return _PLAN_CACHE.get(key, lambda: self._compile(input_path.read_text()))
+
+    def _compile(self, template_text: str) -> TemplatePlan:
+        """Parse template text into a plan, collecting parser diagnostics."""
+        self._diagnostics = []
+        try:
+            nodes = self._parse_template(template_text)
+            return TemplatePlan(nodes, self._diagnostics)
+        finally:
+            self._diagnostics = None
+
     def render(self, template_text: str) -> str:
         """Render a template string, processing blocks and expressions."""
+        return self.render_plan(self.compile(template_text))
+
+    def render_plan(self, plan: TemplatePlan) -> str:
+        """Render a compiled template against the current theme data."""
         self._error_count = 0
+        self._warning_count = 0
 
-        # Parse template into node tree
-        nodes = self._parse_template(template_text)
+        # Diagnostics from parsing the template
+        for level, message, hint in plan.diagnostics:
+            if level == "error":
+                self._log_error(message, hint)
+            else:
+                self._log_warning(message)
 
         # Evaluate with empty scope
         scope = VariableScope()
-        result = self._evaluate_nodes(nodes, scope)
+        result = self._evaluate_nodes(plan.nodes, scope)
 
         if self.closest_color:
             result = self._substitute_closest_color(result)
@@ -957,7 +1465,7 @@ class TemplateRenderer:
         result = result.replace('\\\\', '\\')
 
         if self._error_count > 0:
-            print(f"Template rendering completed with {self._error_count} error(s)", file=sys.stderr)
+            print(f"Template rendering completed with {self._error_count} error(s)", file=self._log_file())
 
         return result
 
@@ -965,19 +1473,60 @@ class TemplateRenderer:
         """Render a template file to an output path.
 
         Returns True if successful, False if skipped due to errors.
+
+        With a manifest, a template whose entry is still up to date is not
+        rendered at all and output identical to the file on disk is not
+        written; either way the call succeeds without changing the output.
         """
         self._current_file = str(input_path)
+        self._output_changed = False
         success = False
+        manifest = self.manifest
+        output_key = str(output_path.absolute())
         try:
-            template_text = input_path.read_text()
-            rendered_text = self.render(template_text)
+            key = self._file_key(input_path)
+            template = list(key[1:])
+            entry = None
+            if manifest is not None and not self.force:
+                entry = manifest.get(output_key)
+                if entry is not None and self._is_up_to_date(entry, template, output_path):
+                    return True
+
+            plan = self._compile_file(input_path, key)
+            if manifest is not None:
+                self._reads = {}
+                self._record_read("closest_color")
+            try:
+                rendered_text = self.render_plan(plan)
+                reads = self._reads
+            finally:
+                self._reads = None
 
             if self._error_count > 0:
-                print(f"Skipping {output_path}: template has {self._error_count} error(s)", file=sys.stderr)
+                print(f"Skipping {output_path}: template has {self._error_count} error(s)", file=self._log_file())
+                if manifest is not None:
+                    manifest.discard(output_key)
+            elif manifest is None:
+                _write_output(output_path, rendered_text)
+                self._output_changed = True
+                success = True
             else:
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-                output_path.write_text(rendered_text)
+                digest = hashlib.sha1(rendered_text.encode("utf-8", "surrogatepass")).hexdigest()
+                if self.force or not self._output_matches(entry, digest, output_path, rendered_text):
+                    _write_output(output_path, rendered_text)
+                    self._output_changed = True
                 success = True
+
+                if self._warning_count > 0:
+                    manifest.discard(output_key)
+                else:
+                    stat = output_path.stat()
+                    manifest.put(output_key, {
+                        "template": template,
+                        "reads": reads,
+                        "output": [stat.st_mtime_ns, stat.st_size],
+                        "digest": digest,
+                    })
         except FileNotFoundError:
             self._log_error(f"Template file not found: {input_path}")
         except PermissionError:
@@ -1103,16 +1652,48 @@ class TemplateRenderer:
         # Invalidate colors map cache so new colors appear in iterations
         self._colors_map = None
 
+    def _fork(self) -> 'TemplateRenderer':
+        """Copy sharing the theme data and manifest, with its own render state and log buffer."""
+        clone = copy.copy(self)
+        clone.closest_color = ""
+        clone._current_file = None
+        clone._error_count = 0
+        clone._warning_count = 0
+        clone._diagnostics = None
+        clone._reads = None
+        clone._output_changed = False
+        clone._log_buffer = io.StringIO()
+        return clone
+
     def _substitute_closest_color(self, text: str) -> str:
         """Substitute {{closest_color}} in text."""
         return re.sub(r"\{\{\s*closest_color\s*\}\}", self.closest_color, text)
 
-    def process_config_file(self, config_path: Path):
-        """Process Matugen TOML configuration file."""
+    def process_config_file(self, config_path: Path, should_stop=None):
+        """
+        Process Matugen TOML configuration file.
+
+        Templates are rendered in a thread pool and written atomically; the
+        hooks of each template (pre_hook, then post_hook) start as soon as it
+        is rendered and run concurrently with other templates' hooks, capped
+        at [config] hook_concurrency. Hooks have no time limit unless
+        hook_timeout (seconds, in [config] or per template; 0 for no limit)
+        is set, after which they are killed. Hook output is captured and
+        written to sys.stdout/sys.stderr when the hook exits, so daemon and
+        batch jobs collect it. Diagnostics are printed in config order.
+        With verbose, a JSON timing report (including hook output) goes to
+        stderr.
+
+        Args:
+            config_path: Path to the TOML config
+            should_stop: Optional callable; when it returns True, remaining
+                templates are skipped (used by the daemon to drop stale jobs)
+        """
         if not tomllib:
             print("Error: tomllib module not available (requires Python 3.11+)", file=sys.stderr)
             return
 
+        start = time.perf_counter()
         try:
             with open(config_path, "rb") as f:
                 data = tomllib.load(f)
@@ -1122,53 +1703,192 @@ class TemplateRenderer:
             custom_colors = config_section.get("custom_colors")
             if custom_colors:
                 self._apply_custom_colors(custom_colors)
-
-            templates = data.get("templates", {})
-            for name, template in templates.items():
-                input_path = template.get("input_path")
-                output_path = template.get("output_path")
-
-                if not input_path or not output_path:
-                    print(f"Warning: Template '{name}' missing input_path or output_path", file=sys.stderr)
-                    continue
-
-                # Handle closest_color if configured (matugen-compatible)
-                # Reset for each template to avoid state pollution between templates
-                self.closest_color = ""
-                colors_to_compare = template.get("colors_to_compare")
-                compare_to = template.get("compare_to")
-
-                if colors_to_compare and compare_to:
-                    rendered_compare_to = self.render(compare_to)
-                    self.closest_color = find_closest_color(rendered_compare_to, colors_to_compare)
-
-                self.render_file(Path(input_path).expanduser(), Path(output_path).expanduser())
-
-                # Execute pre_hook if specified
-                pre_hook = template.get("pre_hook")
-                if pre_hook:
-                    import subprocess
-                    if self.closest_color:
-                        pre_hook = self._substitute_closest_color(pre_hook)
-                    pre_hook = self.render(pre_hook)
-                    try:
-                        subprocess.run(pre_hook, shell=True, check=False)
-                    except Exception as e:
-                        print(f"Error running pre_hook for {name}: {e}", file=sys.stderr)
-
-                # Execute post_hook if specified
-                post_hook = template.get("post_hook")
-                if post_hook:
-                    import subprocess
-                    if self.closest_color:
-                        post_hook = self._substitute_closest_color(post_hook)
-                    post_hook = self.render(post_hook)
-                    try:
-                        subprocess.run(post_hook, shell=True, check=False)
-                    except Exception as e:
-                        print(f"Error running post_hook for {name}: {e}", file=sys.stderr)
+            # Shared by every forked renderer
+            self._build_colors_map()
+
+            hook_timeout = self._config_number(config_section, "hook_timeout", HOOK_TIMEOUT)
+            hook_concurrency = int(self._config_number(config_section, "hook_concurrency", HOOK_CONCURRENCY, minimum=1))
+
+            jobs = []
+            for name, template in data.get("templates", {}).items():
+                timeout = self._config_number(template, "hook_timeout", hook_timeout)
+                jobs.append(_TemplateJob(name, template, timeout or None))
+
+            if not asyncio.run(self._run_pipeline(jobs, should_stop, hook_concurrency)):
+                return
+
+            if self.verbose:
+                report = {
+                    "event": "templates",
+                    "config": str(config_path),
+                    "wall_ms": round((time.perf_counter() - start) * 1000, 3),
+                    "templates": [
+                        {"name": job.name, "status": job.status, "render_ms": round(job.render_ms, 3), "hooks": job.hook_timings}
+                        for job in jobs
+                    ],
+                }
+                print(json.dumps(report, separators=(",", ":")), file=sys.stderr)
 
         except FileNotFoundError:
             print(f"Error: Config file not found: {config_path}", file=sys.stderr)
         except Exception as e:
             print(f"Error processing config file {config_path}: {e}", file=sys.stderr)
+
+    @staticmethod
+    def _config_number(section: dict, key: str, default: Optional[float], minimum: float = 0) -> Optional[float]:
+        """Read a numeric config option, warning about and ignoring invalid values."""
+        if key not in section:
+            return default
+        value = section[key]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < minimum:
+            print(f"Warning: Invalid {key} '{value}', using {default}", file=sys.stderr)
+            return default
+        return value
+
+    async def _run_pipeline(self, jobs: list['_TemplateJob'], should_stop, hook_concurrency: int) -> bool:
+        """
+        Render jobs in a thread pool and start their hooks as renders finish.
+
+        Templates writing the same output file are rendered one after
+        another in config order, so the last one still wins.
+
+        Returns False if should_stop() interrupted the run; hooks that
+        already started are still waited for.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(hook_concurrency)
+        hook_tasks = []
+        groups: OrderedDict[str, list[_TemplateJob]] = OrderedDict()
+        job_groups = []
+        for index, job in enumerate(jobs):
+            key = self._output_key(job, index)
+            groups.setdefault(key, []).append(job)
+            job_groups.append(key)
+
+        pool = ThreadPoolExecutor(max_workers=max(1, min(RENDER_WORKERS, len(groups))), thread_name_prefix="render")
+        try:
+            renders = {
+                key: loop.run_in_executor(pool, self._render_group, group, should_stop)
+                for key, group in groups.items()
+            }
+            for job, key in zip(jobs, job_groups):
+                try:
+                    await renders[key]
+                finally:
+                    sys.stderr.write(job.log)
+                if should_stop and should_stop():
+                    return False
+                if job.hooks:
+                    hook_tasks.append(asyncio.create_task(self._run_hooks(job, semaphore)))
+            return True
+        finally:
+            pool.shutdown(cancel_futures=True)
+            if hook_tasks:
+                await asyncio.gather(*hook_tasks)
+
+    @staticmethod
+    def _output_key(job: '_TemplateJob', index: int) -> str:
+        """The resolved output path of a job (unique per job without one)."""
+        output_path = job.template.get("output_path")
+        if not isinstance(output_path, str) or not output_path:
+            return f"#{index}"
+        try:
+            return str(Path(output_path).expanduser().resolve())
+        except (OSError, RuntimeError):
+            return str(Path(output_path).expanduser())
+
+    def _render_group(self, group: list['_TemplateJob'], should_stop) -> list['_TemplateJob']:
+        """Render jobs sharing an output file one after another (runs in the render pool)."""
+        for job in group:
+            self._render_template(job, should_stop)
+        return group
+
+    def _render_template(self, job: '_TemplateJob', should_stop) -> '_TemplateJob':
+        """Render one config template on a forked renderer (runs in the render pool)."""
+        if should_stop and should_stop():
+            return job
+        renderer = self._fork()
+        start = time.perf_counter()
+        try:
+            renderer._prepare_template(job)
+        finally:
+            job.render_ms = (time.perf_counter() - start) * 1000
+            job.log = renderer._log_buffer.getvalue()
+        return job
+
+    def _prepare_template(self, job: '_TemplateJob'):
+        """Render a template's output and its hook commands into job."""
+        template = job.template
+        input_path = template.get("input_path")
+        output_path = template.get("output_path")
+
+        if not input_path or not output_path:
+            print(f"Warning: Template '{job.name}' missing input_path or output_path", file=self._log_file())
+            return
+
+        # Handle closest_color if configured (matugen-compatible)
+        colors_to_compare = template.get("colors_to_compare")
+        compare_to = template.get("compare_to")
+
+        if colors_to_compare and compare_to:
+            rendered_compare_to = self.render(compare_to)
+            self.closest_color = find_closest_color(rendered_compare_to, colors_to_compare)
+
+        rendered = self.render_file(Path(input_path).expanduser(), Path(output_path).expanduser())
+
+        # Hooks reload apps, which is pointless if the output is unchanged
+        if rendered and not self._output_changed:
+            job.status = "unchanged"
+            return
+        job.status = "written" if rendered else "failed"
+
+        for key in ("pre_hook", "post_hook"):
+            hook = template.get(key)
+            if hook:
+                if self.closest_color:
+                    hook = self._substitute_closest_color(hook)
+                job.hooks.append((key, self.render(hook)))
+
+    async def _run_hooks(self, job: '_TemplateJob', semaphore: asyncio.Semaphore):
+        """Run a template's hooks one after another."""
+        for key, command in job.hooks:
+            async with semaphore:
+                job.hook_timings.append(await self._run_hook(job.name, key, command, job.hook_timeout))
+
+    @staticmethod
+    async def _run_hook(name: str, key: str, command: str, timeout: Optional[float]) -> dict[str, Any]:
+        """
+        Run a hook through the shell; returns its timing entry.
+
+        Output goes to temporary files rather than pipes: a hook that leaves
+        a background process behind (e.g. `app &`) would otherwise keep the
+        pipe open and stall the pipeline.
+        """
+        start = time.perf_counter()
+        timing: dict[str, Any] = {"hook": key, "ms": 0.0, "exit_code": None, "timed_out": False,
+                                  "stdout": "", "stderr": ""}
+        try:
+            with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+                # Its own session, so a timed-out hook is killed with everything it started
+                process = await asyncio.create_subprocess_shell(
+                    command, stdout=out, stderr=err, start_new_session=True)
+                try:
+                    timing["exit_code"] = await asyncio.wait_for(process.wait(), timeout)
+                except asyncio.TimeoutError:
+                    timing["timed_out"] = True
+                    try:
+                        os.killpg(process.pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                    timing["exit_code"] = await process.wait()
+                for stream, target, field_name in ((out, sys.stdout, "stdout"), (err, sys.stderr, "stderr")):
+                    stream.seek(0)
+                    text = stream.read().decode(errors="replace")
+                    timing[field_name] = text
+                    target.write(text)
+            if timing["timed_out"]:
+                print(f"Error running {key} for {name}: timed out after {timeout:g}s", file=sys.stderr)
+        except Exception as e:
+            print(f"Error running {key} for {name}: {e}", file=sys.stderr)
+        timing["ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return timing
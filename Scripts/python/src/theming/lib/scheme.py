@@ -15,7 +15,7 @@ Output: Full 48-color palette matching generate_theme() output.
 from typing import Literal
 
 from .color import Color
-from .contrast import ensure_contrast
+from .contrast import ensure_contrast, ensure_contrast_batch
 
 ThemeMode = Literal["dark", "light"]
 
@@ -106,41 +106,11 @@ def expand_predefined_scheme(scheme_data: dict[str, str], mode: ThemeMode) -> di
         tertiary_container = _make_container_light(tertiary)
         error_container = _make_container_light(error)
 
-    # Generate "on container" colors with proper contrast
     primary_h, primary_s, _ = primary.to_hsl()
     secondary_h, secondary_s, _ = secondary.to_hsl()
     tertiary_h, tertiary_s, _ = tertiary.to_hsl()
     error_h, error_s, _ = error.to_hsl()
 
-    if is_dark:
-        # Light text on dark containers
-        on_primary_container = ensure_contrast(
-            Color.from_hsl(primary_h, primary_s, 0.90), primary_container, 4.5
-        )
-        on_secondary_container = ensure_contrast(
-            Color.from_hsl(secondary_h, secondary_s, 0.90), secondary_container, 4.5
-        )
-        on_tertiary_container = ensure_contrast(
-            Color.from_hsl(tertiary_h, tertiary_s, 0.90), tertiary_container, 4.5
-        )
-        on_error_container = ensure_contrast(
-            Color.from_hsl(error_h, error_s, 0.90), error_container, 4.5
-        )
-    else:
-        # Dark text on light containers
-        on_primary_container = ensure_contrast(
-            Color.from_hsl(primary_h, primary_s, 0.15), primary_container, 4.5
-        )
-        on_secondary_container = ensure_contrast(
-            Color.from_hsl(secondary_h, secondary_s, 0.15), secondary_container, 4.5
-        )
-        on_tertiary_container = ensure_contrast(
-            Color.from_hsl(tertiary_h, tertiary_s, 0.15), tertiary_container, 4.5
-        )
-        on_error_container = ensure_contrast(
-            Color.from_hsl(error_h, error_s, 0.15), error_container, 4.5
-        )
-
     # Generate fixed colors
     if is_dark:
         primary_fixed, primary_fixed_dim = _make_fixed_dark(primary)
@@ -151,45 +121,32 @@ def expand_predefined_scheme(scheme_data: dict[str, str], mode: ThemeMode) -> di
         secondary_fixed, secondary_fixed_dim = _make_fixed_light(secondary)
         tertiary_fixed, tertiary_fixed_dim = _make_fixed_light(tertiary)
 
-    # Generate "on fixed" colors
+    # Generate "on container" and "on fixed" colors with proper contrast:
+    # light text on dark containers / dark text on light containers, and
+    # the opposite on fixed colors
     if is_dark:
-        on_primary_fixed = ensure_contrast(
-            Color.from_hsl(primary_h, 0.15, 0.15), primary_fixed, 4.5
-        )
-        on_primary_fixed_variant = ensure_contrast(
-            Color.from_hsl(primary_h, 0.15, 0.20), primary_fixed_dim, 4.5
-        )
-        on_secondary_fixed = ensure_contrast(
-            Color.from_hsl(secondary_h, 0.15, 0.15), secondary_fixed, 4.5
-        )
-        on_secondary_fixed_variant = ensure_contrast(
-            Color.from_hsl(secondary_h, 0.15, 0.20), secondary_fixed_dim, 4.5
-        )
-        on_tertiary_fixed = ensure_contrast(
-            Color.from_hsl(tertiary_h, 0.15, 0.15), tertiary_fixed, 4.5
-        )
-        on_tertiary_fixed_variant = ensure_contrast(
-            Color.from_hsl(tertiary_h, 0.15, 0.20), tertiary_fixed_dim, 4.5
-        )
+        on_container_l, on_fixed_l, on_fixed_variant_l = 0.90, 0.15, 0.20
     else:
-        on_primary_fixed = ensure_contrast(
-            Color.from_hsl(primary_h, 0.15, 0.90), primary_fixed, 4.5
-        )
-        on_primary_fixed_variant = ensure_contrast(
-            Color.from_hsl(primary_h, 0.15, 0.85), primary_fixed_dim, 4.5
-        )
-        on_secondary_fixed = ensure_contrast(
-            Color.from_hsl(secondary_h, 0.15, 0.90), secondary_fixed, 4.5
-        )
-        on_secondary_fixed_variant = ensure_contrast(
-            Color.from_hsl(secondary_h, 0.15, 0.85), secondary_fixed_dim, 4.5
-        )
-        on_tertiary_fixed = ensure_contrast(
-            Color.from_hsl(tertiary_h, 0.15, 0.90), tertiary_fixed, 4.5
-        )
-        on_tertiary_fixed_variant = ensure_contrast(
-            Color.from_hsl(tertiary_h, 0.15, 0.85), tertiary_fixed_dim, 4.5
-        )
+        on_container_l, on_fixed_l, on_fixed_variant_l = 0.15, 0.90, 0.85
+
+    (
+        on_primary_container, on_secondary_container,
+        on_tertiary_container, on_error_container,
+        on_primary_fixed, on_primary_fixed_variant,
+        on_secondary_fixed, on_secondary_fixed_variant,
+        on_tertiary_fixed, on_tertiary_fixed_variant,
+    ) = ensure_contrast_batch([
+        (Color.from_hsl(primary_h, primary_s, on_container_l), primary_container, 4.5),
+        (Color.from_hsl(secondary_h, secondary_s, on_container_l), secondary_container, 4.5),
+        (Color.from_hsl(tertiary_h, tertiary_s, on_container_l), tertiary_container, 4.5),
+        (Color.from_hsl(error_h, error_s, on_container_l), error_container, 4.5),
+        (Color.from_hsl(primary_h, 0.15, on_fixed_l), primary_fixed, 4.5),
+        (Color.from_hsl(primary_h, 0.15, on_fixed_variant_l), primary_fixed_dim, 4.5),
+        (Color.from_hsl(secondary_h, 0.15, on_fixed_l), secondary_fixed, 4.5),
+        (Color.from_hsl(secondary_h, 0.15, on_fixed_variant_l), secondary_fixed_dim, 4.5),
+        (Color.from_hsl(tertiary_h, 0.15, on_fixed_l), tertiary_fixed, 4.5),
+        (Color.from_hsl(tertiary_h, 0.15, on_fixed_variant_l), tertiary_fixed_dim, 4.5),
+    ])
 
     # Generate surface containers using mSurfaceVariant as the middle container
     # This respects the scheme author's color choices
@@ -876,3 +876,35 @@ def generate_theme(
     if mode == "dark":
         return generate_material_dark(palette, scheme_type)
     return generate_material_light(palette, scheme_type)
+
+
+def generate_themes(
+    palette: list[Color],
+    modes: list[ThemeMode],
+    scheme_type: str = "tonal-spot"
+) -> dict[str, dict[str, str]]:
+    """
+    Generate themes for several modes at once.
+
+    Same result as calling generate_theme() per mode, but Material schemes
+    are built once and every mode is resolved in a single batched solve
+    (see _BaseScheme.bundle()).
+
+    Args:
+        palette: List of extracted colors
+        modes: Modes to generate, e.g. ["dark", "light"]
+        scheme_type: Any scheme type accepted by generate_theme()
+
+    Returns:
+        Dictionary of mode to color token dictionary
+    """
+    # Non-Material schemes, and empty palettes (whose fallback source color
+    # differs between dark and light), go through generate_theme()
+    if scheme_type in ("vibrant", "faithful", "dysfunctional", "muted") or not palette:
+        return {mode: generate_theme(palette, mode, scheme_type) for mode in modes}
+
+    primary = palette[0]
+    scheme_class = SCHEME_CLASSES.get(scheme_type, SchemeTonalSpot)
+    scheme = scheme_class.from_rgb(primary.r, primary.g, primary.b)
+    bundle = scheme.bundle(tuple(dict.fromkeys(modes)))
+    return {mode: bundle.to_dict(mode) for mode in modes}
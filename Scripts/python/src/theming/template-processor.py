@@ -27,6 +27,12 @@ Options:
     -r, --render     Render a template (input_path:output_path)
     -c, --config     Path to TOML configuration file with template definitions
     --mode           Theme mode: dark or light
+    --no-cache       Skip the on-disk extraction, color solver and template caches ($XDG_CACHE_HOME/noctalia)
+    --force          Re-render every template and run its hooks even if nothing changed
+    --serve          Run as a persistent daemon on a Unix socket (see lib/daemon.py)
+    --batch          Theme many images from a JSON manifest, or "-" for NUL-separated paths on stdin (see lib/batch.py)
+    --jobs           Worker processes for --batch (default: CPU count)
+    --preview        Print only the ranked source color and swatches of a thumbnail (see lib/preview.py)
 
 Input:
     Can be an image file (PNG/JPG) or a JSON color palette file.
@@ -37,6 +43,9 @@ Example:
     python3 template-processor.py ~/wallpaper.jpg --dark -o theme.json
     python3 template-processor.py ~/wallpaper.png -r template.txt:output.txt
     python3 template-processor.py ~/wallpaper.png -c config.toml --mode dark
+    python3 template-processor.py ~/wallpaper.jpg --preview
+    python3 template-processor.py --serve
+    find ~/Wallpapers -type f -print0 | python3 template-processor.py --batch - --dark
 
 Author: Noctalia Team
 License: MIT
@@ -45,21 +54,47 @@ License: MIT
 from __future__ import annotations
 
 import argparse
+import functools
 import json
 import sys
+from collections import OrderedDict
 from pathlib import Path
+from typing import Optional
 
 # Import from lib package
 from lib import (
-    read_image, ImageReadError, extract_palette, generate_theme,
+    read_image, ImageReadError, extract_palette, generate_themes,
     TemplateRenderer, expand_predefined_scheme,
     extract_source_color, source_color_to_rgb, Color,
     TerminalColors, TerminalGenerator
 )
+from lib.cache import (
+    ExtractionCache, load_solver_cache, save_solver_cache,
+    load_template_plans, save_template_plans,
+    load_render_manifest, save_render_manifest,
+)
+from lib.quantizer import quantize_celebi, source_color_from_population
 
 
-def parse_args() -> argparse.Namespace:
-    """Parse command-line arguments."""
+# Extracted palettes kept warm for the lifetime of the process (daemon mode),
+# keyed by (path, mtime, size, scheme type)
+_PALETTE_MEMO: OrderedDict = OrderedDict()
+_PALETTE_MEMO_SIZE = 8
+
+# What every output was last rendered from (see lib.renderer.RenderManifest),
+# loaded by main() unless --no-cache is given
+_RENDER_MANIFEST = None
+
+# Batch workers: (hue, chroma, tone) keys of solver results the parent
+# already has, and the solver miss count when they were last collected
+_BATCH_KNOWN_SOLVES: set = set()
+_BATCH_SOLVER_MISSES = 0
+
+M3_SCHEMES = {"tonal-spot", "content", "fruit-salad", "rainbow", "monochrome"}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
     parser = argparse.ArgumentParser(
         prog='template-processor',
         description='Extract color palettes from wallpapers and generate themes',
@@ -71,6 +106,9 @@ Examples:
   python3 template-processor.py wallpaper.jpg --dark -o theme.json                 # output to file
   python3 template-processor.py wallpaper.png -r template.txt:output.txt           # render template
   python3 template-processor.py wallpaper.png -c config.toml --mode dark           # render config, dark only
+  python3 template-processor.py wallpaper.jpg --preview                           # source color + swatches only
+  python3 template-processor.py --serve                                            # persistent daemon
+  python3 template-processor.py --batch walls.json --jobs 4                        # many images, NDJSON output
         """
     )
 
@@ -150,12 +188,156 @@ Examples:
         help='JSON mapping of terminal IDs to output paths: {"foot": "/path/to/output", ...}'
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Do not read or write the on-disk extraction, color solver and compiled template caches'
+    )
 
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Render and write every template and run its hooks, even if its colors did not change'
+    )
 
-def main() -> int:
-    """Main entry point."""
-    args = parse_args()
+    parser.add_argument(
+        '--preview',
+        action='store_true',
+        help='Print only the ranked source color and swatches of the image, from a thumbnail or the extraction cache'
+    )
+
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Run as a persistent daemon accepting JSON requests on a Unix socket'
+    )
+
+    parser.add_argument(
+        '--socket',
+        type=Path,
+        help='Socket path for --serve (default: $XDG_RUNTIME_DIR/noctalia/template-processor.sock)'
+    )
+
+    parser.add_argument(
+        '--batch',
+        metavar='MANIFEST',
+        help='Theme every image in a JSON manifest ("-" reads NUL-separated image paths from stdin) and print NDJSON results'
+    )
+
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        help='Worker processes for --batch (default: CPU count)'
+    )
+
+    return parser
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    return build_parser().parse_args(argv)
+
+
+def extract_image_palette(image_path: Path, scheme_type: str, use_cache: bool = True) -> list[Color]:
+    """
+    Read a wallpaper and extract the palette for the given scheme type.
+
+    Results are memoized in-process per (path, mtime, size, scheme type) and
+    stored in the on-disk extraction cache, so a repeated wallpaper skips
+    decoding and quantization entirely. With use_cache=False neither is read
+    nor written. M3 schemes share one WSMeans
+    histogram, so switching between them only re-runs scoring.
+
+    Raises:
+        ImageReadError: If the image cannot be read
+    """
+    stat = image_path.stat()
+    memo_key = (str(image_path.resolve()), stat.st_mtime_ns, stat.st_size, scheme_type)
+    if use_cache and memo_key in _PALETTE_MEMO:
+        _PALETTE_MEMO.move_to_end(memo_key)
+        return list(_PALETTE_MEMO[memo_key])
+
+    # M3 schemes use Triangle filter (matches matugen), others use Box
+    # (sharper downscale preserves distinct color regions for k-means)
+    resize_filter = "Triangle" if scheme_type in M3_SCHEMES else "Box"
+
+    cache = ExtractionCache() if use_cache else None
+    cache_key = ""
+    entry: dict = {}
+    if cache:
+        cache_key = cache.image_key(image_path, resize_filter)
+        entry = cache.get(cache_key) or {}
+        cached_palette = entry.get("palettes", {}).get(scheme_type)
+        if cached_palette:
+            palette = [Color.from_hex(h) for h in cached_palette]
+            _remember_palette(memo_key, palette)
+            return palette
+
+    if scheme_type in M3_SCHEMES and "population" in entry:
+        # Same image and filter already quantized for another M3 scheme
+        color_to_count = {argb: count for argb, count in entry["population"]}
+        r, g, b = source_color_to_rgb(source_color_from_population(color_to_count))
+        palette = [Color(r, g, b)]
+    else:
+        pixels = read_image(image_path, resize_filter)
+
+        # Extract palette based on scheme type:
+        # - M3 schemes (tonal-spot, fruit-salad, rainbow, content): Use Wu quantizer + Score
+        #   This matches matugen's color extraction exactly
+        # - vibrant: Use k-means clustering for colorful/blended colors
+        # - faithful: Use Wu quantizer for primary (dominant by area), k-means for accents
+        # - dysfunctional: Like faithful but picks 2nd most dominant color family
+        # - muted: Like count but without chroma filtering (for monochrome wallpapers)
+        if scheme_type == "vibrant":
+            # K-means with chroma scoring for vibrant, blended colors
+            palette = extract_palette(pixels, k=5, scoring="chroma")
+        elif scheme_type == "faithful":
+            # K-means with count scoring - picks dominant color by area coverage
+            # This ensures primary reflects what you actually see in the image
+            palette = extract_palette(pixels, k=5, scoring="count")
+        elif scheme_type == "dysfunctional":
+            # K-means with dysfunctional scoring - picks 2nd most dominant color family
+            # For when the dominant color is not what you want as primary
+            palette = extract_palette(pixels, k=5, scoring="dysfunctional")
+        elif scheme_type == "muted":
+            # K-means with muted scoring - accepts low/zero chroma colors
+            # For monochrome/monotonal wallpapers where dominant color has low saturation
+            palette = extract_palette(pixels, k=5, scoring="muted")
+        elif pixels:
+            # Wu quantizer + Score algorithm (matches matugen)
+            _, color_to_count = quantize_celebi(pixels, 128)
+            entry["population"] = list(color_to_count.items())
+            r, g, b = source_color_to_rgb(source_color_from_population(color_to_count))
+            palette = [Color(r, g, b)]
+        else:
+            r, g, b = source_color_to_rgb(extract_source_color(pixels))
+            palette = [Color(r, g, b)]
+
+    if palette and cache:
+        _remember_palette(memo_key, palette)
+        entry.setdefault("palettes", {})[scheme_type] = [c.to_hex() for c in palette]
+        cache.put(cache_key, entry)
+    return palette
+
+
+def _remember_palette(memo_key: tuple, palette: list[Color]):
+    """Keep a palette in the in-process memo, evicting the oldest entries."""
+    _PALETTE_MEMO[memo_key] = list(palette)
+    while len(_PALETTE_MEMO) > _PALETTE_MEMO_SIZE:
+        _PALETTE_MEMO.popitem(last=False)
+
+
+def run(args: argparse.Namespace, job=None) -> int:
+    """
+    Run one template-processor job.
+
+    Args:
+        args: Parsed command-line arguments
+        job: Daemon job handle (daemon mode only); checked between processing
+            stages so a superseded request stops early
+    """
+    if args.preview:
+        return run_preview(args)
 
     # Initialize result dictionary
     result: dict[str, dict[str, str]] = {}
@@ -251,16 +433,8 @@ def main() -> int:
                 print(f"Error: Not a file: {args.image}", file=sys.stderr)
                 return 1
 
-            # Determine scheme type
-            scheme_type = args.scheme_type
-
-            # M3 schemes use Triangle filter (matches matugen), others use Box
-            # (sharper downscale preserves distinct color regions for k-means)
-            m3_schemes = {"tonal-spot", "content", "fruit-salad", "rainbow", "monochrome"}
-            resize_filter = "Triangle" if scheme_type in m3_schemes else "Box"
-
             try:
-                pixels = read_image(args.image, resize_filter)
+                palette = extract_image_palette(args.image, args.scheme_type, use_cache=not args.no_cache)
             except ImageReadError as e:
                 print(f"Error reading image: {e}", file=sys.stderr)
                 return 1
@@ -268,41 +442,18 @@ def main() -> int:
                 print(f"Unexpected error reading image: {e}", file=sys.stderr)
                 return 1
 
-            # Extract palette based on scheme type:
-            # - M3 schemes (tonal-spot, fruit-salad, rainbow, content): Use Wu quantizer + Score
-            #   This matches matugen's color extraction exactly
-            # - vibrant: Use k-means clustering for colorful/blended colors
-            # - faithful: Use Wu quantizer for primary (dominant by area), k-means for accents
-            # - dysfunctional: Like faithful but picks 2nd most dominant color family
-            # - muted: Like count but without chroma filtering (for monochrome wallpapers)
-            if scheme_type == "vibrant":
-                # K-means with chroma scoring for vibrant, blended colors
-                palette = extract_palette(pixels, k=5, scoring="chroma")
-            elif scheme_type == "faithful":
-                # K-means with count scoring - picks dominant color by area coverage
-                # This ensures primary reflects what you actually see in the image
-                palette = extract_palette(pixels, k=5, scoring="count")
-            elif scheme_type == "dysfunctional":
-                # K-means with dysfunctional scoring - picks 2nd most dominant color family
-                # For when the dominant color is not what you want as primary
-                palette = extract_palette(pixels, k=5, scoring="dysfunctional")
-            elif scheme_type == "muted":
-                # K-means with muted scoring - accepts low/zero chroma colors
-                # For monochrome/monotonal wallpapers where dominant color has low saturation
-                palette = extract_palette(pixels, k=5, scoring="muted")
-            else:
-                # Wu quantizer + Score algorithm (matches matugen)
-                source_argb = extract_source_color(pixels)
-                r, g, b = source_color_to_rgb(source_argb)
-                palette = [Color(r, g, b)]
-
             if not palette:
                 print("Error: Could not extract colors from image", file=sys.stderr)
                 return 1
 
+            if job:
+                job.check_cancelled()
+
             # Generate theme for each mode
-            for mode in modes:
-                result[mode] = generate_theme(palette, mode, scheme_type)
+            result.update(generate_themes(palette, modes, args.scheme_type))
+
+    if job:
+        job.check_cancelled()
 
     # Output JSON
     json_output = json.dumps(result, indent=2)
@@ -320,7 +471,9 @@ def main() -> int:
     # Process templates
     if args.render or args.config:
         image_path = str(args.image) if args.image else None
-        renderer = TemplateRenderer(result, default_mode=args.default_mode, image_path=image_path, scheme_type=args.scheme_type)
+        manifest = None if args.no_cache else _RENDER_MANIFEST
+        renderer = TemplateRenderer(result, default_mode=args.default_mode, image_path=image_path, scheme_type=args.scheme_type,
+                                    manifest=manifest, force=args.force)
 
         if args.render:
             for render_spec in args.render:
@@ -336,13 +489,18 @@ def main() -> int:
                     print(f"Error: Template not found: {input_path}", file=sys.stderr)
                     continue
 
+                if job:
+                    job.check_cancelled()
                 renderer.render_file(input_path, output_path)
 
         if args.config:
             if not args.config.exists():
                 print(f"Error: Config file not found: {args.config}", file=sys.stderr)
             else:
-                renderer.process_config_file(args.config)
+                renderer.process_config_file(args.config, should_stop=job.is_cancelled if job else None)
+
+        if job:
+            job.check_cancelled()
 
     # Process terminal output if specified
     if args.terminal_output and args.scheme:
@@ -393,5 +551,159 @@ def main() -> int:
     return 0
 
 
+def run_preview(args: argparse.Namespace) -> int:
+    """Run --preview: print the ranked colors of a wallpaper thumbnail."""
+    from lib.preview import preview_palette
+
+    if args.render or args.config or args.scheme or args.terminal_output:
+        print("Error: --preview cannot be combined with --render, --config, --scheme or --terminal-output",
+              file=sys.stderr)
+        return 1
+    if args.image is None:
+        print("Error: Image path is required for --preview", file=sys.stderr)
+        return 1
+    if not args.image.exists():
+        print(f"Error: Image not found: {args.image}", file=sys.stderr)
+        return 1
+
+    try:
+        ranked = preview_palette(args.image, args.scheme_type, use_cache=not args.no_cache)
+    except ImageReadError as e:
+        print(f"Error reading image: {e}", file=sys.stderr)
+        return 1
+
+    preview = {
+        "argb": ranked,
+        "colors": [f"#{argb & 0xFFFFFF:06x}" for argb in ranked],
+    }
+    json_output = json.dumps(preview)
+    if args.output:
+        try:
+            args.output.write_text(json_output)
+            print(f"Preview written to: {args.output}", file=sys.stderr)
+        except IOError as e:
+            print(f"Error writing output: {e}", file=sys.stderr)
+            return 1
+    else:
+        print(json_output)
+    return 0
+
+
+def handle_request(argv: list[str], job) -> int:
+    """Daemon entry point: run one request with cancellation support."""
+    args = build_parser().parse_args(argv)
+    if args.serve:
+        print("Error: --serve is not allowed in a daemon request", file=sys.stderr)
+        return 1
+    return run(args, job)
+
+
+def handle_batch_item(argv: list[str]) -> int:
+    """Batch worker entry point: run one item."""
+    args = build_parser().parse_args(argv)
+    if args.serve or args.batch:
+        print("Error: --serve and --batch are not allowed in a batch item", file=sys.stderr)
+        return 1
+    return run(args)
+
+
+def init_batch_worker(use_cache: bool):
+    """
+    Warm a batch worker's solver cache once; it then serves every item it runs.
+
+    Batch items never render templates, so the template plans and render
+    manifest are not loaded.
+    """
+    if use_cache:
+        from lib.hct import solver_cache_items
+
+        load_solver_cache()
+        _BATCH_KNOWN_SOLVES.update((h, c, t) for h, c, t, _ in solver_cache_items())
+
+
+def collect_batch_solves() -> list[tuple[float, float, float, int]]:
+    """Batch worker: solver results computed since the last call, for the parent to save."""
+    from lib.hct import solver_cache_info, solver_cache_items
+
+    global _BATCH_SOLVER_MISSES
+    misses = solver_cache_info()["misses"]
+    if misses == _BATCH_SOLVER_MISSES:
+        return []
+    _BATCH_SOLVER_MISSES = misses
+    solved = [entry for entry in solver_cache_items() if entry[:3] not in _BATCH_KNOWN_SOLVES]
+    _BATCH_KNOWN_SOLVES.update(entry[:3] for entry in solved)
+    return solved
+
+
+def run_batch_mode(args: argparse.Namespace) -> int:
+    """Run --batch: theme every manifest item on a process pool."""
+    from lib.batch import read_manifest, run_batch
+
+    if args.image or args.render or args.config or args.scheme or args.output or args.terminal_output:
+        print("Error: --batch takes its images from the manifest and cannot be combined with "
+              "an image, --render, --config, --scheme, --output or --terminal-output", file=sys.stderr)
+        return 1
+    if args.jobs is not None and args.jobs < 1:
+        print("Error: --jobs must be at least 1", file=sys.stderr)
+        return 1
+
+    try:
+        items = read_manifest(args.batch)
+    except (OSError, ValueError) as e:
+        print(f"Error reading batch manifest: {e}", file=sys.stderr)
+        return 1
+
+    # Batch-wide flags become defaults for every item
+    defaults = {"scheme-type": args.scheme_type, "default-mode": args.default_mode,
+                "mode": args.mode, "dark": args.dark, "light": args.light, "no-cache": args.no_cache,
+                "preview": args.preview}
+    initializer = functools.partial(init_batch_worker, not args.no_cache)
+    if args.no_cache:
+        return run_batch(items, handle_batch_item, defaults, args.jobs, initializer)
+
+    # Workers send back the colors they solved; save them with the parent's
+    # solver cache, which solves nothing itself in batch mode
+    from lib.hct import warm_solver_cache
+
+    merged = 0
+
+    def merge(solved: list):
+        nonlocal merged
+        merged += warm_solver_cache(solved, recent=True)
+
+    exit_code = run_batch(items, handle_batch_item, defaults, args.jobs, initializer,
+                          collect_batch_solves, merge)
+    if merged:
+        save_solver_cache(force=True)
+    return exit_code
+
+
+def main() -> int:
+    """Main entry point."""
+    global _RENDER_MANIFEST
+    args = parse_args()
+
+    # Solved HCT colors, compiled templates and the render manifest persist
+    # across runs; the daemon warms them once and writes them back on shutdown
+    if not args.no_cache:
+        load_solver_cache()
+        load_template_plans()
+        _RENDER_MANIFEST = load_render_manifest()
+
+    if args.serve:
+        from lib.daemon import serve
+        exit_code = serve(handle_request, args.socket)
+    elif args.batch:
+        exit_code = run_batch_mode(args)
+    else:
+        exit_code = run(args)
+
+    if not args.no_cache:
+        save_solver_cache()
+        save_template_plans()
+        save_render_manifest(_RENDER_MANIFEST)
+    return exit_code
+
+
 if __name__ == '__main__':
     sys.exit(main())